@@ -0,0 +1,203 @@
+# ##################################################################
+# File name:    alerts.py
+# Author:       agent
+# Create on:    2026-10-18
+# Description:  Low-stock alerts: reorder thresholds per category or per
+#               item, and the low_stock table kept up to date by triggers
+# ##################################################################
+
+
+import argparse
+import json
+import sys
+
+import cache
+import connection
+import instrumentation
+import migrations
+import schemas
+
+
+# Columns of an alert after the department key
+COLUMNS = ("ItemId", "Description", "PartNo", "Category", "Cabinet",
+           "Amount", "Threshold")
+
+
+# An item threshold overrides the threshold of its category. low_stock
+# holds the items whose Amount is below their threshold; it is written
+# only by the triggers of migrations.py, one item or one category at a
+# time, with the statements of _refresh().
+def _threshold(table):
+    # Threshold of the row `table` (or NEW) in effect, NULL when none
+    return """COALESCE(
+        (SELECT Threshold FROM item_thresholds
+         WHERE TableName='{table}' AND ItemId={table}.rowid),
+        (SELECT Threshold FROM category_thresholds
+         WHERE TableName='{table}' AND Category={table}.Category))""".format(table=table)
+
+
+def _refresh(table, where):
+    # Statements recomputing the alerts of the rows of table matching
+    # where; where must be answered by an index (rowid, Category)
+    return """DELETE FROM low_stock WHERE TableName='{table}'
+                  AND ItemId IN (SELECT rowid FROM {table} WHERE {where});
+              INSERT INTO low_stock (TableName, ItemId, Amount, Threshold)
+                  SELECT '{table}', rowid, Amount, threshold FROM (
+                      SELECT rowid, Amount, {threshold} AS threshold
+                      FROM {table} WHERE {where})
+                  WHERE Amount < threshold;""".format(
+        table=table, where=where, threshold=_threshold(table))
+
+
+def rebuild(cursor):
+    # Recompute low_stock from the thresholds; only the items with an
+    # item threshold and the categories with a threshold are read
+    cursor.execute("DELETE FROM low_stock")
+    for schema in schemas.stock_schemas():
+        table = schema.table
+        cursor.execute(
+            """INSERT OR IGNORE INTO low_stock (TableName, ItemId, Amount, Threshold)
+               SELECT '{table}', rowid, Amount, threshold FROM (
+                   SELECT rowid, Amount, {threshold} AS threshold FROM {table}
+                   WHERE rowid IN (SELECT ItemId FROM item_thresholds
+                                   WHERE TableName='{table}')
+                      OR Category IN (SELECT Category FROM category_thresholds
+                                      WHERE TableName='{table}'))
+               WHERE Amount < threshold""".format(table=table,
+                                                  threshold=_threshold(table)))
+
+
+# ========== Thresholds ========== #
+@instrumentation.timed()
+def set_category_threshold(key, category, threshold):
+    # threshold None removes the threshold of the category
+    table = schemas.stock_schema(key).table
+    with cache.invalidating(table) as c:
+        if threshold is None:
+            c.execute("DELETE FROM category_thresholds WHERE TableName=? AND Category=?",
+                      (table, category))
+        else:
+            c.execute("INSERT OR REPLACE INTO category_thresholds VALUES (?, ?, ?)",
+                      (table, category, int(threshold)))
+
+
+@instrumentation.timed()
+def set_item_threshold(key, item_id, threshold):
+    # threshold None removes the threshold of the item
+    table = schemas.stock_schema(key).table
+    with cache.invalidating(table) as c:
+        if threshold is None:
+            c.execute("DELETE FROM item_thresholds WHERE TableName=? AND ItemId=?",
+                      (table, int(item_id)))
+        else:
+            c.execute("INSERT OR REPLACE INTO item_thresholds VALUES (?, ?, ?)",
+                      (table, int(item_id), int(threshold)))
+
+
+@instrumentation.timed()
+def thresholds(key):
+    # [(category, None, threshold)] followed by [(None, item id, threshold)]
+    table = schemas.stock_schema(key).table
+    with connection.connection() as conn:
+        return (conn.execute("""SELECT Category, NULL, Threshold FROM category_thresholds
+                                WHERE TableName=? ORDER BY Category""", (table,)).fetchall()
+                + conn.execute("""SELECT NULL, ItemId, Threshold FROM item_thresholds
+                                  WHERE TableName=? ORDER BY ItemId""", (table,)).fetchall())
+
+
+# ========== Alerts ========== #
+ALERTS = """SELECT l.ItemId, t.Description, t.PartNo, t.Category, t.Cabinet,
+                   l.Amount, l.Threshold
+            FROM low_stock l JOIN {table} t ON t.rowid = l.ItemId
+            WHERE l.TableName = ?
+            ORDER BY l.Amount * 1.0 / l.Threshold, l.ItemId"""
+
+
+@instrumentation.timed()
+def _load_alerts(table):
+    with connection.connection() as conn:
+        return conn.execute(ALERTS.format(table=table), (table,)).fetchall()
+
+
+@instrumentation.timed()
+def low_stock(key=None):
+    """
+    The items below their threshold as (department key, *COLUMNS), the
+    emptiest first, of one department or of all. Read from low_stock
+    and the rowids of the departments, never by scanning a table.
+    """
+    if key:
+        keys = [schemas.stock_schema(key).key]
+    else:
+        keys = [schema.key for schema in schemas.stock_schemas()]
+    alerts = []
+    for key in keys:
+        table = schemas.SCHEMAS[key].table
+        rows = cache.value(table, ("low_stock",), lambda: _load_alerts(table))
+        alerts.extend((key,) + tuple(row) for row in rows)
+    return alerts
+
+
+def _report(alerts):
+    if not alerts:
+        return "No items below their threshold."
+    header = ("Department",) + COLUMNS
+    lines = [header] + [tuple("" if value is None else str(value) for value in alert)
+                        for alert in alerts]
+    widths = [max(len(line[i]) for line in lines) for i in range(len(header))]
+    return "\n".join("  ".join(value.ljust(width) for value, width in zip(line, widths))
+                     .rstrip() for line in lines)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Low-stock report and thresholds")
+    parser.add_argument("--db", default=connection.DB_PATH)
+    commands = parser.add_subparsers(dest="command")
+    report = commands.add_parser("report", help="list the items below their threshold (default)")
+    report.add_argument("department", nargs="?")
+    report.add_argument("--json", action="store_true")
+    report.add_argument("--fail", action="store_true",
+                        help="exit with status 1 when an item is low")
+    threshold = commands.add_parser("set", help="set or remove a threshold")
+    threshold.add_argument("department")
+    target = threshold.add_mutually_exclusive_group(required=True)
+    target.add_argument("--category")
+    target.add_argument("--item", type=int)
+    threshold.add_argument("threshold", nargs="?", type=int,
+                           help="leave out to remove the threshold")
+    show = commands.add_parser("thresholds", help="list the thresholds")
+    show.add_argument("department")
+    commands.add_parser("rebuild", help="recompute the alerts from the thresholds")
+    args = parser.parse_args()
+
+    connection.configure(args.db)
+    try:
+        migrations.migrate()
+        if args.command == "set":
+            if args.category is not None:
+                set_category_threshold(args.department, args.category, args.threshold)
+            else:
+                set_item_threshold(args.department, args.item, args.threshold)
+        elif args.command == "thresholds":
+            for category, item, value in thresholds(args.department):
+                print("{:<40} {}".format(category if item is None else "item {}".format(item),
+                                         value))
+        elif args.command == "rebuild":
+            with connection.transaction() as c:
+                rebuild(c)
+        else:
+            alerts = low_stock(getattr(args, "department", None))
+            if getattr(args, "json", False):
+                print(json.dumps([dict(zip(("Department",) + COLUMNS, alert))
+                                  for alert in alerts], indent=2))
+            else:
+                print(_report(alerts))
+            if alerts and getattr(args, "fail", False):
+                sys.exit(1)
+    finally:
+        cache.close()
+        connection.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -6,20 +6,38 @@
 # #################################################################
 
 from PyQt5 import QtCore
-import database_ee
-import database_mech
-import sqlite3
+import argparse
+import backends
+import connection
+import fulltext
 import sys
+import icons
+import instrumentation
 import os.path
+import query
+import repository
+import schemas
+import summaries
+from inventory_model import InventoryModel
+from live_search import LiveSearch
+from worker import DatabaseExecutor
 from PyQt5.QtGui import *
 from PyQt5.QtWidgets import *
 
 
+PAGE_PICTURES = {"ELECTRONICS": "electronics.jpg",
+                 "MECHANICS": "mechanics.jpg"}
+# How often the grid asks for the changes made by others, see changes.py
+POLL_MS = 2000
+
+
 class MainWindow(QMainWindow):
-    def __init__(self, *args, **kwargs):
+    def __init__(self, *args, backend=None, **kwargs):
         super(MainWindow, self).__init__(*args, **kwargs)
+        # The database file, or the inventory service, see backends.py
+        self.backend = backend or backends.FileBackend()
 
-        self.setWindowIcon(QIcon("icon/lab.png"))
+        self.setWindowIcon(icons.icon("lab.png"))
         self.setWindowTitle("Lab Inventory Management System")
         self.setMinimumSize(1200, 800)
 
@@ -36,48 +54,110 @@ class MainWindow(QMainWindow):
         statusbar = QStatusBar()
         self.setStatusBar(statusbar)
 
+        # Busy indicator while database jobs run in the background
+        self.progress_bar = QProgressBar()
+        self.progress_bar.setFixedWidth(150)
+        self.progress_bar.setRange(0, 0)
+        self.progress_bar.setVisible(False)
+        statusbar.addPermanentWidget(self.progress_bar)
+
+        # Row count and page controls of the grid
+        self.rows_label = QLabel()
+        statusbar.addPermanentWidget(self.rows_label)
+        self.btn_previous_page = QToolButton()
+        self.btn_previous_page.setArrowType(QtCore.Qt.LeftArrow)
+        self.btn_previous_page.setToolTip("Previous page")
+        self.btn_previous_page.clicked.connect(self.previous_page)
+        statusbar.addPermanentWidget(self.btn_previous_page)
+        self.btn_next_page = QToolButton()
+        self.btn_next_page.setArrowType(QtCore.Qt.RightArrow)
+        self.btn_next_page.setToolTip("Next page")
+        self.btn_next_page.clicked.connect(self.next_page)
+        statusbar.addPermanentWidget(self.btn_next_page)
+        self.page_size_combo = QComboBox()
+        for size in (100, 500, 1000, 5000):
+            self.page_size_combo.addItem("{} per page".format(size), size)
+        self.page_size_combo.setCurrentIndex(
+            self.page_size_combo.findData(repository.PAGE_SIZE))
+        self.page_size_combo.activated.connect(lambda index: self.show_page())
+        statusbar.addPermanentWidget(self.page_size_combo)
+
+        self.executor = DatabaseExecutor(self)
+        self.executor.busy_changed.connect(self.show_busy)
+        self.executor.progress.connect(self.show_progress)
+        self.executor.failed.connect(self.show_error)
+
         # ========== Menubar ========== #
-        add_item_action = QAction(QIcon("icon/add.png"), "Add new item", self)
+        add_item_action = QAction(icons.icon("add.png"), "Add new item", self)
         add_item_action.triggered.connect(self.insert)
         file_menu.addAction(add_item_action)
 
         search_item_action = QAction(
-            QIcon("icon/search.png"), "Search Item", self)
+            icons.icon("search.png"), "Search Item", self)
         search_item_action.triggered.connect(self.search)
         file_menu.addAction(search_item_action)
 
-        del_item_action = QAction(QIcon("icon/delete.png"), "Delete", self)
+        del_item_action = QAction(icons.icon("delete.png"), "Delete", self)
         del_item_action.triggered.connect(self.delete)
         file_menu.addAction(del_item_action)
 
+        import_action = QAction(icons.icon("add.png"), "Import from file...", self)
+        import_action.triggered.connect(self.import_items)
+        file_menu.addAction(import_action)
+
+        # Act on the rows selected in the grid
+        self.delete_selected_action = QAction(icons.icon("delete.png"), "Delete selected items", self)
+        self.delete_selected_action.triggered.connect(self.delete_selected)
+        file_menu.addAction(self.delete_selected_action)
+
+        self.edit_selected_action = QAction(icons.icon("update.png"), "Edit selected items...", self)
+        self.edit_selected_action.triggered.connect(self.edit_selected)
+        file_menu.addAction(self.edit_selected_action)
+
+        duplicates_action = QAction("Find duplicates...", self)
+        duplicates_action.triggered.connect(self.find_duplicates)
+        file_menu.addAction(duplicates_action)
+
+        analytics_action = QAction("Analytics...", self)
+        analytics_action.triggered.connect(self.analytics)
+        file_menu.addAction(analytics_action)
+
+        threshold_action = QAction("Low-stock thresholds...", self)
+        threshold_action.triggered.connect(self.set_threshold)
+        file_menu.addAction(threshold_action)
+
         file_menu.addSeparator()
 
         quit_action = QAction("Exit", self)
         quit_action.triggered.connect(self.quit)
         file_menu.addAction(quit_action)
 
-        about_action = QAction(QIcon("icon/information.png"), "Developer",
+        about_action = QAction(icons.icon("information.png"), "Developer",
                                self)
         about_action.triggered.connect(self.about)
         help_menu.addAction(about_action)
 
+        diagnostics_action = QAction("Diagnostics...", self)
+        diagnostics_action.triggered.connect(self.diagnostics)
+        help_menu.addAction(diagnostics_action)
+
         # ========== Toolbar ========== #
         # Set toolbar spacing
         toolbar.setStyleSheet("QToolBar{spacing:10px;}")
 
-        btn_add_item = QAction(QIcon("icon/add.png"), "Add new item",
+        btn_add_item = QAction(icons.icon("add.png"), "Add new item",
                                self)
         btn_add_item.triggered.connect(self.insert)
         btn_add_item.setStatusTip("Add new item")
         toolbar.addAction(btn_add_item)
 
-        btn_view_all = QAction(QIcon("icon/view.png"), "View all",
+        btn_view_all = QAction(icons.icon("view.png"), "View all",
                                self)
         btn_view_all.triggered.connect(self.load_data)
         btn_view_all.setStatusTip("View all")
         toolbar.addAction(btn_view_all)
 
-        btn_search_item = QAction(QIcon("icon/search.png"), "Search item",
+        btn_search_item = QAction(icons.icon("search.png"), "Search item",
                                   self)
         btn_search_item.triggered.connect(self.search)
         # btn_search_item.setShortcut("Ctrl+F")
@@ -85,52 +165,81 @@ class MainWindow(QMainWindow):
         toolbar.addAction(btn_search_item)
 
         btn_delete_item = QAction(
-            QIcon("icon/delete.png"), "Delete item", self)
+            icons.icon("delete.png"), "Delete item", self)
         btn_delete_item.triggered.connect(self.delete)
         btn_delete_item.setStatusTip("Delete item")
         toolbar.addAction(btn_delete_item)
 
-        btn_export = QAction(QIcon("icon/export.png"), "Export to CSV", self)
+        btn_export = QAction(icons.icon("export.png"), "Export to CSV", self)
         btn_export.triggered.connect(self.export)
         btn_export.setStatusTip("Export to CSV")
         toolbar.addAction(btn_export)
 
+        btn_import = QAction(icons.icon("add.png"), "Import from CSV/XLSX", self)
+        btn_import.triggered.connect(self.import_items)
+        btn_import.setStatusTip("Import items from a CSV or XLSX file")
+        toolbar.addAction(btn_import)
+
         # ========== Button Widgets ========== #
         btn_add = QPushButton("Add", self)
         btn_add.clicked.connect(self.insert)
-        btn_add.setIcon(QIcon("icon/add.png"))
+        btn_add.setIcon(icons.icon("add.png"))
         btn_add.setFixedWidth(100)
         btn_add.setFixedHeight(35)
 
         btn_clear = QPushButton("Clear", self)
         btn_clear.clicked.connect(self.clear)
-        btn_clear.setIcon(QIcon("icon/clear.png"))
+        btn_clear.setIcon(icons.icon("clear.png"))
         btn_clear.setFixedWidth(100)
         btn_clear.setFixedHeight(35)
 
         self.search_box = QLineEdit()
-        self.search_box.setPlaceholderText("Type Item id.")
+        self.search_box.setPlaceholderText("Id or keywords")
+        self.search_box.setToolTip(
+            "Type keywords to search as you type, or an item id for Search, Delete and Update")
+        self.live_search = LiveSearch(self.executor, self.current_repository,
+                                      parent=self)
+        self.live_search.results.connect(lambda text, rows: self.show_matches(rows))
+        self.live_search.cleared.connect(self.load_data)
+        self.live_search.failed.connect(self.show_error)
+        self.search_box.textChanged.connect(self.live_search.set_text)
         self.search_box.setFixedWidth(100)
         self.search_box.setFixedHeight(20)
 
         btn_search = QPushButton("Search", self)
         btn_search.clicked.connect(self.search_item)
-        btn_search.setIcon(QIcon("icon/search.png"))
+        btn_search.setIcon(icons.icon("search.png"))
         btn_search.setFixedWidth(100)
         btn_search.setFixedHeight(35)
 
         btn_delete = QPushButton("Delete", self)
         btn_delete.clicked.connect(self.delete)
-        btn_delete.setIcon(QIcon("icon/delete.png"))
+        btn_delete.setIcon(icons.icon("delete.png"))
         btn_delete.setFixedWidth(100)
         btn_delete.setFixedHeight(35)
 
         btn_update = QPushButton("Update", self)
         btn_update.clicked.connect(self.update)
-        btn_update.setIcon(QIcon("icon/update.png"))
+        btn_update.setIcon(icons.icon("update.png"))
         btn_update.setFixedWidth(100)
         btn_update.setFixedHeight(35)
 
+        # Stock movements of the item whose id is in the search box
+        self.quantity_spin = QSpinBox()
+        self.quantity_spin.setRange(1, 10 ** 6)
+        self.quantity_spin.setFixedWidth(100)
+        self.quantity_spin.setToolTip("Quantity to check in or out")
+
+        self.btn_check_in = QPushButton("Check in", self)
+        self.btn_check_in.clicked.connect(lambda: self.move_stock(1))
+        self.btn_check_in.setFixedWidth(100)
+        self.btn_check_in.setFixedHeight(35)
+
+        self.btn_check_out = QPushButton("Check out", self)
+        self.btn_check_out.clicked.connect(lambda: self.move_stock(-1))
+        self.btn_check_out.setFixedWidth(100)
+        self.btn_check_out.setFixedHeight(35)
+
         # ------------------------------- #
         #       Main Window Layout        #
         # ------------------------------- #
@@ -148,19 +257,24 @@ class MainWindow(QMainWindow):
         self.table_title = QLabel("Inventory List")
         self.table_title.setFont(QFont("Arial", 14))
 
-        self.tableWidget = QTableWidget()
-        self.tableWidget.setAlternatingRowColors(True)
-        self.tableWidget.setColumnCount(10)
-        self.tableWidget.horizontalHeader().setCascadingSectionResizes(False)
-        self.tableWidget.horizontalHeader().setSortIndicatorShown(False)
-        self.tableWidget.horizontalHeader().setStretchLastSection(True)
-        self.tableWidget.verticalHeader().setVisible(False)
-        self.tableWidget.verticalHeader().setCascadingSectionResizes(False)
-        self.tableWidget.verticalHeader().setStretchLastSection(False)
-        self.tableWidget.setHorizontalHeaderLabels(
-            ("Item id", "Description", "Manufacture Part No.", "Category",
-             "Package", "Value", "Unit", "Cabinet", "Amount", "Notes"))
-        self.tableWidget.setSortingEnabled(True)
+        self.table_model = InventoryModel(schemas.ELECTRONICS.headers(), self,
+                                          schemas.ELECTRONICS.sort_columns())
+        self.tableView = QTableView()
+        self.tableView.setModel(self.table_model)
+        self.tableView.setAlternatingRowColors(True)
+        self.tableView.horizontalHeader().setCascadingSectionResizes(False)
+        self.tableView.horizontalHeader().setSortIndicatorShown(True)
+        self.tableView.horizontalHeader().setStretchLastSection(True)
+        self.tableView.verticalHeader().setVisible(False)
+        self.tableView.verticalHeader().setCascadingSectionResizes(False)
+        self.tableView.verticalHeader().setStretchLastSection(False)
+        self.tableView.setSortingEnabled(True)
+        self.tableView.setSelectionBehavior(QAbstractItemView.SelectRows)
+        self.tableView.setSelectionMode(QAbstractItemView.ExtendedSelection)
+        self.tableView.setContextMenuPolicy(QtCore.Qt.ActionsContextMenu)
+        self.tableView.addAction(self.edit_selected_action)
+        self.tableView.addAction(self.delete_selected_action)
+        self.table_model.sortRequested.connect(self.sort_page)
 
         empty_widget = QLabel()
         empty_widget.setFixedSize(100, 55)
@@ -172,58 +286,170 @@ class MainWindow(QMainWindow):
         layout_sub_buttons.addWidget(btn_clear)
         layout_sub_buttons.addWidget(btn_delete)
         layout_sub_buttons.addWidget(btn_update)
+        layout_sub_buttons.addWidget(self.quantity_spin)
+        layout_sub_buttons.addWidget(self.btn_check_in)
+        layout_sub_buttons.addWidget(self.btn_check_out)
         layout_buttons.addLayout(layout_sub_buttons)
 
         layout.addWidget(self.item_info_window, 0, 0, 1, 3)
         layout.addLayout(layout_buttons, 0, 3)
         layout.addWidget(self.table_title, 1, 0)
-        layout.addWidget(self.tableWidget, 2, 0, 1, 4)
+        layout.addWidget(self.tableView, 2, 0, 1, 4)
 
         self.setCentralWidget(self.main_window_widget)
 
+        # ========== Low stock panel ========== #
+        self.low_stock_panel = LowStockPanel()
+        self.low_stock_panel.btn_refresh.clicked.connect(self.refresh_alerts)
+        self.low_stock_panel.btn_threshold.clicked.connect(self.set_threshold)
+        self.low_stock_panel.itemSelected.connect(self.show_alert_item)
+        self.low_stock_dock = QDockWidget("Low stock", self)
+        self.low_stock_dock.setWidget(self.low_stock_panel)
+        self.addDockWidget(QtCore.Qt.RightDockWidgetArea, self.low_stock_dock)
+        file_menu.insertAction(threshold_action, self.low_stock_dock.toggleViewAction())
+
         # ------------------------------- #
         #      Variables & Functions      #
         # ------------------------------- #
-        self.conn = sqlite3.connect("inventory.db")
         self.result = []
-
+        # The grid shows one page of the rows matching `listing` (a WHERE
+        # clause and its parameters) in the order of `sort_by`
+        self.listing = ("", ())
+        self.sort_by = None
+        self.descending = False
+        self.page_start = 0
+        self.row_total = 0
+        # (after, before, start) of the page shown, and the change log
+        # seq its rows are up to date with
+        self.page_request = (None, None, 0)
+        self.change_seq = None
+        self.change_timer = QtCore.QTimer(self)
+        self.change_timer.setInterval(POLL_MS)
+        self.change_timer.timeout.connect(self.poll_changes)
+        self.change_timer.start()
+        # (key, id, Amount) of the item last filled into the form
+        self.filled_amount = None
+
+    def current_repository(self):
+        return self.backend.repository(self.key)
+
+    @instrumentation.slot()
     def load_data(self):
-        if self.key == "ELECTRONICS":
-            self.result = database_ee.show_table()
-        elif self.key == "MECHANICS":
-            self.tableWidget.setColumnCount(6)
-            self.result = database_mech.show_table()
+        self.listing = ("", ())
+        self.show_page()
+        self.refresh_alerts()
+
+    @instrumentation.slot()
+    def show_page(self, after=None, before=None, start=0):
+        repo = self.current_repository()
+        snapshot = self.backend.snapshot
+        where, params = self.listing
+        sort_by, descending = self.sort_by, self.descending
+        size = self.page_size_combo.currentData()
+        self.page_request = (after, before, start)
+
+        def load():
+            # The page, the count and the change log seq from the same
+            # state of the table
+            with snapshot():
+                rows = repo.page(where, params, sort_by, descending, after, before, size)
+                return rows, repo.count(where, params), repo.last_change()
+        self.executor.submit(load, channel="rows",
+                             on_result=lambda result: self.set_page(start, *result),
+                             on_error=self.show_error)
+
+    @instrumentation.slot()
+    def next_page(self):
+        rows = self.table_model.rows()
+        if rows:
+            self.show_page(after=self.current_repository().sort_key(rows[-1], self.sort_by),
+                           start=self.page_start + len(rows))
+
+    @instrumentation.slot()
+    def previous_page(self):
+        rows = self.table_model.rows()
+        if rows and self.page_start > 0:
+            size = self.page_size_combo.currentData()
+            self.show_page(before=self.current_repository().sort_key(rows[0], self.sort_by),
+                           start=max(0, self.page_start - size))
+
+    @instrumentation.slot()
+    def sort_page(self, column, order):
+        self.sort_by = self.current_repository().sort_column(column)
+        self.descending = order == QtCore.Qt.DescendingOrder
+        self.show_page()
+
+    @instrumentation.slot()
+    def set_page(self, start, rows, total, seq=None):
+        self.page_start = start
+        self.row_total = total
+        self.change_seq = seq
+        self.table_model.paged = True
+        self.result = rows
+        self.display()
+        self.show_row_count()
+
+    def show_row_count(self):
+        shown = self.table_model.rows()
+        if self.table_model.paged:
+            first = self.page_start + 1 if shown else 0
+            self.rows_label.setText("Rows {:,}–{:,} of {:,}".format(
+                first, self.page_start + len(shown), self.row_total))
+        else:
+            self.rows_label.setText("{:,} matches".format(len(shown)))
+        self.btn_previous_page.setEnabled(self.table_model.paged and self.page_start > 0)
+        self.btn_next_page.setEnabled(self.table_model.paged and
+                                      self.page_start + len(shown) < self.row_total)
+
+    def show_rows(self, fn, *args, **kwargs):
+        # Every query that fills the grid shares one channel, so a newer
+        # one cancels the query it replaces
+        self.executor.submit(fn, *args, channel="rows",
+                             on_result=self.set_result,
+                             on_error=self.show_error, **kwargs)
+
+    @instrumentation.slot()
+    def set_result(self, rows):
+        # Results of the keyword search are ranked and sorted in memory
+        self.table_model.paged = False
+        self.result = rows
         self.display()
+        self.show_row_count()
+
+    def show_matches(self, rows):
+        self.set_result(rows)
+        if rows.truncated:
+            self.statusBar().showMessage(
+                "More than {:,} items match: the best of the newest {:,} are shown, "
+                "type more to narrow the search".format(
+                    fulltext.RANK_CANDIDATES, fulltext.RANK_CANDIDATES), 5000)
+
+    def show_busy(self, busy):
+        self.progress_bar.setRange(0, 0)
+        self.progress_bar.setVisible(busy)
 
+    def show_progress(self, done, total):
+        self.progress_bar.setRange(0, total)
+        self.progress_bar.setValue(done)
+
+    def show_error(self, error):
+        self.statusBar().showMessage("Database error: {}".format(describe_error(error)), 5000)
+
+    @instrumentation.slot()
     def display(self):
-        self.tableWidget.setRowCount(0)
-        for row_number, row_data in enumerate(self.result):
-            self.tableWidget.insertRow(row_number)
-            for column_number, data in enumerate(row_data):
-                # format the cell information
-                data = str(data)
-                if "\n" in data:
-                    data = data.replace("\n", "")
-                else:
-                    pass
-                self.tableWidget.setItem(row_number, column_number,
-                                         QTableWidgetItem(str(data)))
-                self.tableWidget.resizeColumnToContents(0)
-                self.tableWidget.resizeColumnToContents(2)
-                self.tableWidget.resizeColumnsToContents()
+        self.table_model.set_rows(self.result)
+        # Only the rows in the viewport are measured
+        self.tableView.resizeColumnsToContents()
 
+    @instrumentation.slot()
     def select_table(self):
         self.key = self.item_info_window.pageCombo.currentText()
-        if self.key == "ELECTRONICS":
-            self.tableWidget.setColumnCount(10)
-            self.tableWidget.setHorizontalHeaderLabels(
-                ("Item id", "Description", "Manufacture Part No.", "Category",
-                 "Package", "Value", "Unit", "Cabinet", "Amount", "Notes"))
-        elif self.key == "MECHANICS":
-            self.tableWidget.setColumnCount(7)
-            self.tableWidget.setHorizontalHeaderLabels(
-                ("Item id", "Description", "Manufacture Part No.", "Category",
-                 "Cabinet", "Amount", "Notes"))
+        schema = schemas.SCHEMAS[self.key]
+        self.table_model.set_headers(schema.headers(), schema.sort_columns())
+        self.btn_check_in.setEnabled(schema.stock)
+        self.btn_check_out.setEnabled(schema.stock)
+        self.sort_by = None
+        self.descending = False
         self.load_data()
         return self.key
 
@@ -231,184 +457,146 @@ class MainWindow(QMainWindow):
         dlg = AboutDialog()
         dlg.exec_()
 
-    def insert(self):
-        if self.key == "ELECTRONICS":
-            description = self.item_info_window.description_ee.text()
-            part_number = self.item_info_window.part_number_ee.text()
-            category = self.item_info_window.category_ee.itemText(
-                self.item_info_window.category_ee.currentIndex())
-            package = self.item_info_window.package_ee.text()
-            value = self.item_info_window.value_ee.text()
-            unit = self.item_info_window.unit_ee.itemText(
-                self.item_info_window.unit_ee.currentIndex())
-            cabinet = self.item_info_window.cabinet_ee.text()
-            amount = self.item_info_window.amount_ee.text()
-            notes = self.item_info_window.notes_ee.text()
-            database_ee.add_row(description, part_number, category,
-                                package, value, unit, cabinet, amount, notes)
-        elif self.key == "MECHANICS":
-            description = self.item_info_window.description_mech.text()
-            part_number = self.item_info_window.part_number_mech.text()
-            category = self.item_info_window.category_mech.itemText(
-                self.item_info_window.category_mech.currentIndex())
-            cabinet = self.item_info_window.cabinet_mech.text()
-            amount = self.item_info_window.amount_mech.text()
-            notes = self.item_info_window.notes_mech.text()
-            database_mech.add_row(description, part_number,
-                                  category, cabinet, amount, notes)
-
-        self.load_data()
+    def diagnostics(self):
+        dlg = DiagnosticsDialog(self)
+        dlg.exec_()
 
+    @instrumentation.slot()
+    def insert(self):
+        # Look for the items like the new one first, see confirm_insert()
+        repo = self.current_repository()
+        values = self.item_info_window.values(self.key)
+        self.executor.submit(repo.duplicates_of, *values,
+                             on_result=lambda found: self.confirm_insert(repo, values, found),
+                             on_error=self.show_error)
+
+    @instrumentation.slot()
+    def confirm_insert(self, repo, values, found):
+        if found.stale:
+            # Rebuild the description index for the next checks
+            self.executor.submit(repo.refresh_duplicates, channel="duplicates",
+                                 on_error=self.show_error)
+        if found:
+            columns = repo.columns
+            description = columns.index("Description") + 1
+            part_no = columns.index("PartNo") + 1
+            lines = ["#{} {} {} ({})".format(
+                row[0], row[part_no] or "", row[description] or "",
+                "same part number" if same else "{:.0%} alike".format(score))
+                for row, score, same in found[:5]]
+            if len(found) > 5:
+                lines.append("and {} more".format(len(found) - 5))
+            reply = QMessageBox.question(
+                self, "Possible duplicate",
+                "These items look like the new one:\n\n{}\n\nAdd it anyway?".format(
+                    "\n".join(lines)),
+                QMessageBox.Yes | QMessageBox.No, QMessageBox.No)
+            if reply != QMessageBox.Yes:
+                return
+        self.executor.submit(repo.add_row, *values,
+                             on_result=self.added,
+                             on_error=self.show_error)
+
+    @instrumentation.slot()
+    def added(self, row):
+        # The row count follows with the change, see apply_changes()
+        self.table_model.append_row(row)
+        self.poll_changes()
+        self.refresh_alerts()
+
+    @instrumentation.slot()
     def search(self):
-        if self.key == "ELECTRONICS":
-            description = self.item_info_window.description_ee.text()
-            part_number = self.item_info_window.part_number_ee.text()
-            category = self.item_info_window.category_ee.itemText(
-                self.item_info_window.category_ee.currentIndex())
-            package = self.item_info_window.package_ee.text()
-            value = self.item_info_window.value_ee.text()
-            unit = self.item_info_window.unit_ee.itemText(
-                self.item_info_window.unit_ee.currentIndex())
-            cabinet = self.item_info_window.cabinet_ee.text()
-            amount = self.item_info_window.amount_ee.text()
-            notes = self.item_info_window.notes_ee.text()
-
-            self.result = database_ee.search_rows(
-                description, part_number, category, package, value, unit, cabinet, amount, notes)
-
-        elif self.key == "MECHANICS":
-            description = self.item_info_window.description_mech.text()
-            part_number = self.item_info_window.part_number_mech.text()
-            category = self.item_info_window.category_mech.itemText(
-                self.item_info_window.category_mech.currentIndex())
-            cabinet = self.item_info_window.cabinet_mech.text()
-            amount = self.item_info_window.amount_mech.text()
-            notes = self.item_info_window.notes_mech.text()
-            self.result = database_mech.search_rows(
-                description, part_number, category, cabinet, amount, notes)
-
-        self.display()
-
+        where, params = self.current_repository().search_filter(
+            *self.item_info_window.search_values(self.key),
+            match=self.item_info_window.search_match())
+        if not where:
+            self.set_result([])
+            return
+        self.listing = (where, params)
+        self.show_page()
+
+    @instrumentation.slot()
     def search_item(self, id):
         id = self.search_box.text()
+        self.executor.submit(self.current_repository().search_row, id,
+                             channel="item",
+                             on_result=lambda row: self.fill_form(id, row),
+                             on_error=lambda error: self.fill_form(id, None))
+
+    @instrumentation.slot()
+    def fill_form(self, id, first_matched_item):
         try:
-            if self.key == "ELECTRONICS":
-                first_matched_item = database_ee.search_row(id)
-                self.item_info_window.item_ee_id_label.setText(
-                    "Item id:{:>35}".format(id))
-                self.item_info_window.description_ee.setText(
-                    str(first_matched_item[1]))
-                self.item_info_window.part_number_ee.setText(
-                    str(first_matched_item[2]))
-                self.item_info_window.category_ee.setCurrentText(
-                    first_matched_item[3])
-                self.item_info_window.package_ee.setText(
-                    str(first_matched_item[4]))
-                self.item_info_window.value_ee.setText(
-                    str(first_matched_item[5]))
-                self.item_info_window.unit_ee.setCurrentText(
-                    first_matched_item[6])
-                self.item_info_window.cabinet_ee.setText(
-                    str(first_matched_item[7]))
-                self.item_info_window.amount_ee .setText(
-                    str(first_matched_item[8]))
-                self.item_info_window.notes_ee.setText(
-                    str(first_matched_item[9]))
-
-            elif self.key == "MECHANICS":
-                first_matched_item = database_mech.search_row(id)
-                self.item_info_window.item_mech_id_label.setText(
-                    "Item id:{:>35}".format(id))
-                self.item_info_window.description_mech.setText(
-                    str(first_matched_item[1]))
-                self.item_info_window.part_number_mech.setText(
-                    str(first_matched_item[2]))
-                self.item_info_window.category_mech.setCurrentText(
-                    first_matched_item[3])
-                self.item_info_window.cabinet_mech.setText(
-                    str(first_matched_item[4]))
-                self.item_info_window.amount_mech .setText(
-                    str(first_matched_item[5]))
-                self.item_info_window.notes_mech.setText(
-                    str(first_matched_item[6]))
+            self.item_info_window.fill(self.key, id, first_matched_item)
+            if schemas.SCHEMAS[self.key].stock:
+                amount = first_matched_item[1 + schemas.SCHEMAS[self.key].names.index("Amount")]
+                self.filled_amount = (self.key, str(id), amount)
         except Exception:
-            if self.key == "ELECTRONICS":
-                self.item_info_window.item_ee_id_label.setText("Item id:")
-            elif self.key == "MECHANICS":
-                self.item_info_window.item_mech_id_label.setText("Item id:")
+            self.item_info_window.clear_id(self.key)
             QMessageBox.information(
                 QMessageBox(), "Search", "Can not find the item")
 
+    @instrumentation.slot()
     def update(self):
         id = self.search_box.text()
-        if self.key == "ELECTRONICS":
-            description = self.item_info_window.description_ee.text()
-            part_number = self.item_info_window.part_number_ee.text()
-            category = self.item_info_window.category_ee.itemText(
-                self.item_info_window.category_ee.currentIndex())
-            package = self.item_info_window.package_ee.text()
-            value = self.item_info_window.value_ee.text()
-            unit = self.item_info_window.unit_ee.itemText(
-                self.item_info_window.unit_ee.currentIndex())
-            cabinet = self.item_info_window.cabinet_ee.text()
-            amount = self.item_info_window.amount_ee.text()
-            notes = self.item_info_window.notes_ee.text()
-            database_ee.update_row(id, description, part_number, category,
-                                   package, value, unit, cabinet, amount, notes)
-
-        elif self.key == "MECHANICS":
-            description = self.item_info_window.description_mech.text()
-            part_number = self.item_info_window.part_number_mech.text()
-            category = self.item_info_window.category_mech.itemText(
-                self.item_info_window.category_mech.currentIndex())
-            cabinet = self.item_info_window.cabinet_mech.text()
-            amount = self.item_info_window.amount_mech.text()
-            notes = self.item_info_window.notes_mech.text()
-            database_mech.update_row(
-                id, description, part_number, category, cabinet, amount, notes)
-
+        # A changed amount is applied as the difference to the amount the
+        # form was filled with, keeping check-outs made meanwhile
+        amount_was = None
+        if self.filled_amount is not None and self.filled_amount[:2] == (self.key, id):
+            amount_was = self.filled_amount[2]
+        self.executor.submit(self.current_repository().update_row, id,
+                             *self.item_info_window.values(self.key),
+                             amount_was=amount_was,
+                             on_result=self.updated,
+                             on_error=lambda error: self.update_failed(id, error))
+
+    @instrumentation.slot()
+    def update_failed(self, id, error):
+        import remote
+        if not isinstance(error, remote.PreconditionFailed):
+            self.show_error(error)
+            return
+        # Someone else changed the item on the service since it was read
+        QMessageBox.warning(QMessageBox(), "Update",
+                            "The item was changed by someone else meanwhile. "
+                            "It has been read again, please make your changes again.")
+        self.search_item(id)
+
+    @instrumentation.slot()
+    def updated(self, row):
+        if row is None:
+            QMessageBox.warning(QMessageBox(), "Update",
+                                "Can not find the item")
+            return
         QMessageBox.information(
             QMessageBox(), "Update", "Item has been updated.")
-        self.load_data()
+        self.table_model.replace_row(row)
+        self.fill_form(row[0], row)
+        self.refresh_alerts()
 
     def clear(self):
-        if self.key == "ELECTRONICS":
-            self.item_info_window.item_ee_id_label.setText("Item id:")
-            self.item_info_window.description_ee.clear()
-            self.item_info_window.part_number_ee.clear()
-            self.item_info_window.package_ee.clear()
-            self.item_info_window.value_ee.clear()
-            self.item_info_window.cabinet_ee.clear()
-            self.item_info_window.amount_ee.clear()
-            self.item_info_window.notes_ee.clear()
-
-        elif self.key == "MECHANICS":
-            self.item_info_window.item_mech_id_label.setText("Item id:")
-            self.item_info_window.description_mech.clear()
-            self.item_info_window.part_number_mech.clear()
-            self.item_info_window.cabinet_mech.clear()
-            self.item_info_window.amount_mech.clear()
-            self.item_info_window.notes_mech.clear()
+        self.item_info_window.clear(self.key)
 
     def clear_contents(self):
-        self.tableWidget.clearContents()
+        self.table_model.set_rows([])
 
+    @instrumentation.slot()
     def delete(self):
+        # Only the item of the id typed in; the selected rows are removed
+        # by delete_selected()
         id = self.search_box.text()
+        self.executor.submit(self.current_repository().search_row, id,
+                             channel="item",
+                             on_result=lambda row: self.confirm_delete(id, row),
+                             on_error=self.delete_failed)
+
+    @instrumentation.slot()
+    def confirm_delete(self, id, row):
         self.msgSearch = QMessageBox()
         try:
-            if self.key == "ELECTRONICS":
-                row = database_ee.search_row(id)
-                search_result = "id:    "+str(row[0])+"\n"+"Description:     "+str(row[1])+"\n"+"Manufacturer Part No.:     "+str(row[2])+"\n"   \
-                                + "Category:     "+str(row[3])+"\n"+"Package:     "+str(row[4])+"\n"+"Value:     "+str(row[5])+" " + str(row[6])+"\n" \
-                                + "Cabinet:     " + \
-                    str(row[7])+"\n"+"In stock amount:     " + \
-                    str(row[8])+"\n"+"Notes:      "+str(row[9])
-            elif self.key == "MECHANICS":
-                row = database_mech.search_row(id)
-                search_result = "id:    "+str(row[0])+"\n"+"Description:     "+str(row[1])+"\n"+"Manufacturer Part No.:     "+str(row[2])+"\n"   \
-                                + "Category:     "+str(row[3])+"\n" + "Cabinet:     "+str(
-                                    row[4])+"\n"+"In stock amount:     " + str(row[5])+"\n"+"Notes:      "+str(row[6])
+            columns = schemas.SCHEMAS[self.key].columns
+            search_result = "id:    {}\n".format(row[0]) + "\n".join(
+                "{}:     {}".format(column.label, "" if value is None else value)
+                for column, value in zip(columns, row[1:]))
             self.msgSearch.setText(search_result)
             self.msgSearch.setInformativeText(
                 "Do you want to remove this item?")
@@ -416,42 +604,316 @@ class MainWindow(QMainWindow):
             self.msgSearch.setWindowTitle("Remove item?")
             ret = self.msgSearch.exec_()
             if ret == QMessageBox.Yes:
-                if self.key == "ELECTRONICS":
-                    database_ee.delete_row(id)
-                elif self.key == "MECHANICS":
-                    database_mech.delete_row(id)
+                self.executor.submit(self.current_repository().delete_row, id,
+                                     on_result=self.deleted,
+                                     on_error=self.delete_failed)
             elif ret == QMessageBox.No:
                 pass
         except Exception:
-            QMessageBox.warning(QMessageBox(), "Error",
-                                "Could not remove the item")
-        finally:
-            self.load_data()
-
-    # TODO: export different tables (electronic & mechanics) and set file path
+            self.delete_failed()
+
+    @instrumentation.slot()
+    def deleted(self, rowid):
+        if rowid is not None:
+            self.table_model.remove_row(rowid)
+        self.poll_changes()
+        self.refresh_alerts()
+
+    def selected_ids(self):
+        rows = self.table_model.rows()
+        return sorted({rows[index.row()][0]
+                       for index in self.tableView.selectionModel().selectedRows()})
+
+    @instrumentation.slot()
+    def delete_selected(self):
+        ids = self.selected_ids()
+        if not ids:
+            return
+        reply = QMessageBox.question(
+            self, "Remove items?",
+            "Do you want to remove the {} selected items?".format(len(ids)),
+            QMessageBox.Yes | QMessageBox.No, QMessageBox.No)
+        if reply == QMessageBox.Yes:
+            self.executor.submit(self.current_repository().delete_rows, ids,
+                                 on_result=self.deleted_rows,
+                                 on_error=self.delete_failed)
+
+    @instrumentation.slot()
+    def deleted_rows(self, rowids):
+        self.table_model.remove_rows(rowids)
+        self.poll_changes()
+        self.statusBar().showMessage("Removed {} items".format(len(rowids)), 5000)
+        self.refresh_alerts()
+
+    @instrumentation.slot()
+    def edit_selected(self):
+        ids = self.selected_ids()
+        if not ids:
+            return
+        dlg = BulkEditDialog(schemas.SCHEMAS[self.key], len(ids), self)
+        if dlg.exec_() != QDialog.Accepted:
+            return
+        column, value = dlg.change()
+        self.executor.submit(self.current_repository().update_rows, ids,
+                             **{column: value},
+                             on_result=self.updated_rows, on_error=self.show_error)
+
+    @instrumentation.slot()
+    def updated_rows(self, rows):
+        self.table_model.replace_rows(rows)
+        self.statusBar().showMessage("Updated {} items".format(len(rows)), 5000)
+        self.refresh_alerts()
+
+    def delete_failed(self, error=None):
+        QMessageBox.warning(QMessageBox(), "Error",
+                            "Could not remove the item\n{}".format(describe_error(error)))
+
+    @instrumentation.slot()
     def export(self):
-        try:
-            if self.key == "ELECTRONICS":
-                database_ee.to_csv()
-            elif self.key == "MECHANICS":
-                database_mech.to_csv()
-            QMessageBox.information(
-                QMessageBox(), "File export", "Export to CSV successfully")
-        except Exception:
-            QMessageBox.warning(QMessageBox(), "Error",
-                                "Could not export to csv")
-        finally:
-            pass
+        to_csv = self.current_repository().to_csv
+        default_name = "{}_inventory.csv".format(self.key.lower())
+        path, _ = QFileDialog.getSaveFileName(
+            self, "Export to CSV", default_name,
+            "CSV file (*.csv);;Compressed CSV file (*.csv.gz)")
+        if not path:
+            return
+        self.executor.submit(to_csv, path, channel="export",
+                             with_progress=True,
+                             on_result=lambda count: self.exported(path, count),
+                             on_error=self.export_failed)
+
+    @instrumentation.slot()
+    def exported(self, path, count):
+        QMessageBox.information(
+            QMessageBox(), "File export",
+            "Exported {} items to {}".format(count, path))
+
+    @instrumentation.slot()
+    def import_items(self):
+        import_file = self.current_repository().import_file
+        path, _ = QFileDialog.getOpenFileName(
+            self, "Import items", "",
+            "Spreadsheets (*.csv *.xlsx);;CSV file (*.csv);;Excel workbook (*.xlsx)")
+        if not path:
+            return
+        self.executor.submit(import_file, path, channel="import",
+                             with_progress=True,
+                             on_result=self.imported,
+                             on_error=self.import_failed)
+
+    @instrumentation.slot()
+    def imported(self, result):
+        msg = QMessageBox()
+        msg.setWindowTitle("Import")
+        msg.setText(result.summary())
+        if result.rejected:
+            msg.setInformativeText("See the details for the rejected rows.")
+            msg.setDetailedText("\n".join(
+                "Line {}: {}".format(rejected.line, rejected.reason)
+                for rejected in result.rejected))
+        msg.exec_()
+        self.load_data()
+
+    def import_failed(self, error):
+        QMessageBox.warning(QMessageBox(), "Error",
+                            "Could not import the file\n{}".format(describe_error(error)))
+
+    def export_failed(self, error=None):
+        QMessageBox.warning(QMessageBox(), "Error",
+                            "Could not export to csv\n{}".format(describe_error(error)))
+
+    @instrumentation.slot()
+    def move_stock(self, direction):
+        # direction 1 checks the quantity in, -1 checks it out
+        id = self.search_box.text()
+        key = self.key
+        repo = self.current_repository()
+        backend = self.backend
+        quantity = direction * self.quantity_spin.value()
+
+        def move():
+            backend.move(key, ((id, quantity),))
+            return repo.search_row(id)
+        self.executor.submit(move, on_result=self.moved, on_error=self.move_failed)
+
+    @instrumentation.slot()
+    def moved(self, row):
+        self.table_model.replace_row(row)
+        if self.filled_amount is not None and self.filled_amount[:2] == (self.key, str(row[0])):
+            self.fill_form(row[0], row)
+        amount = row[1 + schemas.SCHEMAS[self.key].names.index("Amount")]
+        self.statusBar().showMessage("Item {}: {} in stock".format(row[0], amount), 5000)
+        self.refresh_alerts()
+
+    def move_failed(self, error):
+        QMessageBox.warning(QMessageBox(), "Stock",
+                            "Could not move the stock\n{}".format(describe_error(error)))
+
+    @instrumentation.slot()
+    def find_duplicates(self):
+        key = self.key
+        self.executor.submit(self.current_repository().find_duplicates,
+                             channel="duplicates", with_progress=True,
+                             on_result=lambda groups: self.show_duplicates(key, groups),
+                             on_error=self.show_error)
+
+    @instrumentation.slot()
+    def show_duplicates(self, key, groups):
+        if not groups:
+            QMessageBox.information(QMessageBox(), "Duplicates",
+                                    "No duplicates found in {}.".format(key.lower()))
+            return
+        dlg = DuplicatesDialog(schemas.SCHEMAS[key], groups, self)
+        if dlg.exec_() != QDialog.Accepted:
+            return
+        keep, ids = dlg.merge()
+        reply = QMessageBox.question(
+            self, "Merge items?",
+            "Merge the {} other items of the group into item {}? They are "
+            "removed, and their stock is moved to item {}.".format(len(ids), keep, keep),
+            QMessageBox.Yes | QMessageBox.No, QMessageBox.No)
+        if reply == QMessageBox.Yes:
+            self.executor.submit(self.backend.repository(key).merge, keep, ids,
+                                 on_result=self.merged, on_error=self.show_error)
+
+    @instrumentation.slot()
+    def merged(self, row):
+        # The grid follows with the change feed, see apply_changes()
+        self.poll_changes()
+        self.statusBar().showMessage("Merged into item {}".format(row[0]), 5000)
+        self.refresh_alerts()
+
+    @instrumentation.slot()
+    def analytics(self):
+        # The totals of every department and those of this one per
+        # Category, Cabinet or Supplier, see summaries.py
+        key, backend, repo = self.key, self.backend, self.current_repository()
+        dimensions = summaries.dimensions(schemas.SCHEMAS[key])
+
+        def load():
+            return (backend.department_totals(),
+                    [(dimension, repo.totals(dimension)) for dimension in dimensions])
+        self.executor.submit(load, channel="analytics",
+                             on_result=lambda report: self.show_analytics(key, *report),
+                             on_error=self.show_error)
+
+    @instrumentation.slot()
+    def show_analytics(self, key, departments, totals):
+        dlg = AnalyticsDialog(schemas.SCHEMAS[key], departments, totals, self)
+        dlg.exec_()
+
+    @instrumentation.slot()
+    def poll_changes(self):
+        # Ask for what changed since the grid was filled; nothing is
+        # asked while the grid is being filled or the last poll runs
+        if (self.change_seq is None or self.executor.pending("rows")
+                or self.executor.pending("changes")):
+            return
+        key, since = self.key, self.change_seq
+        where, params = self.listing if self.table_model.paged else ("", ())
+        self.executor.submit(self.backend.changes, key, since, where, params,
+                             channel="changes",
+                             on_result=lambda delta: self.apply_changes(key, since, delta),
+                             on_error=self.show_error)
+
+    @instrumentation.slot()
+    def apply_changes(self, key, since, delta):
+        """
+        Change only the rows of the grid that others changed: replace
+        the rows shown, remove the deleted ones and count the new ones,
+        which are shown when they belong at the end of the last page.
+        """
+        if key != self.key or since != self.change_seq:
+            return      # the grid was filled again meanwhile
+        if delta is None:
+            # Too far behind the change log
+            if self.table_model.paged:
+                self.show_page(*self.page_request)
+            else:
+                self.change_seq = None
+            return
+        self.change_seq = delta.seq
+        if not delta.rows and not delta.deleted:
+            return
+        model = self.table_model
+        model.replace_rows(delta.rows)
+        model.remove_rows(delta.deleted)
+        if model.paged:
+            shown = model.rows()
+            if (not self.listing[0] and self.sort_by is None and not self.descending
+                    and self.page_start + len(shown) >= self.row_total):
+                size = self.page_size_combo.currentData()
+                inserted = set(delta.inserted)
+                for row in delta.rows:
+                    if len(shown) >= size:
+                        break
+                    if row[0] in inserted and not model.has_row(row[0]):
+                        model.append_row(row)
+            if delta.total is not None:
+                self.row_total = delta.total
+            else:
+                self.row_total += len(delta.inserted) - len(delta.deleted)
+        self.show_row_count()
+        if schemas.SCHEMAS[key].stock:
+            self.refresh_alerts()
+
+    @instrumentation.slot()
+    def refresh_alerts(self):
+        self.executor.submit(self.backend.low_stock, channel="alerts",
+                             on_result=self.show_alerts, on_error=self.show_error)
+
+    @instrumentation.slot()
+    def show_alerts(self, rows):
+        self.low_stock_panel.set_alerts(rows)
+        self.low_stock_dock.setWindowTitle("Low stock ({})".format(len(rows)))
+
+    @instrumentation.slot()
+    def show_alert_item(self, key, id):
+        # Open the item in the entry form, ready to update its amount
+        if key != self.key:
+            self.item_info_window.pageCombo.setCurrentText(key)
+            self.item_info_window.switchPage()
+            self.select_table()
+        self.search_box.blockSignals(True)
+        self.search_box.setText(str(id))
+        self.search_box.blockSignals(False)
+        self.search_item(id)
+
+    @instrumentation.slot()
+    def set_threshold(self):
+        dlg = ThresholdDialog(self.key, self.search_box.text(), self)
+        if dlg.exec_() != QDialog.Accepted:
+            return
+        key, category, item, threshold = dlg.threshold()
+        if category is not None:
+            fn, target = self.backend.set_category_threshold, category
+        else:
+            fn, target = self.backend.set_item_threshold, item
+        self.executor.submit(fn, key, target, threshold,
+                             on_result=lambda result: self.refresh_alerts(),
+                             on_error=self.show_error)
 
     def quit(self):
         reply = QMessageBox.question(self, 'Exit', 'Do you want to quit?',
                                      QMessageBox.Yes | QMessageBox.No, QMessageBox.No)
         if reply == QMessageBox.Yes:
+            self.executor.wait()
+            self.backend.close()
             sys.exit()
         else:
             pass
 
 
+def describe_error(error):
+    # Message for the user about a failed database job
+    if error is None:
+        return ""
+    if connection.is_locked(error):
+        return ("The database is busy, another computer is writing to it. "
+                "Please try again in a moment.")
+    return str(error)
+
+
 """
 A class that contains the software develop information
 """
@@ -478,9 +940,7 @@ class AboutDialog(QDialog):
         title.setFont(font)
 
         labelpic = QLabel()
-        pixmap = QPixmap('icon/logo.png')
-        pixmap = pixmap.scaledToWidth(100)
-        labelpic.setPixmap(pixmap)
+        labelpic.setPixmap(icons.pixmap("logo.png", 100))
         labelpic.setFixedHeight(100)
 
         layout.addWidget(title)
@@ -494,178 +954,559 @@ class AboutDialog(QDialog):
 
 
 """
-Class of a window that displays the entry information
+Dialog showing where time goes: the recorded operations, the slowest
+calls with their SQL, and the cProfile capture
 """
 
 
-class EntryWindow(QWidget):
+class DiagnosticsDialog(QDialog):
+    def __init__(self, *args, **kwargs):
+        super(DiagnosticsDialog, self).__init__(*args, **kwargs)
+        self.setWindowTitle("Diagnostics")
+        self.resize(900, 600)
+
+        self.enabledCheck = QCheckBox("Record timings")
+        self.enabledCheck.setChecked(instrumentation.enabled())
+        self.enabledCheck.toggled.connect(instrumentation.enable)
+        self.profileCheck = QCheckBox("Profile with cProfile")
+        self.profileCheck.setChecked(instrumentation.profiling())
+        self.profileCheck.toggled.connect(instrumentation.profile)
+
+        self.operationList = QTreeWidget()
+        self.operationList.setRootIsDecorated(False)
+        self.operationList.setAlternatingRowColors(True)
+        self.operationList.setHeaderLabels(
+            ("Operation", "Calls", "Total ms", "Mean ms", "p95 ms", "Max ms", "Rows"))
+        self.slowestList = QTreeWidget()
+        self.slowestList.setRootIsDecorated(False)
+        self.slowestList.setAlternatingRowColors(True)
+        self.slowestList.setHeaderLabels(("ms", "Operation", "Rows", "Thread", "SQL"))
+        self.profileText = QPlainTextEdit()
+        self.profileText.setReadOnly(True)
+        self.profileText.setFont(QFontDatabase.systemFont(QFontDatabase.FixedFont))
+
+        tabs = QTabWidget()
+        tabs.addTab(self.slowestList, "Slowest calls")
+        tabs.addTab(self.operationList, "Operations")
+        tabs.addTab(self.profileText, "Profile")
+
+        btn_refresh = QPushButton("Refresh")
+        btn_refresh.clicked.connect(self.refresh)
+        btn_reset = QPushButton("Reset")
+        btn_reset.clicked.connect(self.reset)
+        btn_export = QPushButton("Export JSON...")
+        btn_export.clicked.connect(self.export)
+        self.buttonBox = QDialogButtonBox(QDialogButtonBox.Close)
+        self.buttonBox.rejected.connect(self.reject)
+
+        layout = QVBoxLayout()
+        layout_checks = QHBoxLayout()
+        layout_checks.addWidget(self.enabledCheck)
+        layout_checks.addWidget(self.profileCheck)
+        layout_checks.addStretch()
+        layout.addLayout(layout_checks)
+        layout.addWidget(tabs)
+        layout_buttons = QHBoxLayout()
+        layout_buttons.addWidget(btn_refresh)
+        layout_buttons.addWidget(btn_reset)
+        layout_buttons.addWidget(btn_export)
+        layout_buttons.addStretch()
+        layout_buttons.addWidget(self.buttonBox)
+        layout.addLayout(layout_buttons)
+        self.setLayout(layout)
+        self.refresh()
+
+    def refresh(self):
+        self.operationList.clear()
+        for operation in instrumentation.operations():
+            self.operationList.addTopLevelItem(QTreeWidgetItem(
+                [operation["name"], str(operation["count"]),
+                 "{:.1f}".format(operation["total_ms"]),
+                 "{:.2f}".format(operation["mean_ms"]),
+                 "{:g}".format(operation["p95_ms"]),
+                 "{:.2f}".format(operation["max_ms"]), str(operation["rows"])]))
+        self.slowestList.clear()
+        for sample in instrumentation.slowest():
+            item = QTreeWidgetItem(
+                ["{:.2f}".format(sample["ms"]), sample["name"],
+                 "" if sample["rows"] is None else str(sample["rows"]),
+                 sample["thread"], (sample["sql"] or [""])[0]])
+            item.setToolTip(4, "\n\n".join(sample["sql"]))
+            self.slowestList.addTopLevelItem(item)
+        for view in (self.operationList, self.slowestList):
+            for column in range(view.columnCount() - 1):
+                view.resizeColumnToContents(column)
+        self.profileText.setPlainText(instrumentation.profile_text() or
+                                      "Turn on profiling, then use the window.")
+
+    def reset(self):
+        instrumentation.reset()
+        self.refresh()
+
+    def export(self):
+        path, _ = QFileDialog.getSaveFileName(self, "Export diagnostics",
+                                              "diagnostics.json", "JSON file (*.json)")
+        if not path:
+            return
+        try:
+            instrumentation.export(path)
+        except OSError as e:
+            QMessageBox.warning(QMessageBox(), "Error",
+                                "Could not export the diagnostics\n{}".format(e))
+
+
+"""
+Panel listing the items below their low-stock threshold
+"""
+
+
+class LowStockPanel(QWidget):
+    itemSelected = QtCore.pyqtSignal(str, int)      # department key, item id
+
     def __init__(self):
         super().__init__()
 
-        layout = QHBoxLayout()
-        sub_layout = QVBoxLayout()
+        headers = ("Department", "Item id", "Description", "Category",
+                   "Amount", "Threshold")
+        self.alert_list = QTreeWidget()
+        self.alert_list.setRootIsDecorated(False)
+        self.alert_list.setAlternatingRowColors(True)
+        self.alert_list.setHeaderLabels(headers)
+        self.alert_list.itemDoubleClicked.connect(
+            lambda item, column: self.itemSelected.emit(
+                item.text(0), int(item.text(1))))
+
+        self.btn_refresh = QPushButton("Refresh")
+        self.btn_refresh.setIcon(icons.icon("view.png"))
+        self.btn_threshold = QPushButton("Thresholds...")
+
+        layout = QVBoxLayout()
+        layout.addWidget(self.alert_list)
+        layout_buttons = QHBoxLayout()
+        layout_buttons.addWidget(self.btn_refresh)
+        layout_buttons.addWidget(self.btn_threshold)
+        layout.addLayout(layout_buttons)
         self.setLayout(layout)
 
-        # Label
-        self.database_label = QLabel("Database")
-        self.database_label.setFont(QFont("Arial", 14))
-        self.database_label.setFixedSize(100, 30)
-        self.item_label_ee = QLabel("Item Information")
-        self.item_label_ee.setFont(QFont("Arial", 14))
-        self.item_label_ee.setFixedSize(250, 40)
-        self.item_label_mech = QLabel("Item Information")
-        self.item_label_mech.setFont(QFont("Arial", 14))
-        self.item_label_mech.setFixedSize(250, 40)
+    def set_alerts(self, rows):
+        # rows as returned by alerts.low_stock()
+        self.alert_list.clear()
+        for key, id, description, part_no, category, cabinet, amount, threshold in rows:
+            self.alert_list.addTopLevelItem(QTreeWidgetItem(
+                [key, str(id), description or part_no or "", category or "",
+                 str(amount), str(threshold)]))
+        for column in range(self.alert_list.columnCount()):
+            self.alert_list.resizeColumnToContents(column)
 
-        self.picLabel = QLabel()
-        self.pixmap = QPixmap("icon/electronics.jpg")
-        self.pixmap = self.pixmap.scaled(300, 200, QtCore.Qt.KeepAspectRatio)
-        self.picLabel.setPixmap(self.pixmap)
-        self.picLabel.setFixedSize(300, 200)
 
-        # Create and connect the combo box to switch between different inventory database
-        self.pageCombo = QComboBox()
-        self.pageCombo.addItems(
-            ["ELECTRONICS", "MECHANICS", "QUALITY", "SOURCING"])
-        self.pageCombo.activated.connect(self.switchPage)
+"""
+Dialog setting the low-stock threshold of a category or of one item
+"""
 
-        # Layouts
-        self.stackedLayout = QStackedLayout()
-        sub_layout.addWidget(self.database_label)
-        sub_layout.addWidget(self.pageCombo)
-        sub_layout.addWidget(self.picLabel)
-        layout.addLayout(sub_layout)
-        layout.addLayout(self.stackedLayout)
 
-        # -------------------------- #
-        #      Electronics Page      #
-        # -------------------------- #
-        self.page_ee = QWidget()
-        self.page_ee_layout = QVBoxLayout()
-        self.form_layout_ee = QFormLayout()
+class ThresholdDialog(QDialog):
+    def __init__(self, key, item_id="", *args, **kwargs):
+        super(ThresholdDialog, self).__init__(*args, **kwargs)
+        self.setWindowTitle("Low-stock threshold")
+
+        self.departmentCombo = QComboBox()
+        for schema in schemas.stock_schemas():
+            self.departmentCombo.addItem(schema.key)
+        self.departmentCombo.setCurrentText(key)
+        self.departmentCombo.currentTextChanged.connect(self.updateCategories)
+
+        self.categoryRadio = QRadioButton("Category")
+        self.categoryRadio.setChecked(True)
+        self.categoryCombo = QComboBox()
+        self.categoryCombo.setEditable(True)
+        self.updateCategories(self.departmentCombo.currentText())
+        self.itemRadio = QRadioButton("Item id")
+        self.itemEdit = QLineEdit(item_id if item_id.isdigit() else "")
+        self.itemEdit.setValidator(QIntValidator(1, 2 ** 31 - 1))
+        self.itemEdit.textEdited.connect(lambda text: self.itemRadio.setChecked(True))
+
+        # The lowest value removes the threshold
+        self.thresholdSpin = QSpinBox()
+        self.thresholdSpin.setRange(-1, 10 ** 9)
+        self.thresholdSpin.setSpecialValueText("No threshold")
+        self.thresholdSpin.setValue(10)
+
+        self.buttonBox = QDialogButtonBox(QDialogButtonBox.Ok | QDialogButtonBox.Cancel)
+        self.buttonBox.accepted.connect(self.accept)
+        self.buttonBox.rejected.connect(self.reject)
 
-        self.item_ee_id = ""
-        self.item_ee_id_label = QLabel("Item id:  " + self.item_ee_id)
-        self.page_ee_layout.addWidget(self.item_label_ee)
-        self.page_ee_layout.addWidget(self.item_ee_id_label)
+        layout = QFormLayout()
+        layout.addRow("Department:", self.departmentCombo)
+        layout.addRow(self.categoryRadio, self.categoryCombo)
+        layout.addRow(self.itemRadio, self.itemEdit)
+        layout.addRow("Alert below:", self.thresholdSpin)
+        layout.addRow(self.buttonBox)
+        self.setLayout(layout)
 
-        self.description_ee = QLineEdit()
-        self.form_layout_ee.addRow("Description:", self.description_ee)
+    def updateCategories(self, key):
+        schema = schemas.SCHEMAS[key]
+        choices = schema.columns[schema.names.index("Category")].choices
+        self.categoryCombo.clear()
+        self.categoryCombo.addItems(choices or ())
 
-        self.part_number_ee = QLineEdit()
-        self.form_layout_ee.addRow(
-            "Manufacturer part number:", self.part_number_ee)
+    def accept(self):
+        if self.itemRadio.isChecked() and not self.itemEdit.text():
+            self.itemEdit.setFocus()
+            return
+        super(ThresholdDialog, self).accept()
 
-        self.category_ee = QComboBox()
-        self.category_ee.addItem("Resistors", ["mΩ", "Ω", "kΩ", "MΩ"])
-        self.category_ee.addItem("Capacitors", ["pF", "nF", "uF"])
-        self.category_ee.addItem("Inductors", ["nH", "uH", "H"])
-        self.category_ee.addItem("ICs", ["pcs"])
-        self.category_ee.addItem("Modules", ["pcs"])
-        self.category_ee.addItem("Motors", ["pcs"])
-        self.category_ee.addItem("Batteries", ["pcs"])
-        self.category_ee.addItem("Misc", ["pcs"])
-        self.category_ee.currentIndexChanged.connect(self.updateUnitInput)
-        self.form_layout_ee.addRow("Category:", self.category_ee)
+    # (department key, category or None, item id or None, threshold or None)
+    def threshold(self):
+        threshold = self.thresholdSpin.value()
+        threshold = None if threshold < 0 else threshold
+        key = self.departmentCombo.currentText()
+        if self.itemRadio.isChecked():
+            return key, None, int(self.itemEdit.text()), threshold
+        return key, self.categoryCombo.currentText(), None, threshold
 
-        self.package_ee = QLineEdit()
-        self.form_layout_ee.addRow("Package:", self.package_ee)
 
-        self.value_ee = QLineEdit()
-        self.form_layout_ee.addRow("Value:", self.value_ee)
+"""
+Dialog choosing one field to set on every selected item
+"""
 
-        self.unit_ee = QComboBox()
-        # default displays
-        self.unit_ee.addItems(["mΩ", "Ω", "kΩ", "MΩ"])
-        self.form_layout_ee.addRow("Unit:", self.unit_ee)
 
-        self.cabinet_ee = QLineEdit()
-        self.form_layout_ee.addRow("Cabinet:", self.cabinet_ee)
+class BulkEditDialog(QDialog):
+    def __init__(self, schema, count, *args, **kwargs):
+        super(BulkEditDialog, self).__init__(*args, **kwargs)
+        self.setWindowTitle("Edit {} items".format(count))
 
-        self.amount_ee = QLineEdit()
-        self.form_layout_ee.addRow("In stock amount:", self.amount_ee)
+        # Amounts in stock only change by check-in and check-out
+        self.columns = [column for column in schema.columns
+                        if not (schema.stock and column.name == "Amount")]
+        self.columnCombo = QComboBox()
+        for column in self.columns:
+            self.columnCombo.addItem(column.label or column.name, column.name)
+        self.columnCombo.currentIndexChanged.connect(self.updateChoices)
 
-        self.notes_ee = QLineEdit()
-        self.form_layout_ee.addRow("Notes:", self.notes_ee)
+        self.valueCombo = QComboBox()
+        self.valueCombo.setEditable(True)
+        self.updateChoices(0)
 
-        self.page_ee_layout.addLayout(self.form_layout_ee)
+        self.buttonBox = QDialogButtonBox(QDialogButtonBox.Ok | QDialogButtonBox.Cancel)
+        self.buttonBox.accepted.connect(self.accept)
+        self.buttonBox.rejected.connect(self.reject)
+
+        layout = QFormLayout()
+        layout.addRow(QLabel("Set this field of the {} selected items:".format(count)))
+        layout.addRow("Field:", self.columnCombo)
+        layout.addRow("New value:", self.valueCombo)
+        layout.addRow(self.buttonBox)
+        self.setLayout(layout)
+
+    def updateChoices(self, index):
+        choices = self.columns[index].choices or ()
+        if isinstance(choices, dict):
+            # e.g. units, offered for every category
+            choices = sorted({choice for values in choices.values() for choice in values})
+        self.valueCombo.clear()
+        self.valueCombo.addItems(choices)
+        self.valueCombo.setEditText("")
 
-        self.page_ee.setLayout(self.page_ee_layout)
-        self.stackedLayout.addWidget(self.page_ee)
+    # (column name, new value)
+    def change(self):
+        return self.columnCombo.currentData(), self.valueCombo.currentText()
 
-        # -------------------------- #
-        #       Mechanics Page       #
-        # -------------------------- #
-        self.page_mech = QWidget()
-        self.page_mech_layout = QVBoxLayout()
-        self.form_layout_mech = QFormLayout()
 
-        self.item_mech_id = ""
-        self.item_mech_id_label = QLabel("Item id:  " + self.item_mech_id)
-        self.page_mech_layout.addWidget(self.item_label_mech)
-        self.page_mech_layout.addWidget(self.item_mech_id_label)
+"""
+Dialog of the inventory totals: items and amounts per department, and
+per category, cabinet or supplier of one department
+"""
 
-        self.description_mech = QLineEdit()
-        self.form_layout_mech.addRow("Description:", self.description_mech)
 
-        self.part_number_mech = QLineEdit()
-        self.form_layout_mech.addRow(
-            "Manufacturer part number:", self.part_number_mech)
+class AnalyticsDialog(QDialog):
+    def __init__(self, schema, departments, totals, *args, **kwargs):
+        super(AnalyticsDialog, self).__init__(*args, **kwargs)
+        self.setWindowTitle("Analytics")
+        self.resize(600, 450)
+        amount = next(column.header or column.label for column in schema.columns
+                      if column.name == "Amount")
+
+        tabs = QTabWidget()
+        tabs.addTab(self.totalList(("Department", "Items", "Amount"), departments),
+                    "Departments")
+        for dimension, rows in totals:
+            # The most items first
+            rows = sorted(rows, key=lambda row: (-row[1], row[0] or ""))
+            tabs.addTab(self.totalList((dimension, "Items", amount), rows,
+                                       sum(items for _, items, _ in rows)),
+                        "{} by {}".format(schema.key.capitalize(), dimension.lower()))
+        tabs.setCurrentIndex(1 if totals else 0)
+
+        self.buttonBox = QDialogButtonBox(QDialogButtonBox.Close)
+        self.buttonBox.rejected.connect(self.reject)
+
+        layout = QVBoxLayout()
+        layout.addWidget(tabs)
+        layout.addWidget(self.buttonBox)
+        self.setLayout(layout)
 
-        self.category_mech = QComboBox()
-        self.category_mech.addItem("Screws and screw headers")
-        self.category_mech.addItem("3D printing filament")
-        self.category_mech.addItem("Tools")
-        self.category_mech.addItem("Misc")
-        self.form_layout_mech.addRow("Category:", self.category_mech)
+    def totalList(self, headers, rows, items=None):
+        # With items, the share of each row is shown too
+        view = QTreeWidget()
+        view.setRootIsDecorated(False)
+        view.setAlternatingRowColors(True)
+        view.setHeaderLabels(headers + (("Share",) if items else ()))
+        for name, count, amount in rows:
+            values = [name or "(none)", str(count), "" if amount is None else str(amount)]
+            if items:
+                values.append("{:.1%}".format(count / items))
+            item = QTreeWidgetItem(values)
+            for column in range(1, len(values)):
+                item.setTextAlignment(column, QtCore.Qt.AlignRight)
+            view.addTopLevelItem(item)
+        for column in range(view.columnCount()):
+            view.resizeColumnToContents(column)
+        return view
 
-        self.cabinet_mech = QLineEdit()
-        self.form_layout_mech.addRow("Cabinet:", self.cabinet_mech)
 
-        self.amount_mech = QLineEdit()
-        self.form_layout_mech.addRow("In stock amount:", self.amount_mech)
+"""
+Dialog listing the groups of items that look like one part; the group
+of the selected item can be merged into it
+"""
 
-        self.notes_mech = QLineEdit()
-        self.form_layout_mech.addRow("Notes:", self.notes_mech)
 
-        self.page_mech_layout.addLayout(self.form_layout_mech)
+class DuplicatesDialog(QDialog):
+    def __init__(self, schema, groups, *args, **kwargs):
+        super(DuplicatesDialog, self).__init__(*args, **kwargs)
+        self.setWindowTitle("Duplicates ({} groups)".format(len(groups)))
+        self.resize(900, 500)
+
+        columns = [column for column in schema.columns
+                   if column.name in ("PartNo", "Description", "Cabinet", "Amount")]
+        indexes = [schema.names.index(column.name) + 1 for column in columns]
+        self.groupTree = QTreeWidget()
+        self.groupTree.setAlternatingRowColors(True)
+        self.groupTree.setHeaderLabels(
+            ["Item", "Alike"] + [column.label or column.name for column in columns])
+        for group in groups:
+            parent = None
+            for row, score, same in group:
+                item = QTreeWidgetItem(
+                    [str(row[0]), "" if same is None else "part number" if same
+                     else "{:.0%}".format(score)]
+                    + ["" if row[index] is None else str(row[index]) for index in indexes])
+                item.setData(0, QtCore.Qt.UserRole, row[0])
+                if parent is None:
+                    parent = item
+                    self.groupTree.addTopLevelItem(item)
+                else:
+                    parent.addChild(item)
+            parent.setExpanded(True)
+        for column in range(self.groupTree.columnCount() - 1):
+            self.groupTree.resizeColumnToContents(column)
+
+        self.buttonBox = QDialogButtonBox(QDialogButtonBox.Close)
+        self.mergeButton = self.buttonBox.addButton("Merge into selected",
+                                                    QDialogButtonBox.AcceptRole)
+        self.mergeButton.setEnabled(False)
+        self.buttonBox.accepted.connect(self.accept)
+        self.buttonBox.rejected.connect(self.reject)
+        self.groupTree.itemSelectionChanged.connect(
+            lambda: self.mergeButton.setEnabled(self.groupTree.currentItem() is not None))
 
-        for i in range(3):      # Add three empty boxes to better layout
-            self.page_mech_layout.addWidget(QLabel())
+        layout = QVBoxLayout()
+        layout.addWidget(QLabel("Items with the same part number or a similar "
+                                "description, the oldest first:"))
+        layout.addWidget(self.groupTree)
+        layout.addWidget(self.buttonBox)
+        self.setLayout(layout)
 
-        self.page_mech.setLayout(self.page_mech_layout)
-        self.stackedLayout.addWidget(self.page_mech)
+    # (item kept, the other items of its group)
+    def merge(self):
+        item = self.groupTree.currentItem()
+        top = item.parent() or item
+        ids = [top.data(0, QtCore.Qt.UserRole)] + [
+            top.child(i).data(0, QtCore.Qt.UserRole) for i in range(top.childCount())]
+        keep = item.data(0, QtCore.Qt.UserRole)
+        return keep, [id for id in ids if id != keep]
 
-        # index of database
-        # 0 = electronics, 1 = mechanics
+
+"""
+Class of a window that displays the entry information
+"""
+
+
+class EntryWindow(QWidget):
+    def __init__(self):
+        super().__init__()
+
+        layout = QHBoxLayout()
+        sub_layout = QVBoxLayout()
+        self.setLayout(layout)
+
+        # Label
+        self.database_label = QLabel("Database")
+        self.database_label.setFont(QFont("Arial", 14))
+        self.database_label.setFixedSize(100, 30)
+
+        # The picture is decoded after the window is shown, see showPicture
+        self.picLabel = QLabel()
+        self.picLabel.setFixedSize(300, 200)
+        QtCore.QTimer.singleShot(0, self.showPicture)
+
+        # Create and connect the combo box to switch between different inventory database
+        self.pageCombo = QComboBox()
+        self.pageCombo.addItems(list(schemas.SCHEMAS))
+        self.pageCombo.activated.connect(self.switchPage)
+
+        # How the filled-in fields are combined when searching
+        self.matchCombo = QComboBox()
+        self.matchCombo.addItem("Match any field", query.MATCH_ANY)
+        self.matchCombo.addItem("Match all fields", query.MATCH_ALL)
+        self.matchCombo.setToolTip(
+            "Search syntax per field: abc* (prefix), 1..10 (range), >=5, <5")
+
+        # Layouts
+        self.stackedLayout = QStackedLayout()
+        sub_layout.addWidget(self.database_label)
+        sub_layout.addWidget(self.pageCombo)
+        sub_layout.addWidget(self.matchCombo)
+        sub_layout.addWidget(self.picLabel)
+        layout.addLayout(sub_layout)
+        layout.addLayout(self.stackedLayout)
+
+        # ------------------------------------ #
+        #   One page per department schema    #
+        # ------------------------------------ #
+        self.fields = {}        # key -> {column name: widget}
+        self.chosen = {}        # key -> names of the combo boxes set, see search_values
+        self.id_labels = {}
+        for schema in schemas.SCHEMAS.values():
+            self.stackedLayout.addWidget(self.createPage(schema))
+
+        # index of database, in the order of schemas.SCHEMAS
         self.db_id = 0
 
-    def updateUnitInput(self, index):
-        self.unit_ee.clear()
-        categories = self.category_ee.itemData(index)
-        if categories:
-            self.unit_ee.addItems(categories)
+    def createPage(self, schema):
+        page = QWidget()
+        page_layout = QVBoxLayout()
+        form_layout = QFormLayout()
+
+        item_label = QLabel("Item Information")
+        item_label.setFont(QFont("Arial", 14))
+        item_label.setFixedSize(250, 40)
+        self.id_labels[schema.key] = QLabel("Item id:  ")
+        page_layout.addWidget(item_label)
+        page_layout.addWidget(self.id_labels[schema.key])
+
+        fields = self.fields[schema.key] = {}
+        chosen = self.chosen[schema.key] = set()
+        for column in schema.columns:
+            if column.choices is None:
+                widget = QLineEdit()
+            else:
+                widget = QComboBox()
+                if column.depends is None:
+                    widget.addItems(column.choices)
+                else:
+                    # e.g. the units offered follow the category
+                    parent = fields[column.depends]
+                    parent.currentTextChanged.connect(
+                        lambda text, widget=widget, choices=column.choices:
+                        self.updateChoices(widget, choices.get(text, ())))
+                    self.updateChoices(widget,
+                                       column.choices.get(parent.currentText(), ()))
+                # Only a choice of the user is searched, activated is not
+                # emitted for changes made by the program
+                widget.activated.connect(
+                    lambda index, name=column.name: chosen.add(name))
+            fields[column.name] = widget
+            form_layout.addRow(column.label + ":", widget)
+
+        page_layout.addLayout(form_layout)
+        page_layout.addStretch()
+        page.setLayout(page_layout)
+        return page
+
+    def updateChoices(self, combo, choices):
+        combo.clear()
+        combo.addItems(choices)
+
+    # The form fields of a department, in the order of its columns
+    def values(self, key):
+        return tuple(widget.currentText() if isinstance(widget, QComboBox)
+                     else widget.text() for widget in self.fields[key].values())
+
+    def search_values(self, key):
+        """
+        The fields to search, as values(): a combo box always shows a
+        choice, so it is empty unless the user chose it or it was filled
+        from an item.
+        """
+        chosen = self.chosen[key]
+        return tuple("" if isinstance(widget, QComboBox) and name not in chosen else value
+                     for (name, widget), value in zip(self.fields[key].items(),
+                                                      self.values(key)))
+
+    def fill(self, key, id, row):
+        fields = list(self.fields[key].values())
+        values = row[1:1 + len(fields)]
+        self.id_labels[key].setText("Item id:{:>35}".format(id))
+        self.chosen[key].update(name for name, widget in self.fields[key].items()
+                                if isinstance(widget, QComboBox))
+        for widget, value in zip(fields, values):
+            value = "" if value is None else str(value)
+            if isinstance(widget, QComboBox):
+                widget.setCurrentText(value)
+            else:
+                widget.setText(value)
+
+    def clear_id(self, key):
+        self.id_labels[key].setText("Item id:")
+
+    def clear(self, key):
+        self.clear_id(key)
+        self.chosen[key].clear()
+        for widget in self.fields[key].values():
+            if isinstance(widget, QLineEdit):
+                widget.clear()
+
+    def search_match(self):
+        return self.matchCombo.currentData()
+
+    def showPicture(self):
+        picture = PAGE_PICTURES.get(self.pageCombo.currentText())
+        if picture:
+            self.picLabel.setPixmap(icons.pixmap(picture, 300, 200))
 
     def switchPage(self):
         self.stackedLayout.setCurrentIndex(self.pageCombo.currentIndex())
         self.db_id = self.pageCombo.currentIndex()
+        self.showPicture()
         return self.db_id
 
 
 if __name__ == "__main__":
-    database_exists = os.path.isfile("inventory.db")
-
-    if database_exists:
-        open("inventory.db", "r+")
+    parser = argparse.ArgumentParser(description="Lab Inventory Management System")
+    parser.add_argument("--db", default=connection.DB_PATH, help="database file")
+    parser.add_argument("--server", help="use the inventory service at this URL "
+                        "instead of a file, e.g. http://lab-pc:8642/ (see server.py)")
+    args, qt_args = parser.parse_known_args()
+
+    if args.server:
+        backend = backends.open_backend(args.server)
     else:
-        open("inventory.db", "w")
-        database_ee.create_table_ee()
-        database_mech.create_table_mech()
+        database_exists = os.path.isfile(args.db)
+
+        if database_exists:
+            open(args.db, "r+")
+        else:
+            open(args.db, "w")
+        # Creates missing tables and brings older databases up to date
+        backend = backends.open_backend(args.db)
 
-    app = QApplication(sys.argv)
+    app = QApplication(sys.argv[:1] + qt_args)
     if QDialog.Accepted:
-        window = MainWindow()
+        window = MainWindow(backend=backend)
         window.show()
         window.key = "ELECTRONICS"      # select the electronics page as default
         window.load_data()
-    sys.exit(app.exec_())
+    exit_code = app.exec_()
+    window.executor.wait()
+    backend.close()
+    sys.exit(exit_code)
@@ -0,0 +1,82 @@
+# ##################################################################
+# File name:    backends.py
+# Author:       agent
+# Create on:    2026-10-18
+# Description:  Where the window reads and writes the inventory: the
+#               database file itself, or the inventory service
+#               (server.py) through remote.py
+# ##################################################################
+
+
+import alerts
+import cache
+import changes
+import connection
+import ledger
+import repository
+import summaries
+
+
+class FileBackend:
+    # The database file opened by this program, see connection.py
+
+    def __init__(self):
+        self._data_version = None
+
+    def repository(self, key):
+        return repository.get(key)
+
+    def low_stock(self, key=None):
+        return alerts.low_stock(key)
+
+    def set_category_threshold(self, key, category, threshold):
+        alerts.set_category_threshold(key, category, threshold)
+
+    def set_item_threshold(self, key, item_id, threshold):
+        alerts.set_item_threshold(key, item_id, threshold)
+
+    def thresholds(self, key):
+        return alerts.thresholds(key)
+
+    def move(self, key, movements, note=""):
+        return ledger.move(key, movements, note)
+
+    def history(self, key, item_id, limit=100):
+        return ledger.history(key, item_id, limit)
+
+    def department_totals(self):
+        return summaries.departments()
+
+    def changes(self, key, since, where="", params=()):
+        """
+        repository.Repository.changes_since() of department key, which
+        is only asked while PRAGMA data_version shows a new commit.
+        """
+        version = cache.data_version()
+        if version == self._data_version:
+            return changes.Delta(since, [], [], [], None)
+        delta = repository.get(key).changes_since(since, where, params)
+        self._data_version = version
+        return delta
+
+    def snapshot(self):
+        return connection.snapshot()
+
+    def close(self):
+        cache.close()
+        connection.close()
+
+
+def open_backend(target=None):
+    """
+    The backend of target: an http:// URL of the inventory service, or
+    the path of a database file (connection.DB_PATH by default), which
+    is brought up to date by migrations.py.
+    """
+    if target and target.startswith("http://"):
+        import remote
+        return remote.ServiceBackend(target)
+    import migrations
+    connection.configure(target or connection.DB_PATH)
+    migrations.migrate()
+    return FileBackend()
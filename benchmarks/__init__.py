@@ -0,0 +1,8 @@
+# ##################################################################
+# File name:    benchmarks/__init__.py
+# Author:       agent
+# Create on:    2026-10-18
+# Description:  Performance benchmarks for the inventory backend.
+#               Run a benchmark with e.g.
+#                   python -m benchmarks.bench_connection
+# ##################################################################
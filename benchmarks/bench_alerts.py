@@ -0,0 +1,119 @@
+# ##################################################################
+# File name:    bench_alerts.py
+# Author:       agent
+# Create on:    2026-10-18
+# Description:  Checks with EXPLAIN QUERY PLAN that the low-stock alerts
+#               and their triggers never scan a department table, and
+#               times them against a full scan on a large table
+# ##################################################################
+
+
+import argparse
+import os
+import statistics
+import sys
+import tempfile
+import time
+
+import alerts
+import cache
+import connection
+import migrations
+import query
+import repository
+from benchmarks.bench_fulltext import _rows
+
+
+ELECTRONICS = repository.get("ELECTRONICS")
+
+
+def _median_ms(fn, repeat):
+    samples = []
+    for _ in range(repeat):
+        cache.invalidate()
+        start = time.perf_counter()
+        fn()
+        samples.append((time.perf_counter() - start) * 1e3)
+    return statistics.median(samples)
+
+
+def _plans(conn):
+    # Every statement the alerts run, with a parameter in place of the
+    # row of a trigger; none may scan electronics
+    statements = [("alerts", alerts.ALERTS.format(table="electronics"))]
+    for name, where in (("item refresh", "rowid=?"), ("category refresh", "Category=?")):
+        for statement in alerts._refresh("electronics", where).split(";"):
+            if statement.strip():
+                statements.append((name, statement))
+    failures = 0
+    for name, sql in statements:
+        plan = query.explain(conn, sql, ("electronics",) * sql.count("?"))
+        scans = [detail for detail in plan if detail.startswith("SCAN")
+                 and "electronics" in detail.split(" USING")[0]]
+        print("{:<18} {}".format(name, "; ".join(plan)))
+        if scans:
+            print("  full scan: {}".format(scans))
+            failures += 1
+    return failures
+
+
+def run(count, repeat):
+    # Thresholds first, so every insert goes through the triggers
+    alerts.set_category_threshold("ELECTRONICS", "Resistors", 50)
+    start = time.perf_counter()
+    ELECTRONICS.add_rows(_rows(count))
+    print("inserted {} rows in {:.1f} s".format(count, time.perf_counter() - start))
+
+    with connection.connection() as conn:
+        failures = _plans(conn)
+        scan_ms = _median_ms(lambda: conn.execute(
+            """SELECT rowid FROM electronics WHERE Category='Resistors'
+               AND Amount < 50""").fetchall(), repeat)
+        scan_all_ms = _median_ms(lambda: conn.execute(
+            """SELECT rowid FROM electronics t WHERE Amount < COALESCE(
+                   (SELECT Threshold FROM item_thresholds
+                    WHERE TableName='electronics' AND ItemId=t.rowid),
+                   (SELECT Threshold FROM category_thresholds
+                    WHERE TableName='electronics' AND Category=t.Category))""").fetchall(),
+            repeat)
+
+    alert_ms = _median_ms(lambda: alerts.low_stock("ELECTRONICS"), repeat)
+    print("{} alerts: low_stock {:.2f} ms, category query {:.2f} ms, "
+          "full scan {:.2f} ms".format(len(alerts.low_stock("ELECTRONICS")),
+                                       alert_ms, scan_ms, scan_all_ms))
+
+    thresholds = iter(range(10, 10 + repeat))
+    print("set a category threshold: {:.2f} ms".format(_median_ms(
+        lambda: alerts.set_category_threshold("ELECTRONICS", "Capacitors",
+                                              next(thresholds)), repeat)))
+    row = ELECTRONICS.search_row(1)
+    amount = ELECTRONICS.columns.index("Amount") + 1
+    amounts = iter(range(repeat))
+
+    def update():
+        # As the form does it, from the Amount it was filled with
+        was = ELECTRONICS.search_row(1)[amount]
+        ELECTRONICS.update_row(1, *ELECTRONICS.values(
+            *row[1:len(ELECTRONICS.columns) + 1], Amount=str(next(amounts))),
+            amount_was=was)
+    print("update one item: {:.2f} ms".format(_median_ms(update, repeat)))
+    return failures
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("-n", "--count", type=int, default=200000)
+    parser.add_argument("-r", "--repeat", type=int, default=20)
+    args = parser.parse_args()
+    with tempfile.TemporaryDirectory() as directory:
+        connection.configure(os.path.join(directory, "alerts.db"))
+        migrations.migrate()
+        failures = run(args.count, args.repeat)
+        cache.close()
+        connection.close()
+    if failures:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,164 @@
+# ##################################################################
+# File name:    bench_analytics.py
+# Author:       agent
+# Create on:    2026-10-18
+# Description:  Time of the analytics totals (summaries.py) compared
+#               with GROUP BY queries over the rows, the cost of their
+#               triggers on inserts, and a check that they stay equal to
+#               the GROUP BY results after a mix of writes
+# ##################################################################
+
+
+import argparse
+import json
+import os
+import random
+import statistics
+import sys
+import tempfile
+import time
+
+import cache
+import connection
+import ledger
+import migrations
+import repository
+import summaries
+from benchmarks import generator
+
+
+SIZES = (100000,)
+INSERTED = 10000
+WRITES = 2000
+# Slowest acceptable dashboard (every total, nothing cached)
+LIMIT_MS = 10
+
+
+class _Rollback(Exception):
+    pass
+
+
+def _ms(fn, *args):
+    start = time.perf_counter()
+    result = fn(*args)
+    return (time.perf_counter() - start) * 1e3, result
+
+
+def _median_ms(fn, repeat):
+    return round(statistics.median(_ms(fn)[0] for _ in range(repeat)), 3)
+
+
+def _group_by(conn, schema, dimension):
+    return conn.execute("SELECT IFNULL({0}, ''), count(*), IFNULL(sum(Amount), 0) FROM {1} "
+                        "GROUP BY IFNULL({0}, '') ORDER BY 1".format(dimension, schema.table)
+                        ).fetchall()
+
+
+def _dashboard_group_by(schema):
+    with connection.connection() as conn:
+        conn.execute("SELECT count(*), sum(Amount) FROM {}".format(schema.table)).fetchone()
+        return [_group_by(conn, schema, dimension) for dimension in summaries.dimensions(schema)]
+
+
+def _dashboard_summaries(schema):
+    cache.invalidate()
+    summaries.departments()
+    with connection.connection() as conn:
+        return [summaries.totals(conn, schema.table, dimension)
+                for dimension in summaries.dimensions(schema)]
+
+
+def _insert_ms(repo, rows, triggers):
+    # Time of adding rows, rolled back; without triggers the summary
+    # triggers are dropped in the same transaction first
+    try:
+        with connection.transaction() as c:
+            if not triggers:
+                for name, _, _ in summaries._triggers(repo.schema):
+                    c.execute("DROP TRIGGER {}".format(name))
+            start = time.perf_counter()
+            repo.add_rows(rows)
+            elapsed = (time.perf_counter() - start) * 1e3
+            raise _Rollback()
+    except _Rollback:
+        pass
+    cache.invalidate()
+    return round(elapsed, 1)
+
+
+def _writes(rnd, repo, size, count):
+    # A mix of the writes the window makes
+    cabinets = ["{}{}".format(letter, number) for letter in "ABCDEF" for number in range(1, 21)]
+    categories = repo.schema.columns[repo.schema.names.index("Category")].choices
+    for _ in range(count):
+        id = rnd.randint(1, size)
+        choice = rnd.random()
+        if choice < 0.3:
+            repo.update_rows([id], Cabinet=rnd.choice(cabinets))
+        elif choice < 0.45:
+            repo.update_rows(rnd.sample(range(1, size + 1), 20),
+                             Category=rnd.choice(categories))
+        elif choice < 0.75:
+            try:
+                ledger.move(repo.schema.key, [(id, rnd.choice((-2, -1, 1, 5)))])
+            except (ValueError, LookupError):
+                pass        # nothing left to check out, or deleted
+        elif choice < 0.9:
+            repo.add_row(*next(generator.rows(repo.schema.key, 1, rnd.random())))
+        else:
+            repo.delete_rows(rnd.sample(range(1, size + 1), 5))
+
+
+def run(size, repeat, rnd):
+    repo = repository.get("ELECTRONICS")
+    schema = repo.schema
+    repo.add_rows(generator.rows("ELECTRONICS", size))
+    extra = list(generator.rows("ELECTRONICS", INSERTED, 2))
+    report = {"rows": size,
+              "group_by_ms": _median_ms(lambda: _dashboard_group_by(schema), repeat),
+              "summaries_ms": _median_ms(lambda: _dashboard_summaries(schema), repeat),
+              "cached_ms": _median_ms(lambda: [summaries.departments()] + [
+                  repo.totals(dimension) for dimension in summaries.dimensions(schema)],
+                  repeat),
+              "count_ms": _median_ms(lambda: (cache.invalidate(), repo.count()), repeat),
+              "insert_{}_ms".format(INSERTED): _insert_ms(repo, extra, True),
+              "insert_{}_without_triggers_ms".format(INSERTED): _insert_ms(repo, extra, False)}
+    _writes(rnd, repo, size, WRITES)
+    with connection.connection() as conn:
+        report["equal_after_writes"] = all(
+            _group_by(conn, schema, dimension) == summaries.totals(conn, schema.table, dimension)
+            for dimension in summaries.dimensions(schema)) and repo.count() == conn.execute(
+            "SELECT count(*) FROM {}".format(schema.table)).fetchone()[0]
+    return report
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--sizes", type=int, nargs="+", default=SIZES)
+    parser.add_argument("-r", "--repeat", type=int, default=5)
+    parser.add_argument("-s", "--seed", type=int, default=1)
+    args = parser.parse_args()
+    rnd = random.Random(args.seed)
+    reports = []
+    for size in args.sizes:
+        with tempfile.TemporaryDirectory() as directory:
+            connection.configure(os.path.join(directory, "analytics.db"))
+            migrations.migrate()
+            reports.append(run(size, args.repeat, rnd))
+            cache.close()
+            connection.close()
+    print(json.dumps(reports, indent=2))
+    failures = 0
+    for report in reports:
+        if not report["equal_after_writes"]:
+            print("{} rows: the totals differ from GROUP BY".format(report["rows"]))
+            failures += 1
+        if report["summaries_ms"] > LIMIT_MS:
+            print("{} rows: the dashboard took longer than {} ms".format(report["rows"], LIMIT_MS))
+            failures += 1
+    if failures:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,79 @@
+# ##################################################################
+# File name:    bench_bulk.py
+# Author:       agent
+# Create on:    2026-10-18
+# Description:  Time of editing and deleting many selected rows at once,
+#               compared with one call per row
+# ##################################################################
+
+
+import argparse
+import os
+import sys
+import tempfile
+import time
+
+import cache
+import connection
+import migrations
+import repository
+from benchmarks.bench_fulltext import _rows
+
+
+ELECTRONICS = repository.get("ELECTRONICS")
+# Bulk operations slower than this fail the benchmark
+LIMIT_S = 1.0
+
+
+def _timed(fn, *args, **kwargs):
+    start = time.perf_counter()
+    result = fn(*args, **kwargs)
+    return time.perf_counter() - start, result
+
+
+def run(count, selected, single):
+    ELECTRONICS.add_rows(_rows(count))
+    # Every other row, so the selection is not one contiguous range
+    ids = list(range(1, 2 * selected, 2))
+    slow = 0
+    for name, fn, kwargs in (("set Cabinet", ELECTRONICS.update_rows, {"Cabinet": "B7"}),
+                             ("set Unit", ELECTRONICS.update_rows, {"Unit": "kΩ"}),
+                             ("delete", ELECTRONICS.delete_rows, {})):
+        seconds, result = _timed(fn, ids, **kwargs)
+        print("{:<12} {:>6} rows in one transaction  {:>8.3f} s".format(name, len(result), seconds))
+        if seconds > LIMIT_S:
+            slow += 1
+
+    # The same one row at a time, as the form does it
+    ids = list(range(2, 2 * single + 2, 2))
+    rows = [ELECTRONICS.search_row(id) for id in ids]
+    seconds, _ = _timed(lambda: [ELECTRONICS.update_row(row[0], *ELECTRONICS.values(
+        *row[1:10], Cabinet="B8")) for row in rows])
+    print("{:<12} {:>6} rows one by one          {:>8.3f} s  ({:.1f} s for {})".format(
+        "update_row", single, seconds, seconds * selected / single, selected))
+    seconds, _ = _timed(lambda: [ELECTRONICS.delete_row(id) for id in ids])
+    print("{:<12} {:>6} rows one by one          {:>8.3f} s  ({:.1f} s for {})".format(
+        "delete_row", single, seconds, seconds * selected / single, selected))
+    return slow
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("-n", "--count", type=int, default=100000)
+    parser.add_argument("-s", "--selected", type=int, default=10000)
+    parser.add_argument("--single", type=int, default=1000,
+                        help="rows timed one by one for comparison")
+    args = parser.parse_args()
+    with tempfile.TemporaryDirectory() as directory:
+        connection.configure(os.path.join(directory, "bulk.db"))
+        migrations.migrate()
+        slow = run(args.count, args.selected, args.single)
+        cache.close()
+        connection.close()
+    if slow:
+        print("bulk operations took longer than {} s".format(LIMIT_S))
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,96 @@
+# ##################################################################
+# File name:    bench_cache.py
+# Author:       agent
+# Create on:    2026-10-18
+# Description:  Time of show_table() when flipping between pages, read
+#               from disk and from the table cache, and checks that
+#               writes by this and by another program invalidate it
+# ##################################################################
+
+
+import argparse
+import os
+import sqlite3
+import statistics
+import sys
+import tempfile
+import time
+
+import cache
+import connection
+import migrations
+import repository
+from benchmarks.bench_fulltext import _rows
+
+
+ELECTRONICS = repository.get("ELECTRONICS")
+MECHANICS = repository.get("MECHANICS")
+
+
+def _flip(repeat, invalidate=False):
+    # Milliseconds of each show_table() call per page, alternating pages
+    samples = {ELECTRONICS: [], MECHANICS: []}
+    for i in range(repeat):
+        for repo in (ELECTRONICS, MECHANICS):
+            if invalidate:
+                cache.invalidate()
+            start = time.perf_counter()
+            repo.show_table()
+            samples[repo].append((time.perf_counter() - start) * 1e3)
+    return samples
+
+
+def run(path, count, repeat):
+    ELECTRONICS.add_rows(_rows(count))
+    MECHANICS.add_rows(("bolt M3x{}".format(i), "M3-{}".format(i), "Tools",
+                        "B1", i % 50, "") for i in range(count // 10))
+
+    cold = _flip(repeat, invalidate=True)
+    warm = _flip(repeat)
+    for repo in (ELECTRONICS, MECHANICS):
+        print("{:<12} {:>7} rows  disk median {:>8.2f} ms  cache median {:>8.2f} ms".format(
+            repo.schema.table, len(repo.show_table()),
+            statistics.median(cold[repo]), statistics.median(warm[repo])))
+
+    failures = 0
+    # Our own write only drops the written table
+    ELECTRONICS.add_row("added", "X1")
+    tables = cache.stats()["tables"]
+    if "electronics" in tables or "mechanics" not in tables:
+        print("own write: wrong tables invalidated {}".format(tables))
+        failures += 1
+    if ELECTRONICS.show_table()[-1][1] != "added":
+        print("own write: stale electronics rows")
+        failures += 1
+
+    # A commit by another program drops everything
+    other = sqlite3.connect(path)
+    other.execute("UPDATE mechanics SET Notes='external' WHERE rowid=1")
+    other.commit()
+    other.close()
+    if MECHANICS.show_table()[0][-1] != "external":
+        print("external write: stale mechanics rows")
+        failures += 1
+    print(cache.stats()["hits"], "hits", cache.stats()["misses"], "misses")
+    return failures
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("-n", "--count", type=int, default=100000,
+                        help="electronics rows, mechanics get a tenth")
+    parser.add_argument("-r", "--repeat", type=int, default=10)
+    args = parser.parse_args()
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, "cache.db")
+        connection.configure(path)
+        migrations.migrate()
+        failures = run(path, args.count, args.repeat)
+        cache.close()
+        connection.close()
+    if failures:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,98 @@
+# ##################################################################
+# File name:    bench_changes.py
+# Author:       agent
+# Create on:    2026-10-18
+# Description:  Time of refreshing an open grid after another program
+#               changed some items: the change feed of changes.py,
+#               compared with reloading the whole table
+# ##################################################################
+
+
+import argparse
+import os
+import random
+import sqlite3
+import statistics
+import sys
+import tempfile
+import time
+
+import backends
+import cache
+import connection
+import migrations
+import repository
+from benchmarks import generator
+
+
+SIZES = (10000, 100000)
+CHANGES = (1, 10, 100, 1000)
+# Slowest acceptable refresh of 10 changes, whatever the table size
+LIMIT_MS = 10
+
+
+def _ms(fn, *args):
+    start = time.perf_counter()
+    result = fn(*args)
+    return (time.perf_counter() - start) * 1e3, result
+
+
+def run(path, size, repeat, rnd):
+    repo = repository.get("ELECTRONICS")
+    backend = backends.FileBackend()
+    repo.add_rows(generator.rows("ELECTRONICS", size))
+    failures = 0
+    idle = []
+    for _ in range(repeat):
+        seq = repo.last_change()
+        backend.changes("ELECTRONICS", seq)
+        idle.append(_ms(backend.changes, "ELECTRONICS", seq)[0])
+    print("{:>8} rows  poll without changes {:>8.3f} ms".format(size, statistics.median(idle)))
+    for count in CHANGES:
+        feed, reload = [], []
+        for _ in range(repeat):
+            seq = repo.last_change()
+            ids = rnd.sample(range(1, size + 1), count)
+            # Another program changes the items
+            other = sqlite3.connect(path)
+            other.executemany("UPDATE electronics SET Notes=? WHERE rowid=?",
+                              ((str(seq), id) for id in ids))
+            other.commit()
+            other.close()
+            ms, delta = _ms(backend.changes, "ELECTRONICS", seq)
+            feed.append(ms)
+            if delta is None or sorted(row[0] for row in delta.rows) != sorted(ids) \
+                    or any(row[9] != str(seq) for row in delta.rows):
+                print("{} changes: wrong delta".format(count))
+                failures += 1
+            reload.append(_ms(repo.show_table)[0])
+        print("{:>8} rows  {:>5} changes  feed {:>8.2f} ms  reload {:>8.2f} ms".format(
+            size, count, statistics.median(feed), statistics.median(reload)))
+        if count == 10 and statistics.median(feed) > LIMIT_MS:
+            print("refreshing 10 changes took longer than {} ms".format(LIMIT_MS))
+            failures += 1
+    return failures
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--sizes", type=int, nargs="+", default=SIZES)
+    parser.add_argument("-r", "--repeat", type=int, default=5)
+    parser.add_argument("-s", "--seed", type=int, default=1)
+    args = parser.parse_args()
+    rnd = random.Random(args.seed)
+    failures = 0
+    for size in args.sizes:
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, "changes.db")
+            connection.configure(path)
+            migrations.migrate()
+            failures += run(path, size, args.repeat, rnd)
+            cache.close()
+            connection.close()
+    if failures:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,152 @@
+# ##################################################################
+# File name:    bench_concurrency.py
+# Author:       agent
+# Create on:    2026-10-18
+# Description:  Multi-process load test of one shared database file:
+#               N reader and M writer processes, as several lab PCs
+#               would be, reporting throughput, latency and the time
+#               writers wait for the write lock
+# ##################################################################
+
+
+import argparse
+import json
+import multiprocessing
+import os
+import random
+import sys
+import tempfile
+import time
+
+import cache
+import connection
+import ledger
+import migrations
+import repository
+
+
+MECHANICS = repository.get("MECHANICS")
+
+
+def _percentiles(samples):
+    # Milliseconds at p50, p95, p99 and the maximum
+    if not samples:
+        return {}
+    samples = sorted(samples)
+    at = lambda p: samples[min(len(samples) - 1, int(len(samples) * p))]
+    return {"p50": round(at(0.50), 2), "p95": round(at(0.95), 2),
+            "p99": round(at(0.99), 2), "max": round(samples[-1], 2)}
+
+
+def _read(items, rnd):
+    # A page of the grid and its row count from one snapshot. The cache
+    # is dropped first so that every read goes to the file.
+    cache.invalidate()
+    with connection.snapshot():
+        MECHANICS.page(after=(None, rnd.randint(0, items)), limit=100)
+        MECHANICS.count()
+
+
+def _write(items, rnd, waits):
+    # A stock movement in its own transaction; the lock wait is the time
+    # until the transaction holds the write lock
+    start = time.perf_counter()
+    with cache.invalidating(MECHANICS.schema.table) as c:
+        waits.append((time.perf_counter() - start) * 1e3)
+        ledger.apply(c, MECHANICS.schema.table, rnd.randint(1, items),
+                     rnd.choice((-2, -1, 1, 2)), "load test")
+
+
+def _worker(role, path, options, seconds, items, seed):
+    # Runs in its own process with its own connections, like another PC
+    connection.configure(path, size=1, pragmas=options["pragmas"],
+                         busy_timeout=options["busy_timeout"],
+                         retries=options["retries"])
+    rnd = random.Random(seed)
+    result = {"role": role, "latency": [], "lock_wait": [], "errors": 0, "rejected": 0}
+    deadline = time.time() + seconds
+    while time.time() < deadline:
+        start = time.perf_counter()
+        try:
+            if role == "reader":
+                _read(items, rnd)
+            else:
+                _write(items, rnd, result["lock_wait"])
+        except ledger.InsufficientStock:
+            result["rejected"] += 1
+        except Exception as e:
+            # Locked even after the busy timeout and the retries
+            if not connection.is_locked(e):
+                raise
+            result["errors"] += 1
+            continue
+        result["latency"].append((time.perf_counter() - start) * 1e3)
+    result["retried"] = connection.get_pool().retried
+    cache.close()
+    connection.close()
+    return result
+
+
+def run(path, readers, writers, seconds, items, options):
+    roles = ["reader"] * readers + ["writer"] * writers
+    with multiprocessing.Pool(len(roles)) as pool:
+        results = pool.starmap(_worker, [(role, path, options, seconds, items, seed)
+                                         for seed, role in enumerate(roles)])
+    report = {"readers": readers, "writers": writers, "seconds": seconds,
+              "journal_mode": options["pragmas"]["journal_mode"],
+              "busy_timeout_ms": options["busy_timeout"], "retries": options["retries"]}
+    for role in ("reader", "writer"):
+        mine = [result for result in results if result["role"] == role]
+        if not mine:
+            continue
+        latency = [value for result in mine for value in result["latency"]]
+        report[role + "s_total"] = {
+            "operations": len(latency),
+            "per_second": round(len(latency) / seconds, 1),
+            "latency_ms": _percentiles(latency),
+            "errors": sum(result["errors"] for result in mine),
+            "retried": sum(result["retried"] for result in mine),
+        }
+        if role == "writer":
+            report["writers_total"]["lock_wait_ms"] = _percentiles(
+                [value for result in mine for value in result["lock_wait"]])
+            report["writers_total"]["rejected"] = sum(result["rejected"]
+                                                      for result in mine)
+    return report
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("-r", "--readers", type=int, default=4)
+    parser.add_argument("-w", "--writers", type=int, default=4)
+    parser.add_argument("-s", "--seconds", type=float, default=5)
+    parser.add_argument("-n", "--items", type=int, default=10000)
+    parser.add_argument("--journal", default=connection.PRAGMAS["journal_mode"],
+                        help="journal mode, e.g. WAL or DELETE")
+    parser.add_argument("--busy-timeout", type=int, default=connection.BUSY_TIMEOUT_MS,
+                        help="milliseconds")
+    parser.add_argument("--retries", type=int, default=connection.WRITE_RETRIES)
+    parser.add_argument("--dir", help="folder of the database, e.g. on a network drive")
+    args = parser.parse_args()
+    options = {"pragmas": dict(connection.PRAGMAS, journal_mode=args.journal),
+               "busy_timeout": args.busy_timeout, "retries": args.retries}
+
+    with tempfile.TemporaryDirectory(dir=args.dir) as directory:
+        path = os.path.join(directory, "concurrency.db")
+        connection.configure(path, pragmas=options["pragmas"])
+        migrations.migrate()
+        MECHANICS.add_rows(("bolt {}".format(i), "B{}".format(i), "Tools", "A1",
+                            "1000", "") for i in range(args.items))
+        cache.close()
+        connection.close()
+        report = run(path, args.readers, args.writers, args.seconds, args.items, options)
+    print(json.dumps(report, indent=2))
+    errors = sum(report.get(role + "s_total", {}).get("errors", 0)
+                 for role in ("reader", "writer"))
+    if errors:
+        print("{} operations failed with the database locked".format(errors))
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,128 @@
+# ##################################################################
+# File name:    bench_connection.py
+# Author:       agent
+# Create on:    2026-10-18
+# Description:  Per-operation latency of the electronics backend with
+#               a fresh connection per call (before) and with the
+#               shared connection pool (after)
+# ##################################################################
+
+
+import argparse
+import os
+import sqlite3
+import statistics
+import tempfile
+import time
+
+import connection
+import migrations
+import repository
+
+
+ELECTRONICS = repository.get("ELECTRONICS")
+
+
+ROW = ("10k resistor", "RC0603FR-0710KL", "Resistors", "0603", "10",
+       "kΩ", "A1", "100", "")
+
+
+# The original implementation: one connect/commit/close per call
+def _legacy_create_table(path):
+    conn = sqlite3.connect(path)
+    conn.execute("""CREATE TABLE electronics (
+                    Description text, PartNo text, Category text, Package text,
+                    Value text, Unit text, Cabinet text, Amount text, Notes text)""")
+    conn.commit()
+    conn.close()
+
+
+def _legacy_add_row(path, row):
+    conn = sqlite3.connect(path)
+    c = conn.cursor()
+    c.execute("INSERT INTO electronics VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)", row)
+    conn.commit()
+    conn.close()
+
+
+def _legacy_search_row(path, id):
+    conn = sqlite3.connect(path)
+    c = conn.cursor()
+    c.execute("SELECT rowid, * from electronics WHERE rowid=?", (id,))
+    row = c.fetchone()
+    conn.commit()
+    conn.close()
+    return row
+
+
+def _legacy_update_row(path, id, row):
+    conn = sqlite3.connect(path)
+    c = conn.cursor()
+    c.execute("""UPDATE electronics SET Description=?, PartNo=?, Category=?, Package=?, Value=?, Unit=?, Cabinet=?, Amount=?, Notes=? WHERE rowid=?""",
+              row + (id,))
+    conn.commit()
+    conn.close()
+
+
+def _legacy_delete_row(path, id):
+    conn = sqlite3.connect(path)
+    c = conn.cursor()
+    c.execute("DELETE FROM electronics WHERE rowid=?", (id,))
+    conn.commit()
+    conn.close()
+
+
+def _time(fn, ids):
+    samples = []
+    for id in ids:
+        start = time.perf_counter()
+        fn(id)
+        samples.append((time.perf_counter() - start) * 1e6)
+    return samples
+
+
+def _report(name, samples):
+    samples.sort()
+    p95 = samples[int(len(samples) * 0.95) - 1]
+    print("  {:<12} median {:>9.1f} us   p95 {:>9.1f} us".format(
+        name, statistics.median(samples), p95))
+
+
+def run(directory, count):
+    legacy_path = os.path.join(directory, "legacy.db")
+    pooled_path = os.path.join(directory, "pooled.db")
+    ids = range(1, count + 1)
+
+    _legacy_create_table(legacy_path)
+    print("per-call connect ({} ops each)".format(count))
+    _report("add_row", _time(lambda id: _legacy_add_row(legacy_path, ROW), ids))
+    _report("search_row", _time(lambda id: _legacy_search_row(legacy_path, id), ids))
+    _report("update_row", _time(lambda id: _legacy_update_row(legacy_path, id, ROW), ids))
+    _report("delete_row", _time(lambda id: _legacy_delete_row(legacy_path, id), ids))
+
+    connection.configure(pooled_path)
+    migrations.migrate()
+    print("connection pool ({} ops each)".format(count))
+    _report("add_row", _time(lambda id: ELECTRONICS.add_row(*ROW), ids))
+    _report("search_row", _time(ELECTRONICS.search_row, ids))
+    _report("update_row", _time(lambda id: ELECTRONICS.update_row(id, *ROW), ids))
+    _report("delete_row", _time(ELECTRONICS.delete_row, ids))
+    connection.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("-n", "--count", type=int, default=500,
+                        help="operations per measurement")
+    parser.add_argument("--dir", help="directory for the benchmark "
+                        "databases, e.g. a folder on the network drive")
+    args = parser.parse_args()
+    if args.dir:
+        run(args.dir, args.count)
+    else:
+        with tempfile.TemporaryDirectory() as directory:
+            run(directory, args.count)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,194 @@
+# ##################################################################
+# File name:    bench_duplicates.py
+# Author:       agent
+# Create on:    2026-10-18
+# Description:  Duplicate detection (duplicates.py) on a large generated
+#               inventory: latency of the check done before adding an
+#               item, how many planted duplicates it finds, and the time
+#               of adding (and so indexing) the rows and of the full report,
+#               and of a write after other tables pushed the change log
+#               past its index
+# ##################################################################
+
+
+import argparse
+import json
+import os
+import random
+import statistics
+import sys
+import tempfile
+import time
+
+import cache
+import changes
+import connection
+import duplicates
+import migrations
+import repository
+from benchmarks import generator
+
+
+SIZE = 500000
+PLANTED = 500
+# Slowest acceptable median check, and fewest planted duplicates found
+# by the check and by the report
+LIMIT_MS = 1.0
+MIN_RECALL = 0.9
+# Slowest acceptable single write after the change log was pruned
+WRITE_LIMIT_MS = 50
+
+
+def _part_variant(rnd, part_no):
+    # The same part number as typed by someone else
+    part_no = part_no.lower() if rnd.random() < 0.5 else part_no
+    cut = rnd.randint(1, len(part_no) - 1)
+    return part_no[:cut] + rnd.choice("- ./") + part_no[cut:]
+
+
+def _description_variant(rnd, description):
+    # One word more, or one less, and maybe another case
+    words = description.split()
+    if len(words) > 3 and rnd.random() < 0.5:
+        words.pop(rnd.randrange(1, len(words)))
+    else:
+        words.insert(rnd.randint(1, len(words)), rnd.choice(("SMD", "NEW", "TYPE", "GENERIC")))
+    description = " ".join(words)
+    return description.title() if rnd.random() < 0.3 else description
+
+
+def _planted(rnd, repo, size, count):
+    # (values, id of the item it duplicates): half by part number, half
+    # by a description with no part number
+    description = repo.columns.index("Description")
+    part_no = repo.columns.index("PartNo")
+    planted = []
+    for i, id in enumerate(rnd.sample(range(1, size + 1), count)):
+        values = list(repo.search_row(id)[1:1 + len(repo.columns)])
+        if i % 2:
+            values[part_no] = _part_variant(rnd, values[part_no])
+        else:
+            values[description] = _description_variant(rnd, values[description])
+            values[part_no] = ""
+        planted.append((values, id))
+    return planted
+
+
+def _ms(fn, *args, **kwargs):
+    start = time.perf_counter()
+    result = fn(*args, **kwargs)
+    return (time.perf_counter() - start) * 1e3, result
+
+
+def _percentiles(values):
+    values = sorted(values)
+    return {"p50": round(statistics.median(values), 3),
+            "p99": round(values[min(len(values) - 1, int(len(values) * 0.99))], 3),
+            "max": round(values[-1], 3)}
+
+
+def _foreign_rows(table, count):
+    # Rows added by another program, without the write path of repository
+    with connection.transaction() as c:
+        c.execute("INSERT INTO {} (Description) WITH RECURSIVE n(i) AS (SELECT 1 UNION ALL "
+                  "SELECT i + 1 FROM n WHERE i < ?) SELECT 'BOLT M' || i FROM n".format(table),
+                  (count,))
+    cache.invalidate()
+
+
+def pruned(repo, seed):
+    """
+    Time of adding one item after more than changes.KEPT changes of
+    another department, first made through repository.py, which keeps
+    the index current, then by another program, which makes it stale
+    without a rebuild in the write; refresh_duplicates() rebuilds it.
+    """
+    other = repository.get("MECHANICS")
+    values = next(generator.rows("ELECTRONICS", 1, seed + 2))
+    other.add_rows(generator.rows("MECHANICS", changes.KEPT + 1, seed))
+    ms, _ = _ms(repo.add_row, *values)
+    report = {"write_ms": round(ms, 1),
+              "stale": repo.duplicates_of(*values).stale}
+    _foreign_rows(other.schema.table, changes.KEPT + 1)
+    ms, _ = _ms(repo.add_row, *values)
+    report.update(foreign_write_ms=round(ms, 1),
+                  foreign_stale=repo.duplicates_of(*values).stale)
+    ms, _ = _ms(repo.refresh_duplicates)
+    report.update(rebuild_ms=round(ms, 1),
+                  stale_after_rebuild=repo.duplicates_of(*values).stale)
+    return report
+
+
+def run(size, planted_count, seed):
+    rnd = random.Random(seed)
+    repo = repository.get("ELECTRONICS")
+    add_ms, _ = _ms(repo.add_rows, generator.rows("ELECTRONICS", size, seed))
+
+    planted = _planted(rnd, repo, size, planted_count)
+    description = repo.columns.index("Description")
+    part_no = repo.columns.index("PartNo")
+    latency, found = [], 0
+    for values, id in planted:
+        ms, matches = _ms(repo.duplicates_of, *values)
+        latency.append(ms)
+        # Found when the warning shows the item, or items as much alike
+        # (the generator repeats descriptions)
+        original = repo.search_row(id)
+        alike = 1.0 if duplicates.part_key(values[part_no]) == duplicates.part_key(
+            original[1 + part_no]) else duplicates.similarity(
+            values[description], duplicates.part_key(values[part_no]),
+            original[1 + description], original[1 + part_no])
+        found += any(row[0] == id or score >= alike for row, score, _ in matches)
+    # New items of another seed, mostly unlike any other
+    fresh, flagged = [], 0
+    for values in generator.rows("ELECTRONICS", planted_count, seed + 1):
+        ms, matches = _ms(repo.duplicates_of, *values)
+        fresh.append(ms)
+        flagged += bool(matches)
+
+    # The planted items are the last ones added
+    repo.add_rows(values for values, _ in planted)
+    report_ms, groups = _ms(repo.find_duplicates)
+    grouped = {row[0] for group in groups for row, _, _ in group}
+    reported = sum(id in grouped for id in range(size + 1, size + len(planted) + 1))
+    return {"rows": size, "add_ms": round(add_ms, 1),
+            "check_ms": _percentiles(latency), "check_new_ms": _percentiles(fresh),
+            "recall": round(found / len(planted), 3),
+            "new_items_flagged": flagged,
+            "report_ms": round(report_ms, 1), "groups": len(groups),
+            "report_recall": round(reported / len(planted), 3),
+            "after_pruning": pruned(repo, seed)}
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("-n", "--size", type=int, default=SIZE)
+    parser.add_argument("-p", "--planted", type=int, default=PLANTED)
+    parser.add_argument("-s", "--seed", type=int, default=1)
+    args = parser.parse_args()
+    with tempfile.TemporaryDirectory() as directory:
+        connection.configure(os.path.join(directory, "duplicates.db"))
+        migrations.migrate()
+        report = run(args.size, args.planted, args.seed)
+        cache.close()
+        connection.close()
+    print(json.dumps(report, indent=2))
+    failures = []
+    if report["check_ms"]["p50"] >= LIMIT_MS or report["check_new_ms"]["p50"] >= LIMIT_MS:
+        failures.append("the median check took {} ms or more".format(LIMIT_MS))
+    if report["recall"] < MIN_RECALL or report["report_recall"] < MIN_RECALL:
+        failures.append("fewer than {:.0%} of the duplicates were found".format(MIN_RECALL))
+    after = report["after_pruning"]
+    if max(after["write_ms"], after["foreign_write_ms"]) > WRITE_LIMIT_MS:
+        failures.append("a write after the change log was pruned took longer than {} ms"
+                        .format(WRITE_LIMIT_MS))
+    if after["stale"] or not after["foreign_stale"] or after["stale_after_rebuild"]:
+        failures.append("the index was not stale exactly after the foreign writes")
+    for failure in failures:
+        print(failure)
+    if failures:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,60 @@
+# ##################################################################
+# File name:    bench_export.py
+# Author:       agent
+# Create on:    2026-10-18
+# Description:  Time and peak Python memory of the streaming CSV export
+#               for growing table sizes
+# ##################################################################
+
+
+import argparse
+import os
+import tempfile
+import time
+import tracemalloc
+
+import connection
+import migrations
+import repository
+
+
+ELECTRONICS = repository.get("ELECTRONICS")
+
+
+ROW = ("CAP CER 1000PF 200V C0G/NP0 1812", "M3253507E1C102KZMBTR",
+       "Capacitors", "1812", "1000", "pF", "2", "50",
+       "±10% 200V Ceramic Capacitor C0G, NP0 1812 (4532 Metric)")
+
+
+def run(directory, sizes, compress):
+    inserted = 0
+    for size in sizes:
+        ELECTRONICS.add_rows([ROW] * (size - inserted))
+        inserted = size
+        path = os.path.join(directory, "export.csv" + (".gz" if compress else ""))
+
+        tracemalloc.start()
+        start = time.perf_counter()
+        count = ELECTRONICS.to_csv(path, progress=lambda done, total: None)
+        elapsed = time.perf_counter() - start
+        peak = tracemalloc.get_traced_memory()[1]
+        tracemalloc.stop()
+        print("{:>9} rows  {:>7.2f} s  peak {:>7.1f} MiB  file {:>7.1f} MiB".format(
+            count, elapsed, peak / 2**20, os.path.getsize(path) / 2**20))
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--sizes", type=int, nargs="+",
+                        default=[10000, 100000, 1000000])
+    parser.add_argument("--gzip", action="store_true")
+    args = parser.parse_args()
+    with tempfile.TemporaryDirectory() as directory:
+        connection.configure(os.path.join(directory, "export.db"))
+        migrations.migrate()
+        run(directory, sorted(args.sizes), args.gzip)
+        connection.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,102 @@
+# ##################################################################
+# File name:    bench_fulltext.py
+# Author:       agent
+# Create on:    2026-10-18
+# Description:  Latency of ranked full-text searches on a synthetic
+#               electronics table and of a full index rebuild
+# ##################################################################
+
+
+import argparse
+import os
+import random
+import statistics
+import tempfile
+import time
+
+import cache
+import connection
+import migrations
+import repository
+
+
+ELECTRONICS = repository.get("ELECTRONICS")
+
+
+PACKAGES = ("0201", "0402", "0603", "0805", "1206", "1210", "1812",
+            "SOT-23", "SOT-223", "SOIC-8", "TSSOP-16", "QFN-32", "DIP-8")
+PARTS = (("RES", "Resistors", ("Ω", "kΩ", "MΩ")),
+         ("CAP", "Capacitors", ("pF", "nF", "uF")),
+         ("INDUCTOR", "Inductors", ("nH", "uH")),
+         ("IC", "ICs", ("pcs",)),
+         ("MODULE", "Modules", ("pcs",)),
+         ("SCREW", "Misc", ("pcs",)))
+WORDS = ("THICK", "THIN", "FILM", "CER", "X7R", "C0G", "NP0", "X5R", "TANT",
+         "ALU", "SHIELDED", "POWER", "OPAMP", "LDO", "BUCK", "MCU", "ADC",
+         "DAC", "CAN", "RS485", "USB", "HEX", "SOCKET", "M2", "M3", "M4",
+         "M5", "STEEL", "NYLON", "AUTOMOTIVE", "PRECISION", "LOW", "NOISE",
+         "HIGH", "VOLTAGE", "CURRENT", "SENSE", "RAIL", "DUAL", "QUAD")
+MAKERS = ("RC", "RK73", "ERJ", "CRCW", "GRM", "CL10", "LQW", "LM", "TPS",
+          "STM32", "AD", "MAX", "SN74", "ISO")
+QUERIES = ("10k 0603", "M3 hex", "cap x7r 100n", "RC0603-1F",
+           "opamp soic", "inductor 4.7u", "res 1206 47", "stm32 qfn")
+SLOW_MS = 10.0
+
+
+def _rows(count, seed=1):
+    random.seed(seed)
+    for i in range(count):
+        description, category, units = random.choice(PARTS)
+        package = random.choice(PACKAGES)
+        words = " ".join(random.sample(WORDS, 3))
+        yield ("{} {} {}".format(description, words, package),
+               "{}{}-{:05X}".format(random.choice(MAKERS), package,
+                                    random.getrandbits(20)),
+               category, package,
+               str(random.choice((1, 2.2, 4.7, 10, 22, 47, 100))),
+               random.choice(units), "C{}".format(random.randint(1, 99)),
+               str(random.randint(0, 500)), "")
+
+
+def run(count, repeat):
+    start = time.perf_counter()
+    ELECTRONICS.add_rows(_rows(count))
+    print("inserted {} rows in {:.1f} s".format(
+        count, time.perf_counter() - start))
+
+    start = time.perf_counter()
+    ELECTRONICS.rebuild_fts()
+    print("rebuilt the index in {:.1f} s".format(time.perf_counter() - start))
+
+    slow = 0
+    for text in QUERIES:
+        samples = []
+        for _ in range(repeat):
+            cache.invalidate()
+            start = time.perf_counter()
+            rows = ELECTRONICS.search_text(text)
+            samples.append((time.perf_counter() - start) * 1e3)
+        median = statistics.median(samples)
+        slow += median > SLOW_MS
+        print("{:<14} {:>4} rows  median {:>7.2f} ms  max {:>7.2f} ms".format(
+            text, len(rows), median, max(samples)))
+    return slow
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("-n", "--count", type=int, default=500000,
+                        help="rows in the synthetic table")
+    parser.add_argument("-r", "--repeat", type=int, default=20)
+    args = parser.parse_args()
+    with tempfile.TemporaryDirectory() as directory:
+        connection.configure(os.path.join(directory, "fulltext.db"))
+        migrations.migrate()
+        slow = run(args.count, args.repeat)
+        connection.close()
+    if slow:
+        print("{} queries were slower than {} ms".format(slow, SLOW_MS))
+
+
+if __name__ == "__main__":
+    main()
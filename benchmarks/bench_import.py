@@ -0,0 +1,52 @@
+# ##################################################################
+# File name:    bench_import.py
+# Author:       agent
+# Create on:    2026-10-18
+# Description:  Time to import a synthetic CSV file into the
+#               electronics table
+# ##################################################################
+
+
+import argparse
+import csv
+import os
+import tempfile
+import time
+
+import connection
+import migrations
+import repository
+from benchmarks.bench_fulltext import _rows
+
+
+ELECTRONICS = repository.get("ELECTRONICS")
+
+
+def run(directory, count):
+    path = os.path.join(directory, "reels.csv")
+    with open(path, "w", newline="", encoding="utf-8") as f:
+        writer = csv.writer(f)
+        writer.writerow(ELECTRONICS.columns)
+        writer.writerows(_rows(count))
+
+    start = time.perf_counter()
+    result = ELECTRONICS.import_file(path)
+    elapsed = time.perf_counter() - start
+    print("{} in {:.2f} s ({:,.0f} rows/s)".format(
+        result.summary(), elapsed, result.imported / elapsed))
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("-n", "--count", type=int, default=100000)
+    args = parser.parse_args()
+    with tempfile.TemporaryDirectory() as directory:
+        connection.configure(os.path.join(directory, "import.db"))
+        migrations.migrate()
+        ELECTRONICS.add_rows(_rows(1000))
+        run(directory, args.count)
+        connection.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,90 @@
+# ##################################################################
+# File name:    bench_instrumentation.py
+# Author:       agent
+# Create on:    2026-10-18
+# Description:  Cost per call of the instrumentation decorators while
+#               recording is off, while it is on, and with cProfile
+# ##################################################################
+
+
+import argparse
+import os
+import sys
+import tempfile
+import time
+
+import cache
+import connection
+import instrumentation
+import migrations
+import repository
+from benchmarks.bench_fulltext import _rows
+
+
+ELECTRONICS = repository.get("ELECTRONICS")
+# Extra time per call allowed while recording is off
+LIMIT_NS = 1000
+
+
+def _empty():
+    return None
+
+
+def _per_call_ns(fn, calls):
+    best = None
+    for _ in range(5):
+        start = time.perf_counter()
+        for _ in range(calls):
+            fn()
+        elapsed = (time.perf_counter() - start) / calls * 1e9
+        best = elapsed if best is None else min(best, elapsed)
+    return best
+
+
+def run(count, calls):
+    ELECTRONICS.add_rows(_rows(count))
+    timed_empty = instrumentation.timed("empty")(_empty)
+    page = repository.Repository.page.__wrapped__
+    cases = (("empty function", _empty, timed_empty),
+             ("cached page", lambda: page(ELECTRONICS), ELECTRONICS.page),
+             ("row by rowid", lambda: ELECTRONICS.search_row.__wrapped__(ELECTRONICS, 7),
+              lambda: ELECTRONICS.search_row(7)))
+    slow = 0
+    print("{:<14} {:>10} {:>10} {:>10} {:>10}".format(
+        "ns per call", "plain", "off", "on", "cProfile"))
+    for name, plain, decorated in cases:
+        instrumentation.enable(False)
+        plain_ns = _per_call_ns(plain, calls)
+        off_ns = _per_call_ns(decorated, calls)
+        instrumentation.enable()
+        on_ns = _per_call_ns(decorated, calls)
+        instrumentation.profile()
+        profile_ns = _per_call_ns(decorated, max(1, calls // 10))
+        instrumentation.profile(False)
+        instrumentation.enable(False)
+        instrumentation.reset()
+        print("{:<14} {:>10.0f} {:>10.0f} {:>10.0f} {:>10.0f}".format(
+            name, plain_ns, off_ns, on_ns, profile_ns))
+        if off_ns - plain_ns > LIMIT_NS:
+            slow += 1
+    return slow
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("-n", "--count", type=int, default=10000)
+    parser.add_argument("-c", "--calls", type=int, default=20000)
+    args = parser.parse_args()
+    with tempfile.TemporaryDirectory() as directory:
+        connection.configure(os.path.join(directory, "instrumentation.db"))
+        migrations.migrate()
+        slow = run(args.count, args.calls)
+        cache.close()
+        connection.close()
+    if slow:
+        print("the disabled decorators cost more than {} ns per call".format(LIMIT_NS))
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,149 @@
+# ##################################################################
+# File name:    bench_ledger.py
+# Author:       agent
+# Create on:    2026-10-18
+# Description:  Stress test of the stock ledger: many threads check
+#               items in and out at once, then every Amount is checked
+#               against the ledger. For comparison the same load is run
+#               as read-modify-write updates of the whole row.
+# ##################################################################
+
+
+import argparse
+import os
+import random
+import sys
+import tempfile
+import threading
+import time
+
+import cache
+import connection
+import ledger
+import migrations
+import repository
+
+
+MECHANICS = repository.get("MECHANICS")
+START_AMOUNT = 100
+
+
+def _workload(seed, operations, items):
+    # (item id, signed quantity); checking out slightly more than in so
+    # some check-outs meet an empty shelf
+    rnd = random.Random(seed)
+    return [(rnd.randint(1, items), rnd.choice((-3, -2, -1, 1, 2)))
+            for _ in range(operations)]
+
+
+def _ledger_worker(moves, batch, results):
+    # Appends (movements applied, rejected, net quantity applied)
+    applied = rejected = net = 0
+    for i in range(0, len(moves), batch):
+        chunk = moves[i:i + batch]
+        try:
+            ledger.move("MECHANICS", chunk, note="stress")
+            applied += len(chunk)
+            net += sum(quantity for _, quantity in chunk)
+        except ledger.InsufficientStock:
+            rejected += len(chunk)
+    results.append((applied, rejected, net))
+
+
+def _overwrite_worker(moves, batch, results):
+    # The form path before the ledger: read the row, write its Amount back
+    applied = rejected = net = 0
+    for item_id, quantity in moves:
+        row = MECHANICS.search_row(item_id)
+        amount = row[5] + quantity
+        if amount < 0:
+            rejected += 1
+            continue
+        with cache.invalidating("mechanics") as c:
+            c.execute("UPDATE mechanics SET Amount=? WHERE rowid=?", (amount, item_id))
+        applied += 1
+        net += quantity
+    results.append((applied, rejected, net))
+
+
+def _reset(items):
+    with cache.invalidating("mechanics") as c:
+        c.execute("DELETE FROM mechanics")
+        c.execute("DELETE FROM movements")
+    MECHANICS.add_rows(("bolt {}".format(i), "B{}".format(i), "Tools", "A1",
+                        str(START_AMOUNT), "") for i in range(items))
+
+
+def _check(items):
+    # Every Amount must equal its start plus the ledger, and never be
+    # negative; the last ledger balance must equal the Amount
+    failures = 0
+    with connection.connection() as conn:
+        for item_id, amount, total, balance in conn.execute(
+                """SELECT m.rowid, m.Amount, IFNULL(sum(l.Quantity), 0),
+                          (SELECT Balance FROM movements
+                           WHERE TableName='mechanics' AND ItemId=m.rowid
+                           ORDER BY Id DESC LIMIT 1)
+                   FROM mechanics m LEFT JOIN movements l
+                       ON l.TableName='mechanics' AND l.ItemId=m.rowid
+                   GROUP BY m.rowid"""):
+            if (amount != START_AMOUNT + total or amount < 0
+                    or (balance is not None and balance != amount)):
+                failures += 1
+    return failures
+
+
+def run(worker, threads, operations, items, batch):
+    _reset(items)
+    workloads = [_workload(seed, operations, items) for seed in range(threads)]
+    results = []
+    pool = [threading.Thread(target=worker, args=(moves, batch, results))
+            for moves in workloads]
+    start = time.perf_counter()
+    for thread in pool:
+        thread.start()
+    for thread in pool:
+        thread.join()
+    elapsed = time.perf_counter() - start
+
+    applied, rejected, net = (sum(column) for column in zip(*results))
+    with connection.connection() as conn:
+        on_hand = conn.execute("SELECT sum(Amount) FROM mechanics").fetchone()[0]
+    # Movements reported as done whose effect was overwritten
+    lost = items * START_AMOUNT + net - on_hand
+    return elapsed, applied, rejected, lost
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("-t", "--threads", type=int, default=16)
+    parser.add_argument("-n", "--operations", type=int, default=500,
+                        help="movements per thread")
+    parser.add_argument("-i", "--items", type=int, default=20)
+    parser.add_argument("-b", "--batch", type=int, default=1,
+                        help="movements committed together")
+    args = parser.parse_args()
+    failures = 0
+    with tempfile.TemporaryDirectory() as directory:
+        connection.configure(os.path.join(directory, "ledger.db"))
+        migrations.migrate()
+        for name, worker in (("ledger", _ledger_worker),
+                             ("overwrite", _overwrite_worker)):
+            elapsed, applied, rejected, lost = run(
+                worker, args.threads, args.operations, args.items, args.batch)
+            print("{:<10} {} threads: {:>6} applied {:>5} rejected in {:.2f} s "
+                  "({:.0f} movements/s), stock off by {}".format(
+                      name, args.threads, applied, rejected, elapsed,
+                      (applied + rejected) / elapsed, lost))
+            if worker is _ledger_worker:
+                mismatched = _check(args.items)
+                print("           {} items disagree with the ledger".format(mismatched))
+                failures += mismatched + (lost != 0)
+        cache.close()
+        connection.close()
+    if failures:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
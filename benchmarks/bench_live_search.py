@@ -0,0 +1,155 @@
+# ##################################################################
+# File name:    bench_live_search.py
+# Author:       agent
+# Create on:    2026-10-18
+# Description:  Replays recorded typing sessions through LiveSearch on
+#               a large table and reports the keystroke-to-results
+#               latency, queries run, cache hits and coalesced queries
+# ##################################################################
+
+
+import argparse
+import json
+import os
+import statistics
+import sys
+import tempfile
+import time
+
+from PyQt5 import QtCore
+
+import cache
+import connection
+import live_search
+import migrations
+import repository
+from benchmarks.bench_fulltext import _rows
+from worker import DatabaseExecutor
+
+
+SESSIONS = os.path.join(os.path.dirname(os.path.abspath(__file__)),
+                        "typing_sessions.json")
+# Query latency (from the moment the query starts), and latency from a
+# keystroke to its results, that count as slow
+SLOW_MS = 50.0
+# The sessions are also typed this many times faster, so that keystrokes
+# arrive while a query runs and identical queries are coalesced
+FAST = 50
+
+
+class Replay(QtCore.QObject):
+    """
+    Types the events of one session ([milliseconds, text] pairs) into a
+    LiveSearch and records, for every text that got results, the time
+    from its keystroke to the results.
+    """
+
+    def __init__(self, search, events):
+        super(Replay, self).__init__()
+        self.search = search
+        self.events = events
+        self.typed = {}             # text -> time of its last keystroke
+        self.latencies = []
+        self.loop = QtCore.QEventLoop()
+        search.results.connect(self._results)
+
+    def _type(self, text):
+        self.typed[text] = time.perf_counter()
+        self.search.set_text(text)
+
+    def _results(self, text, rows):
+        if text in self.typed:
+            self.latencies.append((time.perf_counter() - self.typed[text]) * 1e3)
+
+    def run(self, debounce, speed=1):
+        for at, text in self.events:
+            QtCore.QTimer.singleShot(int(at / speed), lambda text=text: self._type(text))
+        QtCore.QTimer.singleShot(int(self.events[-1][0] / speed) + debounce + 1000,
+                                 self.loop.quit)
+        self.loop.exec_()
+        return self.latencies
+
+
+def _query_times(texts, repeat=3):
+    # Query latency alone, without debounce or cache
+    samples = []
+    for text in texts:
+        for _ in range(repeat):
+            cache.invalidate()
+            start = time.perf_counter()
+            repository.get("ELECTRONICS").search_text(text)
+            samples.append((time.perf_counter() - start) * 1e3)
+    return samples
+
+
+def run(sessions, debounce, speed=1):
+    executor = DatabaseExecutor()
+    electronics = repository.get("ELECTRONICS")
+    total = {"keystrokes": 0, "queries": 0, "cache_hits": 0, "coalesced": 0}
+    latencies = []
+    for session in sessions:
+        cache.invalidate()
+        search = live_search.LiveSearch(executor, lambda: electronics, debounce=debounce)
+        latencies.extend(Replay(search, session["events"]).run(debounce, speed))
+        executor.wait()
+        total["keystrokes"] += len(session["events"])
+        total["queries"] += search.queries
+        total["cache_hits"] += search.cache_hits
+        total["coalesced"] += search.coalesced
+        print("{:<32} {:>4} keystrokes {:>4} queries {:>4} cache hits {:>3} coalesced".format(
+            session["name"], len(session["events"]), search.queries,
+            search.cache_hits, search.coalesced))
+
+    queries = _query_times(sorted({text for session in sessions
+                                   for _, text in session["events"] if text.strip()}))
+    latencies.sort()
+    queries.sort()
+    report = dict(total,
+                  debounce_ms=debounce,
+                  speed=speed,
+                  results_median_ms=round(statistics.median(latencies), 2),
+                  results_p95_ms=round(latencies[int(len(latencies) * 0.95) - 1], 2),
+                  query_median_ms=round(statistics.median(queries), 2),
+                  query_p95_ms=round(queries[int(len(queries) * 0.95) - 1], 2),
+                  query_max_ms=round(queries[-1], 2))
+    print(json.dumps(report, indent=2))
+    return report
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("-n", "--count", type=int, default=200000)
+    parser.add_argument("--sessions", default=SESSIONS,
+                        help="JSON file of recorded typing sessions")
+    parser.add_argument("--debounce", type=int, default=None,
+                        help="milliseconds, default live_search.DEBOUNCE_MS")
+    args = parser.parse_args()
+    debounce = live_search.DEBOUNCE_MS if args.debounce is None else args.debounce
+    with open(args.sessions, encoding="utf-8") as f:
+        sessions = json.load(f)["sessions"]
+
+    app = QtCore.QCoreApplication(sys.argv)
+    with tempfile.TemporaryDirectory() as directory:
+        connection.configure(os.path.join(directory, "live.db"))
+        migrations.migrate()
+        repository.get("ELECTRONICS").add_rows(_rows(args.count))
+        report = run(sessions, debounce)
+        fast = run(sessions, debounce, FAST)
+        cache.close()
+        connection.close()
+    del app
+    failures = []
+    if report["query_p95_ms"] > SLOW_MS:
+        failures.append("95th percentile query latency above {} ms".format(SLOW_MS))
+    if report["results_p95_ms"] > SLOW_MS:
+        failures.append("95th percentile keystroke to results above {} ms".format(SLOW_MS))
+    if not fast["coalesced"]:
+        failures.append("no query was coalesced typing {} times faster".format(FAST))
+    for failure in failures:
+        print(failure)
+    if failures:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
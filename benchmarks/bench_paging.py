@@ -0,0 +1,77 @@
+# ##################################################################
+# File name:    bench_paging.py
+# Author:       agent
+# Create on:    2026-10-18
+# Description:  Time to fetch one page of the grid near the start and
+#               near the end of a large table, with keyset pagination
+#               and with LIMIT/OFFSET for comparison
+# ##################################################################
+
+
+import argparse
+import os
+import tempfile
+import time
+
+import cache
+import connection
+import migrations
+import repository
+from benchmarks.bench_fulltext import _rows
+
+
+ELECTRONICS = repository.get("ELECTRONICS")
+
+# Stored columns the grid is sorted by (None = item id)
+SORTS = (None, "Amount", "ValueSI", "PartNo")
+
+
+def _keyset(sort, position, size):
+    # Walk to the page at position once, then time fetching it
+    after = None
+    if position:
+        with connection.connection() as conn:
+            order = "rowid" if sort is None else "{0}, rowid".format(sort)
+            row = conn.execute(ELECTRONICS._select + " ORDER BY {} LIMIT 1 OFFSET ?"
+                               .format(order), (position - 1,)).fetchone()
+        after = ELECTRONICS.sort_key(row, sort)
+    cache.invalidate()
+    start = time.perf_counter()
+    rows = ELECTRONICS.page(sort=sort, after=after, limit=size)
+    return (time.perf_counter() - start) * 1e3, len(rows)
+
+
+def _offset(sort, position, size):
+    order = "rowid" if sort is None else "{0}, rowid".format(sort)
+    with connection.connection() as conn:
+        start = time.perf_counter()
+        rows = conn.execute(ELECTRONICS._select + " ORDER BY {} LIMIT ? OFFSET ?"
+                            .format(order), (size, position)).fetchall()
+        return (time.perf_counter() - start) * 1e3, len(rows)
+
+
+def run(count, size):
+    ELECTRONICS.add_rows(_rows(count))
+    for sort in SORTS:
+        for position in (0, count // 2, count - size):
+            keyset_ms, rows = _keyset(sort, position, size)
+            offset_ms, _ = _offset(sort, position, size)
+            print("{:<8} row {:>8}  {:>5} rows  keyset {:>8.2f} ms  offset {:>8.2f} ms".format(
+                sort or "rowid", position, rows, keyset_ms, offset_ms))
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("-n", "--count", type=int, default=200000)
+    parser.add_argument("-s", "--size", type=int, default=repository.PAGE_SIZE)
+    args = parser.parse_args()
+    with tempfile.TemporaryDirectory() as directory:
+        connection.configure(os.path.join(directory, "paging.db"))
+        migrations.migrate()
+        run(args.count, args.size)
+        cache.close()
+        connection.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,138 @@
+# ##################################################################
+# File name:    bench_search.py
+# Author:       agent
+# Create on:    2026-10-18
+# Description:  Checks with EXPLAIN QUERY PLAN that searches on the
+#               indexed columns use their index and times them, also
+#               for the filters the entry window builds
+# ##################################################################
+
+
+import argparse
+import os
+import random
+import sys
+import tempfile
+import time
+
+import connection
+import migrations
+import quantities
+import query
+import repository
+
+
+ELECTRONICS = repository.get("ELECTRONICS")
+
+
+CATEGORIES = ("Resistors", "Capacitors", "Inductors", "ICs", "Modules",
+              "Motors", "Batteries", "Misc")
+
+# (description of the search, filters, match)
+SEARCHES = (
+    ("PartNo =", (("PartNo", "P00001234"),), query.MATCH_ANY),
+    ("PartNo prefix", (("PartNo", "P000012*"),), query.MATCH_ANY),
+    ("Description prefix", (("Description", "part 12*"),), query.MATCH_ANY),
+    ("Cabinet range", (("Cabinet", "C10..C12"),), query.MATCH_ANY),
+    ("Category AND Cabinet", (("Category", "ICs"), ("Cabinet", "C42")),
+     query.MATCH_ALL),
+    ("PartNo OR Cabinet", (("PartNo", "P00000042"), ("Cabinet", "C42")),
+     query.MATCH_ANY),
+    ("Amount range", (("Amount", "10..20"),), query.MATCH_ANY),
+    ("Category AND Value", (("Category", "Resistors"), ("Value", "1k..10k")),
+     query.MATCH_ALL),
+)
+
+# (description, {field: text typed}, {combo box: choice made}, match) of
+# searches made in the entry window, see EntryWindow.search_values
+GUI_SEARCHES = (
+    ("GUI PartNo prefix", {"PartNo": "P000012*"}, {}, query.MATCH_ANY),
+    ("GUI PartNo OR Cabinet", {"PartNo": "P00000042", "Cabinet": "C42"}, {},
+     query.MATCH_ANY),
+    ("GUI Category AND Value", {"Value": "1k..10k"}, {"Category": "Resistors"},
+     query.MATCH_ALL),
+)
+
+# Value filters are compared in SI units, as in Repository.search_rows
+NUMERIC = {"Value": ("ValueSI", lambda text: quantities.parse_quantity(text, "Ω"))}
+
+
+def _fill(count, seed=1):
+    random.seed(seed)
+    rows = [("part {}".format(i), "P{:08d}".format(i),
+             random.choice(CATEGORIES), "0603", str(random.randint(1, 999)),
+             random.choice(("Ω", "kΩ")), "C{}".format(random.randint(1, 99)),
+             str(random.randint(0, 500)), "") for i in range(count)]
+    ELECTRONICS.add_rows(rows)
+
+
+def _gui_filters():
+    # (description, WHERE clause, params) built by the entry window off
+    # screen from the fields set as a user would
+    os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+    from PyQt5.QtWidgets import QApplication
+    import application
+    app = QApplication.instance() or QApplication(sys.argv[:1])
+    filters = []
+    for name, typed, chosen, match in GUI_SEARCHES:
+        window = application.EntryWindow()
+        fields = window.fields["ELECTRONICS"]
+        for column, choice in chosen.items():
+            fields[column].setCurrentText(choice)
+            fields[column].activated.emit(fields[column].currentIndex())
+        for column, text in typed.items():
+            fields[column].setText(text)
+        where, params = ELECTRONICS.search_filter(
+            *window.search_values("ELECTRONICS"), match=match)
+        filters.append((name, where, params))
+    app.processEvents()
+    return filters
+
+
+def _searches():
+    # (description, statement, params) of every search
+    for name, filters, match in SEARCHES:
+        sql, params = query.build_search("electronics", filters, match,
+                                         numeric=NUMERIC)
+        yield name, sql, params
+    for name, where, params in _gui_filters():
+        yield name, "SELECT rowid, * FROM electronics WHERE " + where, params
+
+
+def run(count):
+    failures = 0
+    with connection.connection() as conn:
+        for name, sql, params in _searches():
+            plan = query.explain(conn, sql, params)
+            uses_index = all("USING INDEX" in step or "MULTI-INDEX" in step
+                             or step.startswith("INDEX ") for step in plan)
+            if not uses_index:
+                failures += 1
+
+            start = time.perf_counter()
+            rows = conn.execute(sql, params).fetchall()
+            elapsed = (time.perf_counter() - start) * 1e3
+            print("{:<22} {:>7} rows {:>9.2f} ms  {}  {}".format(
+                name, len(rows), elapsed, "ok  " if uses_index else "SCAN",
+                " | ".join(plan)))
+    return failures
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("-n", "--count", type=int, default=100000,
+                        help="rows in the synthetic table")
+    args = parser.parse_args()
+    with tempfile.TemporaryDirectory() as directory:
+        connection.configure(os.path.join(directory, "search.db"))
+        migrations.migrate()
+        _fill(args.count)
+        failures = run(args.count)
+        connection.close()
+    if failures:
+        print("{} searches did not use an index".format(failures))
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
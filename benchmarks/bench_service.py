@@ -0,0 +1,135 @@
+# ##################################################################
+# File name:    bench_service.py
+# Author:       agent
+# Create on:    2026-10-18
+# Description:  Load test of the inventory service (server.py) on this
+#               computer: client processes send a mix of page, item,
+#               search, conditional, stock movement and update requests;
+#               prints requests per second and latency percentiles as JSON
+# ##################################################################
+
+
+import argparse
+import json
+import multiprocessing
+import os
+import random
+import subprocess
+import sys
+import tempfile
+import time
+
+import cache
+import connection
+import migrations
+import remote
+import repository
+from benchmarks.bench_concurrency import _percentiles
+from benchmarks import generator
+
+
+REPO_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+# (operation, weight)
+MIX = (("page", 35), ("item", 25), ("search", 10), ("conditional", 15),
+       ("movement", 10), ("update", 5))
+
+
+def _operation(name, backend, repo, items, rnd):
+    if name == "page":
+        backend.client._cached.clear()
+        repo.page(after=(None, rnd.randint(0, items)), limit=100)
+    elif name == "item":
+        backend.client._cached.clear()
+        repo.search_row(rnd.randint(1, items))
+    elif name == "search":
+        repo.search_text(rnd.choice(("screw m3", "filament pla", "tool", "hex steel")))
+    elif name == "conditional":
+        # The same page again: 304 unless someone wrote in between
+        repo.page(limit=100)
+    elif name == "movement":
+        try:
+            backend.move("MECHANICS", [(rnd.randint(1, items), rnd.choice((-1, 1)))])
+        except ValueError:
+            pass        # nothing left to check out
+    else:
+        id = rnd.randint(1, items)
+        row = repo.search_row(id)
+        repo.update_row(id, *repo.values(*row[1:1 + len(repo.columns)],
+                                         Cabinet="L{}".format(rnd.randint(1, 9))))
+
+
+def _worker(url, seconds, items, seed):
+    rnd = random.Random(seed)
+    backend = remote.ServiceBackend(url)
+    repo = backend.repository("MECHANICS")
+    names = [name for name, weight in MIX for _ in range(weight)]
+    latency = {name: [] for name, _ in MIX}
+    errors = 0
+    deadline = time.time() + seconds
+    while time.time() < deadline:
+        name = rnd.choice(names)
+        start = time.perf_counter()
+        try:
+            _operation(name, backend, repo, items, rnd)
+        except Exception:
+            errors += 1
+            continue
+        latency[name].append((time.perf_counter() - start) * 1e3)
+    backend.close()
+    return latency, errors, backend.client.not_modified
+
+
+def run(url, clients, seconds, items):
+    with multiprocessing.Pool(clients) as pool:
+        results = pool.starmap(_worker, [(url, seconds, items, seed)
+                                         for seed in range(clients)])
+    everything = [value for latency, _, _ in results
+                  for values in latency.values() for value in values]
+    report = {"clients": clients, "seconds": seconds, "items": items,
+              "requests": len(everything),
+              "per_second": round(len(everything) / seconds, 1),
+              "latency_ms": _percentiles(everything),
+              "errors": sum(errors for _, errors, _ in results),
+              "not_modified": sum(count for _, _, count in results),
+              "operations": {}}
+    for name, _ in MIX:
+        values = [value for latency, _, _ in results for value in latency[name]]
+        report["operations"][name] = {"requests": len(values),
+                                      "latency_ms": _percentiles(values)}
+    return report
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("-c", "--clients", type=int, default=8)
+    parser.add_argument("-s", "--seconds", type=float, default=10)
+    parser.add_argument("-n", "--items", type=int, default=100000)
+    parser.add_argument("--readers", type=int, default=connection.POOL_SIZE)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, "service.db")
+        connection.configure(path)
+        migrations.migrate()
+        repository.get("MECHANICS").add_rows(generator.rows("MECHANICS", args.items))
+        cache.close()
+        connection.close()
+
+        server = subprocess.Popen([sys.executable, os.path.join(REPO_DIR, "server.py"),
+                                   "--db", path, "--port", "0",
+                                   "--readers", str(args.readers)],
+                                  stdout=subprocess.PIPE, universal_newlines=True)
+        try:
+            url = server.stdout.readline().split()[-1]
+            report = run(url, args.clients, args.seconds, args.items)
+        finally:
+            server.terminate()
+            server.wait()
+    report["readers"] = args.readers
+    print(json.dumps(report, indent=2))
+    if report["errors"]:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
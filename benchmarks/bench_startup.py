@@ -0,0 +1,93 @@
+# ##################################################################
+# File name:    bench_startup.py
+# Author:       agent
+# Create on:    2026-10-18
+# Description:  Application start-up time: module import times from
+#               python -X importtime and the time until the main
+#               window is first painted. Prints one JSON object so
+#               runs can be tracked over time.
+# ##################################################################
+
+
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+
+
+REPO_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Runs in a fresh interpreter; prints seconds from process start (as
+# close as Python gets to it) until the first paint of the main window
+FIRST_PAINT = """
+import time
+start = time.perf_counter()
+import sys
+from PyQt5 import QtCore
+from PyQt5.QtWidgets import QApplication
+import application
+
+app = QApplication(sys.argv)
+
+class FirstPaint(QtCore.QObject):
+    def eventFilter(self, obj, event):
+        if event.type() == QtCore.QEvent.Paint:
+            print(time.perf_counter() - start)
+            app.exit()
+        return False
+
+window = application.MainWindow()
+watcher = FirstPaint()
+window.installEventFilter(watcher)
+window.show()
+app.exec_()
+"""
+
+
+def _python(args, env=None):
+    return subprocess.run([sys.executable] + args, cwd=REPO_DIR, env=env,
+                          stdout=subprocess.PIPE, stderr=subprocess.PIPE,
+                          universal_newlines=True, check=True)
+
+
+def import_times(module="application", top=10):
+    # Each stderr line: "import time: self [us] | cumulative | name"
+    result = _python(["-X", "importtime", "-c", "import " + module])
+    modules = []
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+        own, cumulative, name = line[len("import time:"):].split("|")
+        modules.append((name.strip(), int(own), int(cumulative)))
+    total = sum(own for _, own, _ in modules)
+    slowest = sorted(modules, key=lambda module: -module[2])[:top]
+    return total, [{"module": name, "self_us": own, "cumulative_us": cumulative}
+                   for name, own, cumulative in slowest]
+
+
+def first_paint(repeat):
+    env = dict(os.environ)
+    env.setdefault("QT_QPA_PLATFORM", "offscreen")
+    samples = [float(_python(["-c", FIRST_PAINT], env).stdout.split()[-1])
+               for _ in range(repeat)]
+    return statistics.median(samples)
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("-r", "--repeat", type=int, default=5)
+    args = parser.parse_args()
+    total, slowest = import_times()
+    report = {
+        "python": sys.version.split()[0],
+        "import_total_ms": round(total / 1000, 1),
+        "first_paint_ms": round(first_paint(args.repeat) * 1000, 1),
+        "slowest_imports": slowest,
+    }
+    print(json.dumps(report, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,237 @@
+# ##################################################################
+# File name:    bench_suite.py
+# Author:       agent
+# Create on:    2026-10-18
+# Description:  The whole backend and the grid on generated inventories
+#               of several sizes: insert, bulk insert, search, update,
+#               delete, export and filling the grid (display() of the
+#               main window, run off screen). Prints one JSON report so
+#               runs can be compared over time, see --compare.
+# ##################################################################
+
+
+import argparse
+import json
+import os
+import platform
+import random
+import sqlite3
+import statistics
+import sys
+import tempfile
+import time
+
+import cache
+import connection
+import migrations
+import repository
+import schemas
+from benchmarks import generator
+
+
+SIZES = (1000, 10000, 100000)
+# Single-row inserts, updates and deletes timed per run
+OPERATIONS = 200
+# Fraction of the table changed by the bulk update and bulk delete
+BULK_FRACTION = 0.1
+SEARCH_TEXTS = ("res 0603", "cap x7r", "screw m3", "ic soic")
+# An operation this much slower than in the --compare report is listed
+SLOWER = 1.25
+
+
+def _stats(samples, rows=None):
+    # samples in seconds, one per call
+    ms = sorted(sample * 1e3 for sample in samples)
+    result = {"calls": len(ms), "total_ms": round(sum(ms), 3),
+              "mean_ms": round(statistics.mean(ms), 3),
+              "p50_ms": round(ms[len(ms) // 2], 3),
+              "p95_ms": round(ms[min(len(ms) - 1, int(len(ms) * 0.95))], 3),
+              "max_ms": round(ms[-1], 3)}
+    if rows is not None:
+        result["rows"] = rows
+        result["rows_per_s"] = round(rows / sum(samples)) if sum(samples) else None
+    return result
+
+
+def _time(fn, *args, **kwargs):
+    start = time.perf_counter()
+    result = fn(*args, **kwargs)
+    return time.perf_counter() - start, result
+
+
+class Display:
+    # The main window off screen, for timing display() with real widgets
+    def __init__(self):
+        os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+        from PyQt5.QtWidgets import QApplication
+        import application
+        self.app = QApplication.instance() or QApplication(sys.argv)
+        self.window = application.MainWindow()
+        self.window.show()
+        self.app.processEvents()
+
+    def run(self, key, rows):
+        # Seconds until the rows are in the grid and painted
+        window = self.window
+        schema = schemas.SCHEMAS[key]
+        window.key = key
+        window.table_model.set_headers(schema.headers(), schema.sort_columns())
+        window.result = rows
+        start = time.perf_counter()
+        window.display()
+        self.app.processEvents()
+        return time.perf_counter() - start
+
+    def close(self):
+        self.window.executor.wait()
+        self.window.close()
+
+
+def _search(repo, key, rnd):
+    categories = generator._choices(schemas.SCHEMAS[key], "Category")
+    results = {}
+    samples, found = [], 0
+    for category in categories:
+        cache.invalidate()
+        seconds, rows = _time(repo.search_rows, Category=category)
+        samples.append(seconds)
+        found += len(rows)
+    results["search category"] = _stats(samples, found)
+    samples, found = [], 0
+    for text in SEARCH_TEXTS:
+        cache.invalidate()
+        seconds, rows = _time(repo.search_text, text)
+        samples.append(seconds)
+        found += len(rows)
+    results["search text"] = _stats(samples, found)
+    samples, found = [], 0
+    for _ in range(20):
+        cache.invalidate()
+        after = (None, rnd.randint(0, repo.count()))
+        seconds, rows = _time(repo.page, after=after)
+        samples.append(seconds)
+        found += len(rows)
+    results["page"] = _stats(samples, found)
+    return results
+
+
+def run(key, count, seed, operations, display, directory):
+    # A fresh database holding count generated rows of key
+    path = os.path.join(directory, "{}_{}.db".format(key.lower(), count))
+    connection.configure(path)
+    migrations.migrate()
+    repo = repository.get(key)
+    rnd = random.Random(seed)
+    results = {}
+
+    seconds, _ = _time(repo.add_rows, generator.rows(key, count, seed))
+    results["bulk insert"] = _stats([seconds], count)
+
+    samples = [_time(repo.add_row, *row)[0]
+               for row in generator.rows(key, operations, seed + 1)]
+    results["insert"] = _stats(samples, operations)
+    total = count + operations
+
+    results.update(_search(repo, key, rnd))
+
+    ids = rnd.sample(range(1, total + 1), operations)
+    samples = []
+    for id in ids:
+        row = repo.search_row(id)
+        values = repo.values(*row[1:1 + len(repo.columns)], Cabinet="Z1")
+        samples.append(_time(repo.update_row, id, *values)[0])
+    results["update"] = _stats(samples, operations)
+
+    bulk_ids = rnd.sample(range(1, total + 1), int(total * BULK_FRACTION))
+    seconds, rows = _time(repo.update_rows, bulk_ids, Cabinet="Z2")
+    results["bulk update"] = _stats([seconds], len(rows))
+
+    csv_path = os.path.join(directory, "export.csv")
+    seconds, exported = _time(repo.to_csv, csv_path)
+    results["export"] = _stats([seconds], exported)
+    os.remove(csv_path)
+
+    if display is not None:
+        cache.invalidate()
+        seconds, rows = _time(repo.show_table)
+        results["load table"] = _stats([seconds], len(rows))
+        results["display table"] = _stats([display.run(key, rows)], len(rows))
+        rows = repo.page()
+        results["display page"] = _stats([display.run(key, rows) for _ in range(5)],
+                                         len(rows) * 5)
+        display.run(key, [])
+
+    samples = [_time(repo.delete_row, id)[0] for id in ids]
+    results["delete"] = _stats(samples, operations)
+    remaining = [id for id in bulk_ids if id not in set(ids)]
+    seconds, removed = _time(repo.delete_rows, remaining)
+    results["bulk delete"] = _stats([seconds], len(removed))
+
+    cache.close()
+    connection.close()
+    os.remove(path)
+    return [dict(department=key, table_rows=count, operation=operation, **values)
+            for operation, values in results.items()]
+
+
+def compare(report, baseline):
+    # Lines for the operations slower than in baseline by SLOWER or more
+    before = {(entry["department"], entry["table_rows"], entry["operation"]): entry
+              for entry in baseline["results"]}
+    lines = []
+    for entry in report["results"]:
+        old = before.get((entry["department"], entry["table_rows"], entry["operation"]))
+        if old and old["mean_ms"] and entry["mean_ms"] / old["mean_ms"] >= SLOWER:
+            lines.append("{department} {table_rows} rows, {operation}: {old:.3f} ms -> "
+                         "{new:.3f} ms".format(old=old["mean_ms"], new=entry["mean_ms"],
+                                               **entry))
+    return lines
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--sizes", type=int, nargs="+", default=list(SIZES),
+                        help="rows per table, e.g. 1000 10000 100000 1000000")
+    parser.add_argument("--departments", nargs="+", default=sorted(generator.GENERATORS),
+                        choices=sorted(generator.GENERATORS))
+    parser.add_argument("-s", "--seed", type=int, default=1)
+    parser.add_argument("--operations", type=int, default=OPERATIONS,
+                        help="single-row inserts, updates and deletes")
+    parser.add_argument("--no-display", action="store_true",
+                        help="skip the grid, e.g. where PyQt5 is not installed")
+    parser.add_argument("-o", "--output", help="write the JSON report to this file")
+    parser.add_argument("--compare", help="a report of an earlier run; slower "
+                        "operations are listed and the exit status is 1")
+    parser.add_argument("--dir", help="folder of the databases")
+    args = parser.parse_args()
+
+    report = {"python": sys.version.split()[0], "sqlite": sqlite3.sqlite_version,
+              "platform": platform.platform(),
+              "time": time.strftime("%Y-%m-%dT%H:%M:%S"), "seed": args.seed,
+              "operations": args.operations, "results": []}
+    display = None if args.no_display else Display()
+    with tempfile.TemporaryDirectory(dir=args.dir) as directory:
+        for count in args.sizes:
+            for key in args.departments:
+                report["results"].extend(run(key, count, args.seed, args.operations,
+                                             display, directory))
+    if display is not None:
+        display.close()
+
+    text = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            f.write(text)
+    else:
+        print(text)
+    if args.compare:
+        with open(args.compare, encoding="utf-8") as f:
+            slower = compare(report, json.load(f))
+        for line in slower:
+            print(line, file=sys.stderr)
+        if slower:
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,130 @@
+# ##################################################################
+# File name:    generator.py
+# Author:       agent
+# Create on:    2026-10-18
+# Description:  Seeded synthetic electronics and mechanics inventories
+#               for the benchmarks: the same seed and count always give
+#               the same rows. Categories and units are those of the
+#               entry form (schemas.py, quantities.py).
+# ##################################################################
+
+
+import argparse
+import csv
+import random
+import sys
+
+import quantities
+import schemas
+
+
+# Per category: description words, packages and values; categories
+# without an entry use DEFAULT_PARTS
+ELECTRONICS_PARTS = {
+    "Resistors": (("RES", "THICK FILM", "THIN FILM", "PRECISION", "1%", "5%", "SENSE"),
+                  ("0402", "0603", "0805", "1206", "2512", "AXIAL"),
+                  ("1", "2.2", "4.7", "10", "22", "47", "100", "220", "470")),
+    "Capacitors": (("CAP", "CER", "X7R", "X5R", "C0G", "TANT", "ALU", "16V", "50V"),
+                   ("0402", "0603", "0805", "1206", "RADIAL"),
+                   ("1", "2.2", "4.7", "10", "22", "47", "100", "470")),
+    "Inductors": (("INDUCTOR", "SHIELDED", "POWER", "FERRITE", "CHOKE"),
+                  ("0603", "1210", "SMD-4x4", "SMD-6x6"),
+                  ("1", "2.2", "4.7", "10", "22", "47", "100")),
+    "ICs": (("IC", "OPAMP", "LDO", "BUCK", "MCU", "ADC", "DAC", "CAN", "RS485", "USB"),
+            ("SOT-23", "SOIC-8", "TSSOP-16", "QFN-32", "LQFP-64", "DIP-8"), ("",)),
+    "Modules": (("MODULE", "WIFI", "BLUETOOTH", "GPS", "DC-DC", "RELAY", "DISPLAY"),
+                ("MODULE",), ("",)),
+    "Motors": (("MOTOR", "STEPPER", "DC", "SERVO", "GEARED", "BRUSHLESS"),
+               ("NEMA17", "NEMA23", "28BYJ", "130"), ("",)),
+    "Batteries": (("BATTERY", "LI-ION", "LIPO", "NIMH", "COIN", "RECHARGEABLE"),
+                  ("18650", "CR2032", "AA", "AAA", "9V"), ("",)),
+}
+MECHANICS_PARTS = {
+    "Screws and screw headers": (("SCREW", "HEX", "SOCKET", "PAN", "COUNTERSUNK", "STEEL",
+                                  "STAINLESS", "NYLON", "M2", "M2.5", "M3", "M4", "M5"),),
+    "3D printing filament": (("FILAMENT", "PLA", "PETG", "ABS", "TPU", "1.75MM", "BLACK",
+                              "WHITE", "RED", "1KG"),),
+    "Tools": (("TOOL", "SCREWDRIVER", "PLIERS", "WRENCH", "TWEEZERS", "CUTTER",
+               "CALIPER", "SOLDERING"),),
+}
+DEFAULT_PARTS = (("PART", "KIT", "SPARE", "ASSORTED", "SET", "SMALL", "LARGE"),
+                 ("",), ("",))
+MAKERS = ("RC", "RK73", "ERJ", "CRCW", "GRM", "CL10", "LQW", "LM", "TPS",
+          "STM32", "AD", "MAX", "SN74", "ISO", "DIN912", "ISO7380", "WERA", "KNIPEX")
+NOTES = ("", "", "", "", "reorder soon", "from project box", "spare for repairs",
+         "do not use for new designs")
+
+
+def _choices(schema, name):
+    return schema.columns[schema.names.index(name)].choices
+
+
+def _common(rnd, words):
+    # Description, PartNo, Cabinet, Amount and Notes shared by both
+    description = " ".join(rnd.sample(words[1:], min(3, len(words) - 1)))
+    part_no = "{}{:05X}".format(rnd.choice(MAKERS), rnd.getrandbits(20))
+    cabinet = "{}{}".format(rnd.choice("ABCDEF"), rnd.randint(1, 20))
+    # Most items are few, some are many
+    amount = str(int(rnd.paretovariate(1.2) * 5) - 5)
+    return "{} {}".format(words[0], description), part_no, cabinet, amount, rnd.choice(NOTES)
+
+
+def electronics(count, seed=1):
+    # Rows of ELECTRONICS columns: Description, PartNo, Category, Package,
+    # Value, Unit, Cabinet, Amount, Notes
+    rnd = random.Random(seed)
+    categories = _choices(schemas.ELECTRONICS, "Category")
+    for _ in range(count):
+        category = rnd.choice(categories)
+        words, packages, values = ELECTRONICS_PARTS.get(category, DEFAULT_PARTS)
+        package = rnd.choice(packages)
+        description, part_no, cabinet, amount, notes = _common(rnd, words)
+        yield (description + (" " + package if package else ""), part_no, category,
+               package, rnd.choice(values), rnd.choice(quantities.CATEGORY_UNITS[category]),
+               cabinet, amount, notes)
+
+
+def mechanics(count, seed=1):
+    # Rows of MECHANICS columns: Description, PartNo, Category, Cabinet,
+    # Amount, Notes
+    rnd = random.Random(seed)
+    categories = _choices(schemas.MECHANICS, "Category")
+    for _ in range(count):
+        category = rnd.choice(categories)
+        words = MECHANICS_PARTS.get(category, DEFAULT_PARTS)[0]
+        description, part_no, cabinet, amount, notes = _common(rnd, words)
+        yield (description, part_no, category, cabinet, amount, notes)
+
+
+GENERATORS = {"ELECTRONICS": electronics, "MECHANICS": mechanics}
+
+
+def rows(key, count, seed=1):
+    try:
+        generate = GENERATORS[key.upper()]
+    except KeyError:
+        raise ValueError("no generator for {}, only {}".format(
+            key, ", ".join(GENERATORS))) from None
+    return generate(count, seed)
+
+
+def main():
+    # Writes a CSV file that *Import from CSV/XLSX* can read
+    parser = argparse.ArgumentParser()
+    parser.add_argument("department", choices=sorted(GENERATORS))
+    parser.add_argument("count", type=int)
+    parser.add_argument("-s", "--seed", type=int, default=1)
+    parser.add_argument("-o", "--output", help="CSV file, standard output by default")
+    args = parser.parse_args()
+    f = open(args.output, "w", newline="", encoding="utf-8") if args.output else sys.stdout
+    try:
+        writer = csv.writer(f)
+        writer.writerow(schemas.SCHEMAS[args.department].names)
+        writer.writerows(rows(args.department, args.count, args.seed))
+    finally:
+        if f is not sys.stdout:
+            f.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,248 @@
+# ##################################################################
+# File name:    cache.py
+# Author:       agent
+# Create on:    2026-10-18
+# Description:  In-memory read-through cache of inventory tables and pages,
+#               invalidated by our own writes and by PRAGMA data_version
+# ##################################################################
+
+
+import sqlite3
+import threading
+from collections import OrderedDict
+from contextlib import contextmanager
+
+import connection
+
+
+# Query results (pages, counts) kept per table, least recently used
+# first out
+MAX_VALUES = 64
+
+
+class CachedTable:
+    # The rows of a table stored column by column: one tuple per column
+    # instead of one tuple per row
+    __slots__ = ("columns", "count")
+
+    def __init__(self, rows):
+        self.count = len(rows)
+        self.columns = tuple(zip(*rows))
+
+    def rows(self):
+        return list(zip(*self.columns))
+
+
+class TableCache:
+    """
+    Keeps the full contents of tables that were read with rows(), and
+    smaller query results on a table read with value(). The entries of
+    a table are dropped when it is written through invalidating(), and
+    every entry is dropped when PRAGMA data_version shows a commit by
+    another program.
+    """
+
+    def __init__(self):
+        self.hits = 0
+        self.misses = 0
+        self._tables = {}
+        self._values = {}           # table -> OrderedDict(key -> value)
+        self._generation = 0        # bumped by every invalidation
+        self._epoch = 0             # bumped when every table is dropped
+        self._versions = {}         # table -> writes seen, see version()
+        self._lock = threading.Lock()
+        self._path = None
+        self._watch = None          # connection only used for data_version
+        self._version = None
+
+    def _data_version(self):
+        # Called with the lock held
+        path = connection.get_pool().path
+        if self._watch is None or self._path != path:
+            if self._watch is not None:
+                self._watch.close()
+            self._watch = sqlite3.connect(path, check_same_thread=False)
+            self._path = path
+            self._tables.clear()
+            self._values.clear()
+            self._generation += 1
+            self._epoch += 1
+            self._version = None
+        return self._watch.execute("PRAGMA data_version").fetchone()[0]
+
+    def _check(self):
+        version = self._data_version()
+        if version != self._version:
+            self._tables.clear()
+            self._values.clear()
+            self._generation += 1
+            self._epoch += 1
+            self._version = version
+
+    def rows(self, table, load):
+        # The cached rows of table, or load() them when they are not cached
+        with self._lock:
+            self._check()
+            entry = self._tables.get(table)
+            if entry is not None:
+                self.hits += 1
+                return entry.rows()
+            self.misses += 1
+            generation = self._generation
+        rows = load()
+        with self._lock:
+            # Not kept when a write happened while loading
+            if generation == self._generation:
+                self._tables[table] = CachedTable(rows)
+        return rows
+
+    def value(self, table, key, load):
+        # The cached result of load() for key, e.g. a page of rows, that
+        # only depends on the contents of table
+        with self._lock:
+            self._check()
+            values = self._values.get(table)
+            if values is not None and key in values:
+                values.move_to_end(key)
+                self.hits += 1
+                return values[key]
+            self.misses += 1
+            generation = self._generation
+        value = load()
+        with self._lock:
+            if generation == self._generation:
+                values = self._values.setdefault(table, OrderedDict())
+                values[key] = value
+                if len(values) > MAX_VALUES:
+                    values.popitem(last=False)
+        return value
+
+    def get(self, table, key):
+        # The cached value for key, or None without loading it
+        with self._lock:
+            self._check()
+            values = self._values.get(table)
+            if values is None or key not in values:
+                return None
+            values.move_to_end(key)
+            self.hits += 1
+            return values[key]
+
+    def invalidate(self, table=None):
+        with self._lock:
+            if table is None:
+                self._tables.clear()
+                self._values.clear()
+                self._epoch += 1
+            else:
+                self._tables.pop(table, None)
+                self._values.pop(table, None)
+                self._versions[table] = self._versions.get(table, 0) + 1
+            self._generation += 1
+
+    @contextmanager
+    def invalidating(self, table):
+        """
+        Wrap a write transaction on table. Only that table is dropped
+        when no other program committed just before or after ours;
+        otherwise every table is.
+        """
+        with connection.connection() as conn:
+            with connection.transaction() as c:
+                yield c
+                # The write lock is still held, no one else can commit
+                # now. Our own commit leaves the data_version of conn
+                # as it is, so it keeps this value unless another
+                # program commits after us.
+                expected = conn.execute("PRAGMA data_version").fetchone()[0]
+                with self._lock:
+                    before = self._data_version()
+            with self._lock:
+                seen = self._data_version()
+            # Read after seen: when it is unchanged, seen has no other
+            # commit than ours
+            alone = conn.execute("PRAGMA data_version").fetchone()[0] == expected
+        with self._lock:
+            self._tables.pop(table, None)
+            self._values.pop(table, None)
+            self._versions[table] = self._versions.get(table, 0) + 1
+            self._generation += 1
+            if before == self._version and alone:
+                self._version = seen
+            else:
+                self._tables.clear()
+                self._values.clear()
+                self._epoch += 1
+                self._version = seen
+
+    def version(self, table):
+        """
+        A text that changes whenever the contents of table may have
+        changed: a write through invalidating(), or a commit by another
+        program. Read it before the data it describes, e.g. for an ETag.
+        """
+        with self._lock:
+            self._check()
+            return "{}.{}".format(self._epoch, self._versions.get(table, 0))
+
+    def data_version(self):
+        # PRAGMA data_version seen by the cache's own connection: it
+        # changes with every commit, ours included, and costs no query
+        # of the tables
+        with self._lock:
+            return self._data_version()
+
+    def stats(self):
+        with self._lock:
+            return {"hits": self.hits, "misses": self.misses,
+                    "tables": {table: entry.count
+                               for table, entry in self._tables.items()}}
+
+    def close(self):
+        with self._lock:
+            self._tables.clear()
+            self._values.clear()
+            self._generation += 1
+            self._epoch += 1
+            if self._watch is not None:
+                self._watch.close()
+                self._watch = None
+
+
+_cache = TableCache()
+
+
+def rows(table, load):
+    return _cache.rows(table, load)
+
+
+def value(table, key, load):
+    return _cache.value(table, key, load)
+
+
+def get(table, key):
+    return _cache.get(table, key)
+
+
+def invalidate(table=None):
+    _cache.invalidate(table)
+
+
+def invalidating(table):
+    return _cache.invalidating(table)
+
+
+def version(table):
+    return _cache.version(table)
+
+
+def data_version():
+    return _cache.data_version()
+
+
+def stats():
+    return _cache.stats()
+
+
+def close():
+    _cache.close()
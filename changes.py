@@ -0,0 +1,61 @@
+# ##################################################################
+# File name:    changes.py
+# Author:       agent
+# Create on:    2026-10-18
+# Description:  Change feed of the department tables: a log filled by
+#               triggers with a growing sequence number, read as "what
+#               changed since seq N" so open windows refresh only those
+#               items
+# ##################################################################
+
+
+from collections import OrderedDict, namedtuple
+
+
+# The log is the changes table of migrations.py, one entry per insert,
+# update or delete of an item, written by triggers. Op is I (insert), U
+# (update) or D (delete). AUTOINCREMENT keeps Seq growing even when the
+# newest entries are pruned, so a client never sees a number twice.
+# Only the latest KEPT entries are kept; a client further behind
+# reloads instead.
+KEPT = 100000
+
+# Changed items read at most by since(); more changes than that cost
+# about as much as a reload
+LIMIT = 5000
+
+
+# The changes of a table after seq, up to the new seq: the current rows
+# of the added or changed items, and the ids of the items deleted. Of
+# the rows, inserted are the ids of the items that are new since seq.
+Delta = namedtuple("Delta", "seq rows inserted deleted total")
+
+
+def latest(cursor):
+    # The seq of the latest change, 0 before the first one
+    row = cursor.execute("SELECT seq FROM sqlite_sequence WHERE name='changes'").fetchone()
+    return row[0] if row else 0
+
+
+def since(cursor, table, seq, limit=LIMIT):
+    """
+    (latest seq, items) where items maps the id of every item of table
+    changed after seq to (existed at seq, exists now), in the order of
+    their first change. items is None when the log no longer goes back
+    to seq or more than limit (when not None) items changed.
+    """
+    now = latest(cursor)
+    if seq >= now:
+        return now, OrderedDict()
+    oldest = cursor.execute("SELECT MIN(Seq) FROM changes").fetchone()[0]
+    if oldest is None or seq < oldest - 1:
+        return now, None
+    items = OrderedDict()
+    for item, op in cursor.execute(
+            "SELECT ItemId, Op FROM changes WHERE TableName=? AND Seq > ? AND Seq <= ? "
+            "ORDER BY Seq", (table, seq, now)):
+        existed = items[item][0] if item in items else op != "I"
+        items[item] = (existed, op != "D")
+        if limit is not None and len(items) > limit:
+            return now, None
+    return now, items
@@ -0,0 +1,292 @@
+# ##################################################################
+# File name:    connection.py
+# Author:       agent
+# Create on:    2026-10-18
+# Description:  Shared, thread-aware pool of long-lived connections
+#               to the inventory database
+# ##################################################################
+
+
+import queue
+import random
+import sqlite3
+import threading
+import time
+from contextlib import contextmanager
+
+
+DB_PATH = "inventory.db"
+POOL_SIZE = 4
+
+# How long a statement waits for a lock held by another program before
+# it fails with "database is locked"
+BUSY_TIMEOUT_MS = 5000
+# A write transaction that still finds the database locked after the
+# busy timeout is retried this many times, waiting RETRY_DELAY seconds
+# the first time and twice as long each next time
+WRITE_RETRIES = 3
+RETRY_DELAY = 0.05
+
+# Applied once to every connection when it is opened. WAL lets readers
+# and one writer work at the same time; it needs every program on the
+# same computer, for a file on a network share use "DELETE".
+PRAGMAS = {
+    "journal_mode": "WAL",
+    "synchronous": "NORMAL",
+    "cache_size": -16000,           # negative value = size in KiB
+    "mmap_size": 268435456,         # 256 MiB
+    "foreign_keys": "ON",
+}
+
+# Virtual machine steps between two checks for cancellation
+PROGRESS_STEPS = 10000
+
+
+class ConnectionPool:
+    """
+    Keeps up to `size` open connections to one database file and hands
+    them out to threads. A thread that already holds a connection gets
+    the same one back, so nested calls never deadlock on the pool.
+    """
+
+    def __init__(self, path=DB_PATH, size=POOL_SIZE, pragmas=None,
+                 busy_timeout=BUSY_TIMEOUT_MS, retries=WRITE_RETRIES):
+        if size < 1:
+            raise ValueError("pool size must be at least 1")
+        self.path = path
+        self.size = size
+        self.pragmas = dict(PRAGMAS if pragmas is None else pragmas)
+        self.busy_timeout = busy_timeout
+        self.retries = retries
+        self.retried = 0            # write transactions retried so far
+        self.trace = _trace         # called with every statement run
+        self._idle = queue.LifoQueue()
+        self._opened = 0
+        self._lock = threading.Lock()
+        self._local = threading.local()
+        self._all = []
+        self._closed = False
+
+    def _open(self):
+        # isolation_level=None: transactions are opened explicitly below
+        conn = sqlite3.connect(self.path, isolation_level=None,
+                               check_same_thread=False,
+                               timeout=self.busy_timeout / 1000)
+        for name, value in self.pragmas.items():
+            conn.execute("PRAGMA {}={}".format(name, value))
+        # Lets another thread abort a long query, see cancellable()
+        conn.set_progress_handler(self._cancelled, PROGRESS_STEPS)
+        conn.set_trace_callback(self.trace)
+        return conn
+
+    def set_trace(self, callback):
+        with self._lock:
+            self.trace = callback
+            for conn in self._all:
+                conn.set_trace_callback(callback)
+
+    def _cancelled(self):
+        event = getattr(self._local, "cancel", None)
+        return 1 if event is not None and event.is_set() else 0
+
+    @contextmanager
+    def cancellable(self, event):
+        """
+        Statements run by this thread inside the block are interrupted
+        with sqlite3.OperationalError as soon as `event` is set.
+        """
+        previous = getattr(self._local, "cancel", None)
+        self._local.cancel = event
+        try:
+            yield
+        finally:
+            self._local.cancel = previous
+
+    def acquire(self):
+        if self._closed:
+            raise sqlite3.ProgrammingError("connection pool is closed")
+        depth = getattr(self._local, "depth", 0)
+        if depth:
+            self._local.depth = depth + 1
+            return self._local.conn
+
+        try:
+            conn = self._idle.get_nowait()
+        except queue.Empty:
+            conn = None
+            with self._lock:
+                if self._opened < self.size:
+                    self._opened += 1
+                    opening = True
+                else:
+                    opening = False
+            if opening:
+                try:
+                    conn = self._open()
+                except Exception:
+                    with self._lock:
+                        self._opened -= 1
+                    raise
+                with self._lock:
+                    self._all.append(conn)
+            else:
+                # Every connection is leased out, wait for one to return
+                conn = self._idle.get()
+
+        self._local.conn = conn
+        self._local.depth = 1
+        return conn
+
+    def release(self, conn):
+        if getattr(self._local, "conn", None) is not conn:
+            raise sqlite3.ProgrammingError(
+                "connection released by a thread that does not hold it")
+        self._local.depth -= 1
+        if self._local.depth:
+            return
+        self._local.conn = None
+        if conn.in_transaction:
+            conn.rollback()
+        self._idle.put(conn)
+
+    @contextmanager
+    def connection(self):
+        conn = self.acquire()
+        try:
+            yield conn
+        finally:
+            self.release(conn)
+
+    def _retrying(self, statement):
+        # Run statement, retrying with backoff while the database stays
+        # locked by another program
+        delay = RETRY_DELAY
+        for attempt in range(self.retries + 1):
+            try:
+                return statement()
+            except sqlite3.OperationalError as e:
+                if not is_locked(e) or attempt == self.retries:
+                    raise
+            with self._lock:
+                self.retried += 1
+            # Jitter keeps waiting programs from retrying in lockstep
+            time.sleep(delay * random.uniform(0.5, 1.5))
+            delay *= 2
+
+    @contextmanager
+    def transaction(self):
+        """
+        Yield a cursor inside a transaction that is committed when the
+        block succeeds and rolled back when it raises. Nested blocks on
+        the same thread join the outer transaction.
+        """
+        with self.connection() as conn:
+            if conn.in_transaction:
+                yield conn.cursor()
+                return
+            # IMMEDIATE takes the write lock up front: a deferred
+            # transaction upgrading from a read fails at once with
+            # "database is locked" instead of waiting for the lock.
+            # Retrying is safe here, the block has not run yet.
+            self._retrying(lambda: conn.execute("BEGIN IMMEDIATE"))
+            try:
+                yield conn.cursor()
+            except BaseException:
+                conn.rollback()
+                raise
+            try:
+                self._retrying(conn.commit)
+            except BaseException:
+                conn.rollback()
+                raise
+
+    @contextmanager
+    def snapshot(self):
+        """
+        Yield a connection on which all reads see the database as of the
+        first one, e.g. for a page and its row count that must agree.
+        In WAL mode the snapshot neither waits for writers nor blocks
+        them. Inside a transaction the transaction's view is used.
+        """
+        with self.connection() as conn:
+            if conn.in_transaction:
+                yield conn
+                return
+            conn.execute("BEGIN")
+            try:
+                yield conn
+            finally:
+                conn.rollback()
+
+    def close(self):
+        with self._lock:
+            self._closed = True
+            connections, self._all = self._all, []
+            self._opened = 0
+        for conn in connections:
+            conn.close()
+        self._idle = queue.LifoQueue()
+
+
+_pool = None
+_pool_lock = threading.Lock()
+_trace = None
+
+
+def configure(path=DB_PATH, size=POOL_SIZE, pragmas=None,
+              busy_timeout=BUSY_TIMEOUT_MS, retries=WRITE_RETRIES):
+    # Replace the shared pool, e.g. to point at another database file
+    global _pool
+    with _pool_lock:
+        if _pool is not None:
+            _pool.close()
+        _pool = ConnectionPool(path, size, pragmas, busy_timeout, retries)
+    return _pool
+
+
+def get_pool():
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            _pool = ConnectionPool()
+        return _pool
+
+
+def connection():
+    return get_pool().connection()
+
+
+def transaction():
+    return get_pool().transaction()
+
+
+def set_trace(callback):
+    # Call callback(statement) for every statement on the connections of
+    # this and later pools, None to stop; see instrumentation.py
+    global _trace
+    with _pool_lock:
+        _trace = callback
+        if _pool is not None:
+            _pool.set_trace(callback)
+
+
+def snapshot():
+    return get_pool().snapshot()
+
+
+def is_locked(error):
+    # True for the errors of a database locked by another program
+    return (isinstance(error, sqlite3.OperationalError)
+            and ("locked" in str(error) or "busy" in str(error)))
+
+
+def cancellable(event):
+    return get_pool().cancellable(event)
+
+
+def close():
+    global _pool
+    with _pool_lock:
+        if _pool is not None:
+            _pool.close()
+            _pool = None
@@ -0,0 +1,75 @@
+# ##################################################################
+# File name:    csv_export.py
+# Author:       agent
+# Create on:    2026-10-18
+# Description:  Streams a table from a cursor into a (gzipped) CSV file
+#               in batches, so memory use does not grow with the table
+# ##################################################################
+
+
+import csv
+import gzip
+import os
+
+
+BATCH_SIZE = 5000
+
+
+def _open(path, compress):
+    if compress:
+        return gzip.open(path, "wt", newline="", encoding="utf-8")
+    return open(path, "w", newline="", encoding="utf-8")
+
+
+def write_csv(header, batches, path, compress=None, progress=None, total=None):
+    """
+    Write the header line and the rows of every batch (a list of rows)
+    to `path` and return the number of rows written. The file is gzipped
+    when `compress` is true, or when it is None and the path ends with
+    ".gz". `progress(done, total)` is called after every batch. The file
+    is written under a temporary name and only renamed once complete.
+    """
+    if compress is None:
+        compress = path.endswith(".gz")
+    partial = path + ".part"
+    done = 0
+    try:
+        with _open(partial, compress) as f:
+            writer = csv.writer(f)
+            writer.writerow(header)
+            for rows in batches:
+                writer.writerows(rows)
+                done += len(rows)
+                if progress is not None:
+                    progress(done, total if total is not None else done)
+        os.replace(partial, path)
+    except BaseException:
+        if os.path.exists(partial):
+            os.remove(partial)
+        raise
+    return done
+
+
+def export_csv(conn, sql, path, compress=None, batch_size=BATCH_SIZE,
+               progress=None, total=None):
+    """
+    Write the result of `sql` with a header line to `path` and return the
+    number of rows written, see write_csv().
+    """
+    cursor = conn.execute(sql)
+    try:
+        return write_csv([column[0] for column in cursor.description],
+                         iter(lambda: cursor.fetchmany(batch_size), []),
+                         path, compress, progress, total)
+    finally:
+        cursor.close()
+
+
+def export_table(conn, table, path, compress=None, batch_size=BATCH_SIZE,
+                 progress=None, columns=None):
+    total = None
+    if progress is not None:
+        total = conn.execute("SELECT count(*) FROM {}".format(table)).fetchone()[0]
+    selected = "*" if columns is None else ", ".join(columns)
+    return export_csv(conn, "SELECT {} FROM {}".format(selected, table), path,
+                      compress, batch_size, progress, total)
@@ -0,0 +1,360 @@
+# ##################################################################
+# File name:    duplicates.py
+# Author:       agent
+# Create on:    2026-10-18
+# Description:  Duplicate and near-duplicate items: an index on the part
+#               number with case and punctuation folded, and a MinHash
+#               index of the descriptions brought up to date from the
+#               change log (changes.py) by every write of repository.py
+# ##################################################################
+
+
+import functools
+import random
+import re
+import struct
+import zlib
+from collections import OrderedDict
+from contextlib import contextmanager
+
+import changes
+
+
+# Removed from part numbers before they are compared, with the case of
+# ASCII letters, e.g. RC0603FR-0710KL and rc0603fr0710kl are one part
+PUNCTUATION = " -_./,#"
+# Descriptions are compared as sets of SHINGLE-character pieces; a
+# Jaccard similarity of SIMILARITY or more is a near-duplicate
+SHINGLE = 3
+SIMILARITY = 0.6
+# MinHash signature of BANDS * ROWS values; two descriptions become
+# candidates when all ROWS values of one band are equal, which finds
+# 92% of the pairs at a similarity of 0.7 and 77% at 0.6
+BANDS = 6
+ROWS = 3
+# Candidates read per check, and matches returned
+MAX_CANDIDATES = 200
+MAX_MATCHES = 10
+# A write indexes the items it changes in its transaction when at most
+# this many others changed since the last refresh, e.g. by other
+# programs, and the change log still goes back that far; otherwise it
+# marks the index STALE, and refresh() without a limit rebuilds it
+REFRESH_LIMIT = 1000
+STALE = -1
+# Ids per "rowid IN (...)" query
+CHUNK = 500
+# Signatures kept per distinct description; inventories repeat many
+DESCRIPTIONS_CACHED = 65536
+
+_WORD = re.compile(r"\w+(?:\.\w+)*", re.UNICODE)
+_DIGIT = re.compile(r"\d")
+_FOLD = {ord(c): c.lower() for c in "ABCDEFGHIJKLMNOPQRSTUVWXYZ"}
+_FOLD.update((ord(c), None) for c in PUNCTUATION)
+# The hash functions of the signature are the crc32 of a shingle XOR a
+# random mask, which is as good as random permutations here and costs
+# one C call per mask
+_MASKS = [random.Random(20210420 + i).getrandbits(32) for i in range(BANDS * ROWS)]
+_BAND = struct.Struct("<{}I".format(ROWS + 1))
+
+
+def minhash_table(table):
+    return table + "_minhash"
+
+
+def part_key(part_no):
+    # The part number as compared, "" for none; the same as part_key_sql()
+    return str(part_no or "").translate(_FOLD)
+
+
+def part_key_sql(column="PartNo"):
+    # SQLite's lower() only folds ASCII letters, like part_key(). The
+    # index of migrations.py is on this expression, so it must not change
+    sql = "lower({})".format(column)
+    for c in PUNCTUATION:
+        sql = "replace({}, '{}', '')".format(sql, c)
+    return sql
+
+
+# ========== Descriptions ========== #
+def words(description):
+    return _WORD.findall(str(description or "").upper())
+
+
+@functools.lru_cache(maxsize=DESCRIPTIONS_CACHED)
+def _features(description):
+    # (shingles, numbers) of a description: its SHINGLE-character pieces
+    # and its words with digits
+    tokens = words(description)
+    text = " ".join(tokens)
+    if len(text) <= SHINGLE:
+        shingles = frozenset((text,) if text else ())
+    else:
+        shingles = frozenset(text[i:i + SHINGLE] for i in range(len(text) - SHINGLE + 1))
+    return shingles, frozenset(token for token in tokens if _DIGIT.search(token))
+
+
+@functools.lru_cache(maxsize=DESCRIPTIONS_CACHED)
+def bands(description):
+    # The BANDS hashes of the MinHash signature of a description, () for
+    # one without words
+    shingles = _features(description)[0]
+    if not shingles:
+        return ()
+    hashes = [zlib.crc32(shingle.encode("utf-8")) for shingle in shingles]
+    values = [min(map(mask.__xor__, hashes)) for mask in _MASKS]
+    return tuple(zlib.crc32(_BAND.pack(band, *values[band * ROWS:(band + 1) * ROWS]))
+                 for band in range(BANDS))
+
+
+def similarity(description, key, other_description, other_part_no):
+    """
+    Jaccard similarity of the shingles of the words() of a description
+    and another description, 0 when the part keys differ and neither
+    starts with the other, or the numbers in them differ (10K and 12K
+    are different resistors).
+    """
+    other_key = part_key(other_part_no)
+    if key and other_key and not (key.startswith(other_key) or other_key.startswith(key)):
+        return 0.0
+    a, numbers = _features(description)
+    b, other_numbers = _features(other_description)
+    if numbers != other_numbers or not a or not b:
+        return 0.0
+    return len(a & b) / len(a | b)
+
+
+# ========== Index ========== #
+def _rows(cursor, table, ids):
+    # [(rowid, Description, PartNo)] of the ids, read CHUNK at a time
+    ids = list(ids)
+    rows = []
+    for i in range(0, len(ids), CHUNK):
+        chunk = ids[i:i + CHUNK]
+        rows.extend(cursor.execute(
+            "SELECT rowid, Description, PartNo FROM {} WHERE rowid IN ({})"
+            .format(table, ", ".join("?" * len(chunk))), chunk))
+    return rows
+
+
+def _band_rows(rows):
+    for id, description, _ in rows:
+        for band in bands(description):
+            yield id, band
+
+
+def _seq(cursor, table):
+    # The seq the index of table is up to date with, None before the first
+    row = cursor.execute("SELECT Seq FROM duplicate_index WHERE TableName=?",
+                         (table,)).fetchone()
+    return row[0] if row else None
+
+
+def _set_seq(cursor, table, seq):
+    cursor.execute("INSERT OR REPLACE INTO duplicate_index (TableName, Seq) VALUES (?, ?)",
+                   (table, seq))
+
+
+def rebuild(cursor, table):
+    # Index every row again; returns the number of rows
+    index = minhash_table(table)
+    cursor.execute("DELETE FROM {}".format(index))
+    rows = cursor.execute("SELECT rowid, Description, PartNo FROM {}".format(table)).fetchall()
+    cursor.executemany("INSERT OR IGNORE INTO {} (ItemId, Band) VALUES (?, ?)".format(index),
+                       _band_rows(rows))
+    _set_seq(cursor, table, changes.latest(cursor))
+    return len(rows)
+
+
+def behind(cursor, table):
+    # True when the table changed since the MinHash index was updated
+    row = cursor.execute("SELECT Seq FROM duplicate_index WHERE TableName=?",
+                         (table,)).fetchone()
+    return row is None or row[0] < changes.latest(cursor)
+
+
+def stale(cursor, table):
+    # True when the index misses changes no longer in the change log
+    seq = _seq(cursor, table)
+    if seq is None or seq == STALE:
+        return True
+    oldest = cursor.execute("SELECT MIN(Seq) FROM changes").fetchone()[0]
+    return oldest is not None and seq < oldest - 1
+
+
+def _current(cursor, table):
+    # True when the index has every change of the log
+    seq = _seq(cursor, table)
+    if seq is None or seq == STALE:
+        return False
+    items = changes.since(cursor, table, seq, 0)[1]
+    return items is not None and not items
+
+
+def refresh(cursor, table, limit=None):
+    """
+    Index the items changed since the last refresh again, as read from
+    the change log. Returns their number. When the log does not go back
+    far enough, the whole table is indexed again; with a limit, more
+    than limit items changed or a log not going back far enough mark
+    the index STALE instead and return None.
+    """
+    row = _seq(cursor, table)
+    seq, items = changes.since(cursor, table, 0 if row is None else row, limit)
+    if items is None:
+        if limit is None:
+            return rebuild(cursor, table)
+        if row != STALE:
+            _set_seq(cursor, table, STALE)
+        return None
+    if items:
+        index = minhash_table(table)
+        cursor.executemany("DELETE FROM {} WHERE ItemId=?".format(index),
+                           ((id,) for id in items))
+        cursor.executemany("INSERT OR IGNORE INTO {} (ItemId, Band) VALUES (?, ?)".format(index),
+                           _band_rows(_rows(cursor, table, (id for id, (_, exists)
+                                                           in items.items() if exists))))
+    if seq != row:
+        _set_seq(cursor, table, seq)
+    return len(items)
+
+
+@contextmanager
+def indexing(cursor, table, tables):
+    """
+    For a write of table inside one transaction: the index is refreshed
+    with REFRESH_LIMIT before the block and, unless that marked it
+    STALE, the items changed by the block are indexed after it, so a
+    write never rebuilds the index. Yields whether it is up to date.
+    The indexes of the other tables that had every change before the
+    block are moved to the latest seq after it, so the log pruned by a
+    large write does not make them stale.
+    """
+    others = [other for other in tables if other != table and _current(cursor, other)]
+    current = refresh(cursor, table, REFRESH_LIMIT) is not None
+    yield current
+    if current:
+        refresh(cursor, table)
+    seq = changes.latest(cursor)
+    for other in others:
+        _set_seq(cursor, other, seq)
+
+
+@contextmanager
+def bulk_load(cursor, table, tables):
+    """
+    For large inserts inside one transaction, like indexing(): the rows
+    appended by the block are indexed after it with one query rather
+    than read back from the change log.
+    """
+    last = cursor.execute("SELECT max(rowid) FROM {}".format(table)).fetchone()[0]
+    with indexing(cursor, table, tables) as current:
+        yield
+        if current:
+            rows = cursor.execute("SELECT rowid, Description, PartNo FROM {} WHERE rowid > ?"
+                                  .format(table), (last or 0,)).fetchall()
+            cursor.executemany("INSERT OR IGNORE INTO {} (ItemId, Band) VALUES (?, ?)"
+                               .format(minhash_table(table)), _band_rows(rows))
+            _set_seq(cursor, table, changes.latest(cursor))
+
+
+# ========== Queries ========== #
+class Matches(list):
+    # The result of a check; stale when the index misses changes, see
+    # stale()
+    stale = False
+
+
+def matches(cursor, table, description, part_no, exclude=None, limit=MAX_MATCHES):
+    """
+    The items of table that look like the part (description, part_no):
+    [(id, similarity, same part number)], the most similar first. An
+    equal part number counts as similarity 1.
+    """
+    found = OrderedDict()
+    key = part_key(part_no)
+    if key:
+        for (id,) in cursor.execute("SELECT rowid FROM {} WHERE {} = ? LIMIT ?".format(
+                table, part_key_sql()), (key, MAX_CANDIDATES)):
+            found[id] = (1.0, True)
+    hashes = list(bands(description))
+    if hashes:
+        candidates = [id for (id,) in cursor.execute(
+            "SELECT DISTINCT ItemId FROM {} WHERE Band IN ({}) LIMIT ?".format(
+                minhash_table(table), ", ".join("?" * len(hashes))),
+            hashes + [MAX_CANDIDATES]) if id not in found]
+        for id, other_description, other_part_no in _rows(cursor, table, candidates):
+            score = similarity(description, key, other_description, other_part_no)
+            if score >= SIMILARITY:
+                found[id] = (score, False)
+    found.pop(exclude, None)
+    return sorted(((id,) + found[id] for id in found),
+                  key=lambda match: (-match[1], match[0]))[:limit]
+
+
+def groups(cursor, table, progress=None):
+    """
+    Every group of items that look like one part, as lists of
+    (id, similarity to the first item, same part number) starting with
+    the oldest item, (id, 1.0, None). Items with one part key are a
+    group; as part keys that differ rule out a match, only the items
+    without one, or whose key starts another key, are looked up with
+    matches().
+    """
+    parent = {}         # id -> an id of its group, the oldest for the first
+
+    def find(id):
+        root = id
+        while parent.get(root, root) != root:
+            root = parent[root]
+        while id != root:
+            parent[id], id = root, parent[id]
+        return root
+
+    def union(a, b):
+        a, b = find(a), find(b)
+        if a != b:
+            parent[a] = parent[b] = min(a, b)
+
+    # (key, ids) in key order, read from the part number index
+    keys = []
+    for key, id in cursor.execute("SELECT {0}, rowid FROM {1} ORDER BY {0}".format(
+            part_key_sql(), table)).fetchall():
+        key = key or ""
+        if keys and keys[-1][0] == key:
+            keys[-1][1].append(id)
+        else:
+            keys.append((key, [id]))
+    looked_up = []
+    for i, (key, ids) in enumerate(keys):
+        if not key:
+            looked_up.extend(ids)
+            continue
+        for id in ids[1:]:
+            union(ids[0], id)
+        if i + 1 < len(keys) and keys[i + 1][0].startswith(key):
+            looked_up.append(ids[0])
+
+    for done, row in enumerate(_rows(cursor, table, looked_up), 1):
+        for id, _, _ in matches(cursor, table, row[1], row[2], exclude=row[0],
+                                limit=MAX_CANDIDATES):
+            union(row[0], id)
+        if progress is not None and done % 100 == 0:
+            progress(done, len(looked_up))
+
+    members = OrderedDict()
+    for id in sorted(parent):
+        members.setdefault(find(id), []).append(id)
+    result = []
+    for root, ids in members.items():
+        rows = {row[0]: row for row in _rows(cursor, table, ids)}
+        if root not in rows or len(rows) < 2:
+            continue
+        root_key = part_key(rows[root][2])
+        group = [(root, 1.0, None)]
+        for id in ids:
+            if id != root and id in rows:
+                same = bool(root_key) and part_key(rows[id][2]) == root_key
+                group.append((id, 1.0 if same else round(similarity(
+                    rows[root][1], root_key, rows[id][1], rows[id][2]), 3), same))
+        result.append(group)
+    return result
@@ -0,0 +1,193 @@
+# ##################################################################
+# File name:    fulltext.py
+# Author:       agent
+# Create on:    2026-10-18
+# Description:  SQLite FTS5 index over the inventory tables, kept in
+#               sync by triggers, and ranked keyword search
+# ##################################################################
+
+
+import re
+import sys
+from contextlib import contextmanager
+
+
+SEARCH_LIMIT = 200
+# Queries with at most this many matches rank all of them. Broader ones,
+# e.g. a single letter, rank only the newest this many, which bounds
+# their cost; their results are marked truncated.
+RANK_CANDIDATES = 10000
+
+# Words, keeping decimal values such as 4.7u together
+_TOKEN = re.compile(r"\w+(?:\.\w+)*", re.UNICODE)
+# A table column read by an FTS expression
+_SOURCE = re.compile(r"\{row\}\.(\w+)")
+
+
+def fts_table(table):
+    return table + "_fts"
+
+
+def _expressions(columns, row):
+    # columns maps an FTS column to an SQL expression over the source row,
+    # written with {row} where NEW, OLD or the table name belongs
+    return ", ".join(expr.format(row=row) for expr in columns.values())
+
+
+def source_columns(columns):
+    # The table columns the FTS expressions read, e.g. Value and Unit
+    return sorted({name for expr in columns.values() for name in _SOURCE.findall(expr)})
+
+
+def create_index(cursor, table, columns):
+    """
+    Create the contentless FTS5 table for `table` and the triggers that
+    keep it in sync. The index is backfilled when it did not exist yet.
+    """
+    fts = fts_table(table)
+    exists = cursor.execute(
+        "SELECT 1 FROM sqlite_master WHERE type='table' AND name=?",
+        (fts,)).fetchone()
+    names = ", ".join(columns)
+    # prefix indexes make the as-you-type prefix queries cheap, and without
+    # token positions (detail=column) the index is smaller and faster
+    cursor.execute("""CREATE VIRTUAL TABLE IF NOT EXISTS {fts} USING fts5(
+                        {names}, content='', detail=column, prefix='1 2 3 4',
+                        tokenize="unicode61 tokenchars '.'")""".format(
+        fts=fts, names=names))
+
+    new = _expressions(columns, "NEW")
+    old = _expressions(columns, "OLD")
+    cursor.execute("""CREATE TRIGGER IF NOT EXISTS {fts}_ai AFTER INSERT ON {table}
+                      BEGIN
+                          INSERT INTO {fts} (rowid, {names}) VALUES (NEW.rowid, {new});
+                      END""".format(fts=fts, table=table, names=names, new=new))
+    cursor.execute("""CREATE TRIGGER IF NOT EXISTS {fts}_ad AFTER DELETE ON {table}
+                      BEGIN
+                          INSERT INTO {fts} ({fts}, rowid, {names}) VALUES ('delete', OLD.rowid, {old});
+                      END""".format(fts=fts, table=table, names=names, old=old))
+    # Updates of columns that are not indexed, e.g. Cabinet, skip it
+    cursor.execute("""CREATE TRIGGER IF NOT EXISTS {fts}_au AFTER UPDATE OF {sources} ON {table}
+                      BEGIN
+                          INSERT INTO {fts} ({fts}, rowid, {names}) VALUES ('delete', OLD.rowid, {old});
+                          INSERT INTO {fts} (rowid, {names}) VALUES (NEW.rowid, {new});
+                      END""".format(fts=fts, table=table, names=names, old=old, new=new,
+                                    sources=", ".join(source_columns(columns))))
+    if not exists:
+        rebuild(cursor, table, columns)
+
+
+def rebuild(cursor, table, columns):
+    # Re-create the index content from the table, e.g. after a bulk load
+    # done with the triggers missing
+    fts = fts_table(table)
+    cursor.execute("INSERT INTO {0} ({0}) VALUES ('delete-all')".format(fts))
+    cursor.execute("INSERT INTO {fts} (rowid, {names}) SELECT rowid, {exprs} FROM {table}"
+                   .format(fts=fts, names=", ".join(columns), table=table,
+                           exprs=_expressions(columns, table)))
+    cursor.execute("INSERT INTO {0} ({0}) VALUES ('optimize')".format(fts))
+
+
+@contextmanager
+def bulk_load(cursor, table, columns):
+    """
+    For large inserts inside one transaction: the sync triggers are
+    dropped while the block runs, then the new rows are indexed with a
+    single statement and the triggers are restored. Only rows appended
+    after the current largest rowid are indexed.
+    """
+    fts = fts_table(table)
+    last = cursor.execute("SELECT max(rowid) FROM {}".format(table)).fetchone()[0]
+    for suffix in ("ai", "ad", "au"):
+        cursor.execute("DROP TRIGGER IF EXISTS {}_{}".format(fts, suffix))
+    yield
+    cursor.execute("INSERT INTO {fts} (rowid, {names}) SELECT rowid, {exprs} FROM {table} WHERE rowid > ?"
+                   .format(fts=fts, names=", ".join(columns), table=table,
+                           exprs=_expressions(columns, table)), (last or 0,))
+    create_index(cursor, table, columns)
+
+
+@contextmanager
+def bulk_change(cursor, table, columns, rowids):
+    """
+    For updates or deletes of many rows inside one transaction: the
+    sync triggers are dropped while the block runs, and the index
+    entries of the rows selected by the SQL query `rowids` are removed
+    before it and added back (for the rows still there) after it, one
+    statement each instead of two per row.
+    """
+    fts = fts_table(table)
+    names = ", ".join(columns)
+    exprs = _expressions(columns, table)
+    for suffix in ("ai", "ad", "au"):
+        cursor.execute("DROP TRIGGER IF EXISTS {}_{}".format(fts, suffix))
+    cursor.execute("INSERT INTO {fts} ({fts}, rowid, {names}) SELECT 'delete', rowid, {exprs} "
+                   "FROM {table} WHERE rowid IN ({rowids})".format(
+                       fts=fts, names=names, exprs=exprs, table=table, rowids=rowids))
+    yield
+    cursor.execute("INSERT INTO {fts} (rowid, {names}) SELECT rowid, {exprs} "
+                   "FROM {table} WHERE rowid IN ({rowids})".format(
+                       fts=fts, names=names, exprs=exprs, table=table, rowids=rowids))
+    create_index(cursor, table, columns)
+
+
+def match_expression(text):
+    """
+    Turn free text into an FTS5 query: every word must match, the words
+    are matched as prefixes so partial input finds results,
+        10k 0603  ->  "10k"* "0603"*
+    Returns None when the text contains no words.
+    """
+    tokens = _TOKEN.findall(text)
+    if not tokens:
+        return None
+    return " ".join('"{}"*'.format(token) for token in tokens)
+
+
+class Matches(list):
+    # The rows of search(); truncated when more than RANK_CANDIDATES
+    # items matched and only the newest of them were ranked
+    truncated = False
+
+
+def search(conn, table, text, limit=SEARCH_LIMIT, candidates=RANK_CANDIDATES,
+           columns=None):
+    # Best matches first (bm25), ranked inside the index, see RANK_CANDIDATES
+    matches = Matches()
+    expression = match_expression(text)
+    if expression is None:
+        return matches
+    fts = fts_table(table)
+    selected = "t.rowid, t.*"
+    if columns is not None:
+        selected = "t.rowid, " + ", ".join("t." + column for column in columns)
+    # The first column counts the candidates, one more than ranked when
+    # the query was broader
+    for row in conn.execute("""WITH f AS (
+                                   SELECT rowid, rank FROM {fts} WHERE {fts} MATCH ?
+                                   ORDER BY rowid DESC LIMIT ?)
+                               SELECT (SELECT count(*) FROM f), {selected} FROM (
+                                   SELECT rowid, rank FROM f ORDER BY rank LIMIT ?) g
+                               JOIN {table} t ON t.rowid = g.rowid
+                               ORDER BY g.rank"""
+                            .format(selected=selected, fts=fts, table=table),
+                            (expression, max(candidates, limit) + 1, limit)):
+        matches.truncated = row[0] > max(candidates, limit)
+        matches.append(row[1:])
+    return matches
+
+
+def main():
+    import repository
+    import schemas
+
+    if sys.argv[1:] != ["rebuild"]:
+        print("usage: python fulltext.py rebuild")
+        sys.exit(2)
+    for key in schemas.SCHEMAS:
+        repository.get(key).rebuild_fts()
+    print("Full-text index rebuilt")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,35 @@
+# ##################################################################
+# File name:    icons.py
+# Author:       agent
+# Create on:    2026-10-18
+# Description:  Icons and pictures loaded on first use and shared by
+#               every widget that shows them
+# ##################################################################
+
+
+import os.path
+from functools import lru_cache
+
+from PyQt5 import QtCore
+from PyQt5.QtGui import QIcon, QPixmap
+
+
+ICON_DIR = "icon"
+
+
+@lru_cache(maxsize=None)
+def icon(name):
+    # QIcon only decodes the file when it is first painted
+    return QIcon(os.path.join(ICON_DIR, name))
+
+
+@lru_cache(maxsize=None)
+def pixmap(name, width=None, height=None):
+    # Decoded and scaled once, keeping the aspect ratio
+    image = QPixmap(os.path.join(ICON_DIR, name))
+    if width is not None and height is not None:
+        image = image.scaled(width, height, QtCore.Qt.KeepAspectRatio,
+                             QtCore.Qt.SmoothTransformation)
+    elif width is not None:
+        image = image.scaledToWidth(width)
+    return image
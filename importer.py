@@ -0,0 +1,217 @@
+# ##################################################################
+# File name:    importer.py
+# Author:       agent
+# Create on:    2026-10-18
+# Description:  Bulk import of CSV and XLSX files into an inventory
+#               table with validation and batched inserts
+# ##################################################################
+
+
+import codecs
+import csv
+import os
+import re
+from collections import namedtuple
+
+import quantities
+
+
+BATCH_SIZE = 10000
+# Encodings a CSV file is read with, the first that decodes all of it:
+# UTF-8 with or without a BOM, then the ANSI code page of Excel on
+# Western Windows
+ENCODINGS = ("utf-8-sig", "cp1252")
+# Rejected rows kept for the report, the rest are only counted
+MAX_REPORTED = 1000
+
+# Header names accepted for each column, compared lower case without
+# spaces and punctuation
+ALIASES = {
+    "Description": ("description", "desc", "name", "item"),
+    "PartNo": ("partno", "partnumber", "manufacturerpartno",
+               "manufacturerpartnumber", "manufacturepartno", "mpn", "pn"),
+    "Category": ("category", "type"),
+    "Package": ("package", "footprint", "case"),
+    "Value": ("value",),
+    "Unit": ("unit", "units"),
+    "Cabinet": ("cabinet", "location", "storage", "bin"),
+    "Amount": ("amount", "instockamount", "stock", "qty", "quantity"),
+    "Notes": ("notes", "note", "comment", "comments", "remarks"),
+}
+
+Rejected = namedtuple("Rejected", "line reason values")
+
+
+class ImportResult:
+    def __init__(self):
+        self.imported = 0
+        self.rejected = []
+        self.rejected_count = 0
+
+    def reject(self, line, reason, values):
+        self.rejected_count += 1
+        if len(self.rejected) < MAX_REPORTED:
+            self.rejected.append(Rejected(line, reason, values))
+
+    def summary(self):
+        return "{} items imported, {} rows rejected".format(
+            self.imported, self.rejected_count)
+
+
+def _normalize(name):
+    return re.sub(r"[^0-9a-z]", "", str(name or "").lower())
+
+
+def map_columns(header, columns):
+    """
+    Return, for every table column, the index of the file column that
+    holds it, or None when the file has no such column.
+    """
+    positions = {_normalize(name): i for i, name in enumerate(header)}
+    mapping = []
+    for column in columns:
+        names = (_normalize(column),) + ALIASES.get(column, ())
+        mapping.append(next((positions[name] for name in names
+                             if name in positions), None))
+    if all(index is None for index in mapping):
+        raise ValueError("None of the file columns match the table columns "
+                         "({})".format(", ".join(columns)))
+    return mapping
+
+
+def _encoding(path, encodings=ENCODINGS):
+    # The first of encodings that decodes the whole file; it is checked
+    # before the import starts, so no row is inserted from a file that
+    # turns out unreadable halfway
+    for encoding in encodings:
+        decoder = codecs.getincrementaldecoder(encoding)()
+        try:
+            with open(path, "rb") as f:
+                for chunk in iter(lambda: f.read(1 << 20), b""):
+                    decoder.decode(chunk)
+            decoder.decode(b"", final=True)
+        except UnicodeDecodeError:
+            continue
+        return encoding
+    raise ValueError("{} is not {} text; save it as CSV UTF-8".format(
+        os.path.basename(path), " or ".join(encodings)))
+
+
+def _read_csv(path, encoding=None):
+    if encoding is None:
+        encoding = _encoding(path)
+    with open(path, newline="", encoding=encoding) as f:
+        sample = f.read(8192)
+        f.seek(0)
+        try:
+            dialect = csv.Sniffer().sniff(sample, delimiters=",;\t")
+        except csv.Error:
+            dialect = csv.excel
+        for row in csv.reader(f, dialect):
+            yield row
+
+
+def _read_xlsx(path):
+    try:
+        import openpyxl
+    except ImportError:
+        raise ImportError("Importing .xlsx files requires the openpyxl "
+                          "package (pip install openpyxl)")
+    workbook = openpyxl.load_workbook(path, read_only=True, data_only=True)
+    try:
+        for row in workbook.active.iter_rows(values_only=True):
+            yield ["" if cell is None else cell for cell in row]
+    finally:
+        workbook.close()
+
+
+def read_rows(path, encoding=None):
+    # Rows of the file as lists of cells, header first; a CSV file is
+    # read with encoding, by default the first of ENCODINGS that fits
+    if os.path.splitext(path)[1].lower() in (".xlsx", ".xlsm"):
+        return _read_xlsx(path)
+    return _read_csv(path, encoding)
+
+
+def _is_number(text):
+    try:
+        float(text)
+    except ValueError:
+        return False
+    return True
+
+
+def validate(values, columns):
+    """
+    Check one mapped row (values in table column order, all strings) and
+    return the reason it is rejected, or None when it is fine.
+    """
+    row = dict(zip(columns, values))
+    if not row.get("Description") and not row.get("PartNo"):
+        return "needs a description or a part number"
+    amount = row.get("Amount")
+    if amount and not re.fullmatch(r"\d+", amount):
+        return "amount '{}' is not a whole number".format(amount)
+    value = row.get("Value")
+    if value and not _is_number(value) and quantities.parse_quantity(value) is None:
+        return "value '{}' is not a number".format(value)
+    return None
+
+
+def _cell(value):
+    if isinstance(value, float) and value.is_integer():
+        value = int(value)
+    return str(value).strip()
+
+
+def import_rows(cursor, table, columns, rows, batch_size=BATCH_SIZE,
+                progress=None, validator=validate, prepare=None,
+                insert_columns=None):
+    """
+    Insert rows (an iterable of lists, header first) into table inside
+    the caller's transaction with executemany batches. Returns an
+    ImportResult with the rejected rows.
+
+    prepare(values) may turn a validated row into the values stored for
+    insert_columns (default: columns), e.g. to add derived columns; a
+    ValueError it raises rejects the row.
+    """
+    result = ImportResult()
+    rows = iter(rows)
+    header = next(rows, None)
+    if header is None:
+        raise ValueError("The file is empty")
+    mapping = map_columns(header, columns)
+    insert_columns = insert_columns or columns
+    sql = "INSERT INTO {} ({}) VALUES ({})".format(
+        table, ", ".join(insert_columns), ", ".join("?" * len(insert_columns)))
+
+    batch = []
+    for line, row in enumerate(rows, start=2):
+        if not any(_cell(cell) for cell in row):
+            continue
+        values = tuple(_cell(row[index]) if index is not None and index < len(row)
+                       else "" for index in mapping)
+        reason = validator(values, columns)
+        if reason:
+            result.reject(line, reason, values)
+            continue
+        if prepare is not None:
+            try:
+                values = prepare(values)
+            except ValueError as error:
+                result.reject(line, str(error), values)
+                continue
+        batch.append(values)
+        if len(batch) >= batch_size:
+            cursor.executemany(sql, batch)
+            result.imported += len(batch)
+            batch = []
+            if progress is not None:
+                progress(result.imported, 0)
+    if batch:
+        cursor.executemany(sql, batch)
+        result.imported += len(batch)
+        if progress is not None:
+            progress(result.imported, 0)
+    return result
@@ -0,0 +1,345 @@
+# ##################################################################
+# File name:    instrumentation.py
+# Author:       agent
+# Create on:    2026-10-18
+# Description:  Opt-in timing of database functions and window slots:
+#               latency histograms, row counts, the SQL they ran and an
+#               optional cProfile capture, exported as JSON
+# ##################################################################
+
+
+import functools
+import heapq
+import io
+import itertools
+import json
+import threading
+import time
+from collections import OrderedDict
+from contextlib import contextmanager
+
+import connection
+
+
+# Upper bounds in milliseconds of the latency histogram buckets; the
+# last bucket holds everything slower
+BUCKETS_MS = (0.1, 0.25, 0.5, 1, 2.5, 5, 10, 25, 50, 100, 250, 500,
+              1000, 2500, 5000, 10000)
+# Slowest single calls kept, over all operations
+SLOWEST = 50
+# Statements kept per call and distinct statements kept per operation
+MAX_STATEMENTS = 20
+MAX_SQL = 2000
+# Functions listed from the cProfile capture
+PROFILE_LINES = 40
+
+
+class Sample:
+    # One timed call; rows may be set inside measure()
+    __slots__ = ("name", "ms", "rows", "statements", "thread", "time")
+
+    def __init__(self, name):
+        self.name = name
+        self.ms = 0.0
+        self.rows = None
+        self.statements = []
+        self.thread = threading.current_thread().name
+        self.time = time.time()
+
+    def as_dict(self):
+        return {"name": self.name, "ms": round(self.ms, 3), "rows": self.rows,
+                "thread": self.thread,
+                "time": time.strftime("%Y-%m-%dT%H:%M:%S", time.localtime(self.time)),
+                "sql": self.statements}
+
+
+class Operation:
+    # Every call of one named operation
+    __slots__ = ("name", "count", "total_ms", "max_ms", "histogram", "rows",
+                 "statements")
+
+    def __init__(self, name):
+        self.name = name
+        self.count = 0
+        self.total_ms = 0.0
+        self.max_ms = 0.0
+        self.histogram = [0] * (len(BUCKETS_MS) + 1)
+        self.rows = 0
+        self.statements = OrderedDict()     # SQL -> times run
+
+    def add(self, sample):
+        self.count += 1
+        self.total_ms += sample.ms
+        self.max_ms = max(self.max_ms, sample.ms)
+        self.histogram[_bucket(sample.ms)] += 1
+        if sample.rows is not None:
+            self.rows += sample.rows
+        for sql in sample.statements:
+            if sql in self.statements:
+                self.statements[sql] += 1
+            elif len(self.statements) < MAX_STATEMENTS:
+                self.statements[sql] = 1
+
+    def percentile(self, p):
+        # Upper bound of the bucket holding the p-th fraction of calls
+        wanted = p * self.count
+        seen = 0
+        for bound, count in zip(BUCKETS_MS, self.histogram):
+            seen += count
+            if seen >= wanted:
+                return min(bound, self.max_ms)
+        return self.max_ms
+
+    def as_dict(self):
+        return {"name": self.name, "count": self.count,
+                "total_ms": round(self.total_ms, 3),
+                "mean_ms": round(self.total_ms / self.count, 3) if self.count else 0,
+                "p50_ms": self.percentile(0.50), "p95_ms": self.percentile(0.95),
+                "max_ms": round(self.max_ms, 3), "rows": self.rows,
+                "histogram": OrderedDict(
+                    ("<={}".format(bound), count)
+                    for bound, count in zip(BUCKETS_MS, self.histogram)),
+                "slower": self.histogram[-1],
+                "sql": [{"sql": sql, "count": count}
+                        for sql, count in self.statements.items()]}
+
+
+def _bucket(ms):
+    for i, bound in enumerate(BUCKETS_MS):
+        if ms <= bound:
+            return i
+    return len(BUCKETS_MS)
+
+
+_enabled = False
+_profiling = False
+_lock = threading.Lock()
+_local = threading.local()
+_operations = {}
+_slowest = []               # heap of (ms, sequence, sample)
+_sequence = itertools.count()
+_stats = None               # pstats.Stats of the cProfile capture
+# cProfile, pstats and inspect are imported on first use, they would
+# add a tenth of the start-up time of the command line (inventory.py)
+
+
+def enabled():
+    return _enabled
+
+
+def enable(on=True):
+    # Starts (or stops) recording; while off the decorated functions
+    # only pay for one global lookup
+    global _enabled
+    _enabled = bool(on)
+    connection.set_trace(_trace if _enabled else None)
+
+
+def profiling():
+    return _profiling
+
+
+def profile(on=True):
+    # Also runs the outermost operation of every thread under cProfile;
+    # turning it on starts a new capture
+    global _profiling, _stats
+    with _lock:
+        if on and not _profiling:
+            _stats = None
+        _profiling = bool(on)
+
+
+def reset():
+    global _stats
+    with _lock:
+        _operations.clear()
+        del _slowest[:]
+        _stats = None
+
+
+def _trace(statement):
+    # sqlite3 trace callback: the statement goes to the innermost
+    # operation running on this thread
+    stack = getattr(_local, "stack", None)
+    if stack:
+        statements = stack[-1].statements
+        if len(statements) < MAX_STATEMENTS:
+            statements.append(" ".join(statement.split())[:MAX_SQL])
+
+
+def _start_profile():
+    if not _profiling or getattr(_local, "profiler", None) is not None:
+        return None
+    import cProfile
+    profiler = cProfile.Profile()
+    try:
+        profiler.enable()
+    except ValueError:
+        # Another profiler is already active on this thread
+        return None
+    _local.profiler = profiler
+    return profiler
+
+
+def _stop_profile(profiler):
+    import pstats
+    global _stats
+    profiler.disable()
+    _local.profiler = None
+    with _lock:
+        if not _profiling:
+            return
+        if _stats is None:
+            _stats = pstats.Stats(profiler)
+        else:
+            _stats.add(profiler)
+
+
+def _record(sample):
+    with _lock:
+        operation = _operations.get(sample.name)
+        if operation is None:
+            operation = _operations[sample.name] = Operation(sample.name)
+        operation.add(sample)
+        entry = (sample.ms, next(_sequence), sample)
+        if len(_slowest) < SLOWEST:
+            heapq.heappush(_slowest, entry)
+        elif entry > _slowest[0]:
+            heapq.heapreplace(_slowest, entry)
+
+
+@contextmanager
+def measure(name):
+    """
+    Times the block as one call of the operation name, e.g.
+        with instrumentation.measure("export") as sample:
+            sample.rows = repo.to_csv(path)
+    Does nothing while recording is off.
+    """
+    sample = Sample(name)
+    if not _enabled:
+        yield sample
+        return
+    stack = getattr(_local, "stack", None)
+    if stack is None:
+        stack = _local.stack = []
+    stack.append(sample)
+    profiler = _start_profile()
+    start = time.perf_counter()
+    try:
+        yield sample
+    finally:
+        sample.ms = (time.perf_counter() - start) * 1e3
+        stack.pop()
+        if profiler is not None:
+            _stop_profile(profiler)
+        _record(sample)
+
+
+def _row_count(result):
+    # Rows of a list of rows, the count a function returns, or None
+    if isinstance(result, bool):
+        return None
+    if isinstance(result, int):
+        return result
+    if isinstance(result, list):
+        return len(result)
+    if isinstance(result, tuple):
+        # (rows, total) of a page, or one row
+        return len(result[0]) if result and isinstance(result[0], list) else 1
+    imported = getattr(result, "imported", None)
+    return imported if isinstance(imported, int) else None
+
+
+def timed(name=None, rows=_row_count):
+    """
+    Decorator recording every call of a function as the operation name
+    (its qualified name by default), with rows(result) as the row count.
+    """
+    def decorator(fn):
+        label = name or fn.__qualname__
+
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            if not _enabled:
+                return fn(*args, **kwargs)
+            with measure(label) as sample:
+                result = fn(*args, **kwargs)
+                sample.rows = rows(result) if rows is not None else None
+                return result
+        return wrapper
+    return decorator
+
+
+def slot(name=None):
+    """
+    timed() for Qt slots. A signal such as clicked(bool) passes more
+    arguments than the slot takes; PyQt drops the extra ones for a plain
+    method but cannot see through a wrapper, so they are dropped here.
+    """
+    def decorator(fn):
+        import inspect
+        label = name or fn.__qualname__
+        parameters = inspect.signature(fn).parameters.values()
+        if any(p.kind == p.VAR_POSITIONAL for p in parameters):
+            positional = None
+        else:
+            positional = sum(p.kind in (p.POSITIONAL_ONLY, p.POSITIONAL_OR_KEYWORD)
+                             for p in parameters)
+
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            if positional is not None:
+                args = args[:positional]
+            if not _enabled:
+                return fn(*args, **kwargs)
+            with measure(label):
+                return fn(*args, **kwargs)
+        return wrapper
+    return decorator
+
+
+def operations():
+    # Every operation recorded so far, the most total time first
+    with _lock:
+        return sorted((operation.as_dict() for operation in _operations.values()),
+                      key=lambda operation: operation["total_ms"], reverse=True)
+
+
+def slowest(n=SLOWEST):
+    with _lock:
+        return [sample.as_dict() for _, _, sample in heapq.nlargest(n, _slowest)]
+
+
+def profile_rows(limit=PROFILE_LINES):
+    # The functions of the cProfile capture with the most cumulative time
+    with _lock:
+        if _stats is None:
+            return []
+        entries = sorted(_stats.stats.items(), key=lambda item: item[1][3], reverse=True)
+        return [{"function": "{}:{}({})".format(*function), "calls": calls,
+                 "tottime_s": round(tottime, 6), "cumtime_s": round(cumtime, 6)}
+                for function, (_, calls, tottime, cumtime, _) in entries[:limit]]
+
+
+def profile_text(limit=PROFILE_LINES):
+    # The cProfile capture as printed by pstats
+    with _lock:
+        if _stats is None:
+            return ""
+        stream = io.StringIO()
+        _stats.stream = stream
+        _stats.sort_stats("cumulative").print_stats(limit)
+        return stream.getvalue()
+
+
+def report():
+    return {"enabled": _enabled, "profiling": _profiling,
+            "buckets_ms": list(BUCKETS_MS), "operations": operations(),
+            "slowest": slowest(), "profile": profile_rows()}
+
+
+def export(path):
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(report(), f, indent=2)
+    return path
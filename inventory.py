@@ -0,0 +1,364 @@
+# ##################################################################
+# File name:    inventory.py
+# Author:       agent
+# Create on:    2026-10-18
+# Description:  Command line of the inventory for scripts and nightly
+#               jobs: search, export, import, stats, stock movements,
+#               duplicates and the change feed on the database modules,
+#               without the GUI (PyQt5 is never imported). Prints text,
+#               JSON or NDJSON.
+# ##################################################################
+
+
+import argparse
+import json
+import os.path
+import sys
+import time
+
+import alerts
+import cache
+import connection
+import fulltext
+import ledger
+import migrations
+import query
+import repository
+import schemas
+import summaries
+
+
+FORMATS = ("text", "json", "ndjson")
+# Keys of the totals in a stats record
+PLURALS = {"Category": "categories", "Cabinet": "cabinets", "Supplier": "suppliers"}
+
+
+class Output:
+    """
+    Writes records (dicts) as tab-separated text with a header, one JSON array, or one JSON
+    object per line. NDJSON and text are written as the records come,
+    so a large search or listing is streamed.
+    """
+
+    def __init__(self, form, stream=sys.stdout):
+        self.form = form
+        self.stream = stream
+        self._first = True
+
+    def write(self, record):
+        if self.form == "ndjson":
+            self.stream.write(json.dumps(record, ensure_ascii=False) + "\n")
+        elif self.form == "json":
+            self.stream.write(("[\n" if self._first else ",\n") +
+                              json.dumps(record, ensure_ascii=False))
+        else:
+            if self._first:
+                self.stream.write("\t".join(record) + "\n")
+            self.stream.write("\t".join("" if value is None else str(value)
+                                        for value in record.values()) + "\n")
+        self._first = False
+
+    def write_all(self, records):
+        for record in records:
+            self.write(record)
+        return self
+
+    def close(self):
+        if self.form == "json":
+            self.stream.write("[]\n" if self._first else "\n]\n")
+        self.stream.flush()
+
+
+def _records(repo, rows):
+    names = ("id",) + repo.stored_columns
+    return (dict(zip(names, row)) for row in rows)
+
+
+def _all_rows(repo, limit):
+    # Every row in rowid order, a page at a time
+    after = None
+    left = limit
+    while left is None or left > 0:
+        size = repository.PAGE_SIZE if left is None else min(left, repository.PAGE_SIZE)
+        rows = repo.page(after=after, limit=size)
+        yield from rows
+        if len(rows) < size:
+            return
+        after = repo.sort_key(rows[-1], None)
+        if left is not None:
+            left -= len(rows)
+
+
+def _filters(repo, fields):
+    # ["Cabinet=A1", "Amount=<10"] -> {"Cabinet": "A1", "Amount": "<10"}
+    named = {}
+    for field in fields:
+        name, equals, value = field.partition("=")
+        if not equals or name not in repo.columns:
+            raise ValueError("a field filter is Column=filter with a column of {}: {}"
+                             .format(", ".join(repo.columns), field))
+        named[name] = value
+    return named
+
+
+def search(args, out):
+    repo = repository.get(args.department)
+    if args.text:
+        rows = repo.search_text(" ".join(args.text), limit=args.limit or 1000)
+        if rows.truncated:
+            print("note: more than {} items match, the best of the newest {} are listed"
+                  .format(fulltext.RANK_CANDIDATES, fulltext.RANK_CANDIDATES),
+                  file=sys.stderr)
+    elif args.field:
+        match = query.MATCH_ALL if args.all else query.MATCH_ANY
+        rows = repo.search_rows(match=match, **_filters(repo, args.field))
+        rows = rows[:args.limit] if args.limit else rows
+    else:
+        rows = _all_rows(repo, args.limit)
+    out.write_all(_records(repo, rows))
+
+
+def export(args, out):
+    repo = repository.get(args.department)
+    path = args.path or "{}_inventory.csv".format(repo.schema.table)
+    count = repo.to_csv(path, compress=True if args.gzip else None)
+    out.write({"department": repo.schema.key, "path": path, "rows": count})
+
+
+def import_(args, out):
+    repo = repository.get(args.department)
+    result = repo.import_file(args.path)
+    out.write({"department": repo.schema.key, "path": args.path,
+               "imported": result.imported, "rejected": result.rejected_count,
+               "rejected_rows": [{"line": rejected.line, "reason": rejected.reason}
+                                 for rejected in result.rejected]})
+    return 1 if args.strict and result.rejected_count else 0
+
+
+def stats(args, out):
+    # Read from the totals kept by summaries.py, never from the rows
+    keys = [args.department.upper()] if args.department else list(schemas.SCHEMAS)
+    dimensions = list(args.by) + (["Category"] if args.categories else [])
+    low = {}
+    for alert in alerts.low_stock():
+        low[alert[0]] = low.get(alert[0], 0) + 1
+    for key, items, amount in summaries.departments():
+        if key not in keys:
+            continue
+        schema = schemas.SCHEMAS[key]
+        record = {"department": key, "items": items, "amount": amount,
+                  "low_stock": low.get(key, 0) if schema.stock else None}
+        for dimension in summaries.dimensions(schema):
+            if dimension in dimensions:
+                record[PLURALS[dimension]] = [
+                    {dimension.lower(): name, "items": count, "amount": total}
+                    for name, count, total in repository.get(key).totals(dimension)]
+        out.write(record)
+
+
+def move(args, out):
+    if args.quantity <= 0:
+        raise ValueError("quantity must be positive")
+    quantity = args.quantity if args.command == "checkin" else -args.quantity
+    amount = ledger.move(args.department, ((args.id, quantity),), args.note)[0]
+    out.write({"department": args.department.upper(), "id": args.id,
+               "quantity": quantity, "amount": amount})
+
+
+def history(args, out):
+    out.write_all(dict(zip(ledger.COLUMNS, movement)) for movement in
+                  ledger.history(args.department, args.id, args.limit))
+
+
+def feed(args, out):
+    """
+    The items added, changed or deleted after the change log seq
+    --since, one record each; --follow keeps printing new changes.
+    Without --since, the latest seq to start from.
+    """
+    repo = repository.get(args.department)
+    if args.since is None and not args.follow:
+        out.write({"seq": repo.last_change()})
+        return
+    since = repo.last_change() if args.since is None else args.since
+    names = ("seq", "change", "id") + repo.stored_columns
+    empty = (None,) * len(repo.stored_columns)
+    version = None
+    try:
+        while True:
+            # Nothing is read while no one committed, see cache.data_version()
+            current = cache.data_version()
+            if current != version:
+                delta = repo.changes_since(since)
+                if delta is None:
+                    raise LookupError("the change log no longer goes back to seq {}"
+                                      .format(since))
+                inserted = set(delta.inserted)
+                for row in delta.rows:
+                    out.write(dict(zip(names, (delta.seq, "added" if row[0] in inserted
+                                               else "changed") + tuple(row))))
+                for id in delta.deleted:
+                    out.write(dict(zip(names, (delta.seq, "deleted", id) + empty)))
+                out.stream.flush()
+                since, version = delta.seq, current
+            if not args.follow:
+                return
+            time.sleep(args.interval)
+    except KeyboardInterrupt:
+        pass
+
+
+def duplicates_(args, out):
+    """
+    The items like --description/--part-no, or without them every
+    group of duplicates, one record per item with the number of its
+    group; the first item of a group has same_part null.
+    """
+    repo = repository.get(args.department)
+    names = ("group", "similarity", "same_part", "id") + repo.stored_columns
+    if args.description is not None or args.part_no is not None:
+        groups = [repo.duplicates_of(Description=args.description or "",
+                                     PartNo=args.part_no or "")]
+        if groups[0].stale:
+            print("note: the description index is out of date; \"duplicates {}\" "
+                  "without --description rebuilds it".format(args.department.lower()),
+                  file=sys.stderr)
+    else:
+        groups = repo.find_duplicates()
+    for number, group in enumerate(groups, 1):
+        out.write_all(dict(zip(names, (number, round(score, 3), same) + tuple(row)))
+                      for row, score, same in group)
+
+
+def merge(args, out):
+    row = repository.get(args.department).merge(args.keep, args.ids)
+    out.write(next(_records(repository.get(args.department), [row])))
+
+
+def _parser():
+    # The options are accepted before and after the command
+    options = argparse.ArgumentParser(add_help=False)
+    options.add_argument("--db", default=argparse.SUPPRESS)
+    options.add_argument("-f", "--format", choices=FORMATS, default=argparse.SUPPRESS)
+    options.add_argument("--json", dest="format", action="store_const", const="json",
+                         default=argparse.SUPPRESS)
+    options.add_argument("--ndjson", dest="format", action="store_const", const="ndjson",
+                         default=argparse.SUPPRESS)
+    # The actions are shared with the commands, so their defaults are
+    # filled in by main(): set_defaults() here would let every command
+    # overwrite an option given before it
+    parser = argparse.ArgumentParser(description="Inventory without the GUI",
+                                     parents=[options])
+    commands = parser.add_subparsers(dest="command")
+    commands.required = True
+    departments = [key.lower() for key in schemas.SCHEMAS] + list(schemas.SCHEMAS)
+
+    command = commands.add_parser("search", help="keyword or field search, or every row",
+                                  parents=[options])
+    command.add_argument("department", choices=departments)
+    command.add_argument("text", nargs="*", help="keywords, best matches first")
+    command.add_argument("--field", action="append", default=[], metavar="COLUMN=FILTER",
+                         help="e.g. Cabinet=A1, Amount=<10, PartNo=RC0603*; repeatable")
+    command.add_argument("--all", action="store_true",
+                         help="rows must match every --field, not any")
+    command.add_argument("--limit", type=int)
+    command.set_defaults(run=search)
+
+    command = commands.add_parser("export", help="write a department to a CSV file",
+                                  parents=[options])
+    command.add_argument("department", choices=departments)
+    command.add_argument("path", nargs="?", help="*.csv, or *.csv.gz to compress")
+    command.add_argument("--gzip", action="store_true")
+    command.set_defaults(run=export)
+
+    command = commands.add_parser("import", help="add the rows of a CSV or XLSX file",
+                                  parents=[options])
+    command.add_argument("department", choices=departments)
+    command.add_argument("path")
+    command.add_argument("--strict", action="store_true",
+                         help="exit with status 1 when rows were rejected")
+    command.set_defaults(run=import_)
+
+    command = commands.add_parser("stats", help="items, amounts and low-stock items",
+                                  parents=[options])
+    command.add_argument("department", nargs="?", choices=departments)
+    command.add_argument("--categories", action="store_true", help="per category too")
+    command.add_argument("--by", action="append", default=[], choices=summaries.DIMENSIONS,
+                         help="per value of this column too, e.g. Cabinet")
+    command.set_defaults(run=stats)
+
+    for name, help in (("checkin", "add stock to an item"),
+                       ("checkout", "take stock from an item")):
+        command = commands.add_parser(name, help=help, parents=[options])
+        command.add_argument("department", choices=departments)
+        command.add_argument("id", type=int)
+        command.add_argument("quantity", type=int)
+        command.add_argument("--note", default="")
+        command.set_defaults(run=move)
+
+    command = commands.add_parser("history", help="stock movements of an item",
+                                  parents=[options])
+    command.add_argument("department", choices=departments)
+    command.add_argument("id", type=int)
+    command.add_argument("--limit", type=int, default=100)
+    command.set_defaults(run=history)
+
+    command = commands.add_parser("duplicates", help="items that look like one part",
+                                  parents=[options])
+    command.add_argument("department", choices=departments)
+    command.add_argument("--description", help="check this part instead of listing groups")
+    command.add_argument("--part-no")
+    command.set_defaults(run=duplicates_)
+
+    command = commands.add_parser("merge", help="merge items into one, moving their stock",
+                                  parents=[options])
+    command.add_argument("department", choices=departments)
+    command.add_argument("keep", type=int, help="the item kept")
+    command.add_argument("ids", type=int, nargs="+", help="the items merged into it")
+    command.set_defaults(run=merge)
+
+    command = commands.add_parser("changes", help="items changed since a change log seq",
+                                  parents=[options])
+    command.add_argument("department", choices=departments)
+    command.add_argument("--since", type=int, help="seq printed by an earlier call")
+    command.add_argument("--follow", action="store_true",
+                         help="keep printing changes as they are committed")
+    command.add_argument("--interval", type=float, default=1.0,
+                         help="seconds between looks at the database with --follow")
+    command.set_defaults(run=feed)
+    return parser
+
+
+def main(argv=None):
+    args = _parser().parse_args(argv)
+    args.db = getattr(args, "db", connection.DB_PATH)
+    args.format = getattr(args, "format", "text")
+    if hasattr(args, "department") and args.department:
+        args.department = args.department.upper()
+    if not os.path.isfile(args.db):
+        print("error: no database at {}".format(args.db), file=sys.stderr)
+        return 2
+    connection.configure(args.db)
+    out = Output(args.format)
+    status = 0
+    try:
+        migrations.migrate()
+        status = args.run(args, out) or 0
+    except (ValueError, LookupError, OSError) as e:
+        print("error: {}".format(e), file=sys.stderr)
+        status = 1
+    except Exception as e:
+        if not connection.is_locked(e):
+            raise
+        print("error: the database is busy, another program is writing to it",
+              file=sys.stderr)
+        status = 75
+    finally:
+        out.close()
+        cache.close()
+        connection.close()
+    return status
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,216 @@
+# ##################################################################
+# File name:    inventory_model.py
+# Author:       agent
+# Create on:    2026-10-18
+# Description:  Table model that presents database rows to a QTableView
+#               without creating an item per cell
+# ##################################################################
+
+
+import bisect
+
+from PyQt5 import QtCore
+
+
+class InventoryModel(QtCore.QAbstractTableModel):
+    """
+    Read-only model backed by the list of rows returned by the database
+    modules. Rows are handed to the view in pages of PAGE_SIZE through
+    canFetchMore/fetchMore, so a reload only costs the first page.
+    """
+
+    PAGE_SIZE = 500
+
+    # Emitted instead of sorting in memory while the rows are one page
+    # of a longer listing (paged), which the database has to sort
+    sortRequested = QtCore.pyqtSignal(int, QtCore.Qt.SortOrder)
+
+    def __init__(self, headers=(), parent=None, sort_columns=None):
+        super(InventoryModel, self).__init__(parent)
+        self._headers = tuple(headers)
+        self._sort_columns = dict(sort_columns or {})
+        self._rows = []
+        self._loaded = 0
+        self._positions = None      # rowid -> index in self._rows when built
+        self._removed = []          # those indexes removed since, sorted
+        self.paged = False
+
+    def set_headers(self, headers, sort_columns=None):
+        # sort_columns maps a shown column to the (possibly hidden) row
+        # element it is sorted by, e.g. Value by ValueSI
+        self.beginResetModel()
+        self._headers = tuple(headers)
+        self._sort_columns = dict(sort_columns or {})
+        self.endResetModel()
+
+    def set_rows(self, rows):
+        self.beginResetModel()
+        self._rows = list(rows) if rows else []
+        self._loaded = min(self.PAGE_SIZE, len(self._rows))
+        self._positions = None
+        self.endResetModel()
+
+    def rows(self):
+        return self._rows
+
+    # ========== Single-row changes ========== #
+    # The first element of every row is its rowid. A row removed by
+    # remove_row() is only noted in _removed, the positions after it are
+    # corrected when read, so a removal does not renumber the rows.
+    def _position(self, rowid):
+        if self._positions is None:
+            self._positions = {row[0]: i for i, row in enumerate(self._rows)}
+            self._removed = []
+        index = self._positions.get(rowid)
+        if index is None or not self._removed:
+            return index
+        return index - bisect.bisect_left(self._removed, index)
+
+    def has_row(self, rowid):
+        return self._position(rowid) is not None
+
+    def append_row(self, row):
+        position = len(self._rows)
+        visible = self._loaded == position
+        if visible:
+            self.beginInsertRows(QtCore.QModelIndex(), position, position)
+        self._rows.append(row)
+        if self._positions is not None:
+            self._positions[row[0]] = position + len(self._removed)
+        if visible:
+            self._loaded += 1
+            self.endInsertRows()
+
+    def replace_row(self, row):
+        position = self._position(row[0])
+        if position is None:
+            return False
+        self._rows[position] = row
+        if position < self._loaded:
+            self.dataChanged.emit(self.index(position, 0),
+                                  self.index(position, self.columnCount() - 1))
+        return True
+
+    def remove_row(self, rowid):
+        position = self._position(rowid)
+        if position is None:
+            return False
+        visible = position < self._loaded
+        if visible:
+            self.beginRemoveRows(QtCore.QModelIndex(), position, position)
+        del self._rows[position]
+        bisect.insort(self._removed, self._positions.pop(rowid))
+        if visible:
+            self._loaded -= 1
+            self.endRemoveRows()
+        return True
+
+    # ========== Multi-row changes ========== #
+    def replace_rows(self, rows):
+        # One dataChanged for the span of the visible rows replaced
+        changed = []
+        for row in rows:
+            position = self._position(row[0])
+            if position is not None:
+                self._rows[position] = row
+                changed.append(position)
+        visible = [position for position in changed if position < self._loaded]
+        if visible:
+            self.dataChanged.emit(self.index(min(visible), 0),
+                                  self.index(max(visible), self.columnCount() - 1))
+        return len(changed)
+
+    def remove_rows(self, rowids):
+        # One removal per run of adjacent rows, the last run first so the
+        # positions of the runs before it stay valid
+        positions = sorted(position for position in map(self._position, rowids)
+                           if position is not None)
+        runs = []
+        for position in positions:
+            if runs and runs[-1][1] == position - 1:
+                runs[-1][1] = position
+            else:
+                runs.append([position, position])
+        for first, last in reversed(runs):
+            visible = first < self._loaded
+            if visible:
+                shown = min(last, self._loaded - 1)
+                self.beginRemoveRows(QtCore.QModelIndex(), first, shown)
+            del self._rows[first:last + 1]
+            if visible:
+                self._loaded -= shown - first + 1
+                self.endRemoveRows()
+        if positions:
+            self._positions = None
+        return len(positions)
+
+    # ========== Qt model interface ========== #
+    def rowCount(self, parent=QtCore.QModelIndex()):
+        if parent.isValid():
+            return 0
+        return self._loaded
+
+    def columnCount(self, parent=QtCore.QModelIndex()):
+        if parent.isValid():
+            return 0
+        return len(self._headers)
+
+    def data(self, index, role=QtCore.Qt.DisplayRole):
+        if role != QtCore.Qt.DisplayRole or not index.isValid():
+            return None
+        row = self._rows[index.row()]
+        column = index.column()
+        if column >= len(row):
+            return None
+        data = row[column]
+        if data is None:
+            return ""
+        # format the cell information
+        return str(data).replace("\n", "")
+
+    def headerData(self, section, orientation, role=QtCore.Qt.DisplayRole):
+        if role != QtCore.Qt.DisplayRole:
+            return None
+        if orientation == QtCore.Qt.Horizontal:
+            if section < len(self._headers):
+                return self._headers[section]
+            return None
+        return section + 1
+
+    def canFetchMore(self, parent=QtCore.QModelIndex()):
+        if parent.isValid():
+            return False
+        return self._loaded < len(self._rows)
+
+    def fetchMore(self, parent=QtCore.QModelIndex()):
+        if parent.isValid():
+            return
+        count = min(self.PAGE_SIZE, len(self._rows) - self._loaded)
+        if count <= 0:
+            return
+        self.beginInsertRows(QtCore.QModelIndex(), self._loaded,
+                             self._loaded + count - 1)
+        self._loaded += count
+        self.endInsertRows()
+
+    def sort(self, column, order=QtCore.Qt.AscendingOrder):
+        if column < 0 or column >= len(self._headers):
+            return
+        if self.paged:
+            self.sortRequested.emit(column, order)
+            return
+        key = self._sort_columns.get(column, column)
+        self.layoutAboutToBeChanged.emit()
+        self._rows.sort(key=lambda row: _sort_key(row[key] if key < len(row) else None),
+                        reverse=order == QtCore.Qt.DescendingOrder)
+        self._positions = None
+        self.layoutChanged.emit()
+
+
+def _sort_key(value):
+    # Numbers before text, empty cells last, never compare int with str
+    if value is None or value == "":
+        return (2, 0, "")
+    if isinstance(value, (int, float)):
+        return (0, value, "")
+    return (1, 0, str(value))
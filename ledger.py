@@ -0,0 +1,95 @@
+# ##################################################################
+# File name:    ledger.py
+# Author:       agent
+# Create on:    2026-10-18
+# Description:  Stock movements: atomic check-in and check-out of items
+#               and the append-only ledger of every movement
+# ##################################################################
+
+
+import cache
+import connection
+import instrumentation
+import schemas
+
+
+# Quantity is signed (in > 0, out < 0) and Balance is the Amount of the
+# item right after the movement. Rows of the movements table of
+# migrations.py are only ever appended.
+
+COLUMNS = ("Id", "Quantity", "Balance", "Time", "Note")
+
+
+class InsufficientStock(ValueError):
+    def __init__(self, table, item_id, available, requested):
+        super(InsufficientStock, self).__init__(
+            "item {} has {} in stock, {} requested".format(
+                item_id, 0 if available is None else available, requested))
+        self.table = table
+        self.item_id = item_id
+        self.available = available
+        self.requested = requested
+
+
+def apply(cursor, table, item_id, quantity, note=""):
+    """
+    Add quantity to the Amount of an item inside the caller's
+    transaction and record the movement. The Amount is changed by one
+    UPDATE relative to its current value, guarded so that it never goes
+    below zero, so concurrent movements are never lost. Returns the new
+    Amount.
+    """
+    item_id, quantity = int(item_id), int(quantity)
+    if quantity < 0:
+        cursor.execute("UPDATE {} SET Amount = Amount + ? WHERE rowid=? AND Amount >= ?"
+                       .format(table), (quantity, item_id, -quantity))
+    else:
+        cursor.execute("UPDATE {} SET Amount = IFNULL(Amount, 0) + ? WHERE rowid=?"
+                       .format(table), (quantity, item_id))
+    updated = cursor.rowcount
+    row = cursor.execute("SELECT Amount FROM {} WHERE rowid=?".format(table),
+                         (item_id,)).fetchone()
+    if row is None:
+        raise LookupError("no item {} in {}".format(item_id, table))
+    if not updated:
+        raise InsufficientStock(table, item_id, row[0], -quantity)
+    cursor.execute("INSERT INTO movements (TableName, ItemId, Quantity, Balance, Note) "
+                   "VALUES (?, ?, ?, ?, ?)", (table, item_id, quantity, row[0], note))
+    return row[0]
+
+
+@instrumentation.timed()
+def move(key, movements, note=""):
+    """
+    Apply (item id, signed quantity) movements in one transaction: all
+    of them, or none when one fails. Returns the new Amounts.
+    """
+    table = schemas.stock_schema(key).table
+    with cache.invalidating(table) as c:
+        return [apply(c, table, item_id, quantity, note)
+                for item_id, quantity in movements]
+
+
+def check_in(key, item_id, quantity, note=""):
+    if int(quantity) <= 0:
+        raise ValueError("quantity must be positive")
+    return move(key, ((item_id, quantity),), note)[0]
+
+
+def check_out(key, item_id, quantity, note=""):
+    # Raises InsufficientStock, leaving the Amount as it was, when fewer
+    # than quantity are in stock
+    if int(quantity) <= 0:
+        raise ValueError("quantity must be positive")
+    return move(key, ((item_id, -int(quantity)),), note)[0]
+
+
+@instrumentation.timed()
+def history(key, item_id, limit=100):
+    # The latest movements of an item, newest first, as COLUMNS
+    table = schemas.stock_schema(key).table
+    with connection.connection() as conn:
+        return conn.execute("""SELECT Id, Quantity, Balance, Time, Note FROM movements
+                               WHERE TableName=? AND ItemId=?
+                               ORDER BY Id DESC LIMIT ?""",
+                            (table, int(item_id), limit)).fetchall()
@@ -0,0 +1,133 @@
+# ##################################################################
+# File name:    live_search.py
+# Author:       agent
+# Create on:    2026-10-18
+# Description:  Keyword search while typing: the first keystroke runs
+#               at once and bursts are debounced, served from the result
+#               cache when possible, with superseded queries cancelled
+#               and identical ones coalesced
+# ##################################################################
+
+
+from PyQt5 import QtCore
+
+
+# After a query starts, keystrokes within this time wait for typing to
+# pause that long; the first keystroke after a pause runs at once
+DEBOUNCE_MS = 30
+
+
+class LiveSearch(QtCore.QObject):
+    """
+    Feed every text change to set_text(). Cached results are emitted at
+    once. Otherwise the first keystroke after a pause searches on the
+    executor at once, and while typing goes on the last text is searched
+    when typing pauses for DEBOUNCE_MS. A new query cancels the one still
+    running, and a query equal to the one running or waiting is not
+    started again.
+
+    repository() returns the repository to search, see repository.py.
+    """
+
+    results = QtCore.pyqtSignal(str, object)     # text, rows
+    cleared = QtCore.pyqtSignal()
+    failed = QtCore.pyqtSignal(object)
+
+    def __init__(self, executor, repository, channel="rows",
+                 debounce=DEBOUNCE_MS, parent=None):
+        super(LiveSearch, self).__init__(parent)
+        self.executor = executor
+        self.repository = repository
+        self.channel = channel
+        self._text = ""
+        self._waiting = False       # a text waits for typing to pause
+        self._running = None        # (job, repository, text) in flight
+        self._timer = QtCore.QTimer(self)
+        self._timer.setSingleShot(True)
+        self._timer.setInterval(debounce)
+        self._timer.timeout.connect(self._pause)
+        # Counters for the benchmark and diagnostics
+        self.queries = 0
+        self.cache_hits = 0
+        self.coalesced = 0
+
+    def set_text(self, text):
+        previous, self._text = self._text, text
+        if not text.strip():
+            self._timer.stop()
+            self._waiting = False
+            self.cleared.emit()
+            return
+        if self._show_cached(text):
+            return
+        if self._coalesce(text):
+            return
+        if self._waiting and _normalized(previous) == _normalized(text):
+            # The query waiting already gives these results and keeps
+            # its time
+            self.coalesced += 1
+            return
+        if self._timer.isActive():
+            self._waiting = True
+            self._timer.start()
+            return
+        self._run()
+
+    def _show_cached(self, text):
+        rows = self.repository().cached_search_text(text)
+        if rows is None:
+            return False
+        # e.g. backspacing to a text searched a moment ago
+        self._waiting = False
+        self.executor.cancel(self.channel)
+        self._running = None
+        self.cache_hits += 1
+        self.results.emit(text, rows)
+        return True
+
+    def _coalesce(self, text):
+        # True when the query running gives the results of text, e.g.
+        # the same words with a space typed after them
+        if self._running is None:
+            return False
+        job, running_repository, running_text = self._running
+        if (job.cancelled() or running_repository is not self.repository()
+                or _normalized(running_text) != _normalized(text)):
+            return False
+        self._waiting = False
+        self.coalesced += 1
+        return True
+
+    def _pause(self):
+        if not self._waiting:
+            return
+        self._waiting = False
+        if not self._show_cached(self._text) and not self._coalesce(self._text):
+            self._run()
+
+    def _run(self):
+        text = self._text
+        repository = self.repository()
+        self.queries += 1
+        self._timer.start()
+        job = self.executor.submit(repository.search_text, text,
+                                   channel=self.channel,
+                                   on_result=lambda rows: self._finished(text, rows),
+                                   on_error=lambda error: self._failed(text, error))
+        self._running = (job, repository, text)
+
+    def _finished(self, text, rows):
+        if self._running is not None and self._running[2] == text:
+            self._running = None
+        # A coalesced query may differ from the text in spaces or case
+        if _normalized(text) == _normalized(self._text):
+            self.results.emit(self._text, rows)
+
+    def _failed(self, text, error):
+        if self._running is not None and self._running[2] == text:
+            self._running = None
+        self.failed.emit(error)
+
+
+def _normalized(text):
+    return " ".join(text.lower().split())
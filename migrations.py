@@ -0,0 +1,375 @@
+# ##################################################################
+# File name:    migrations.py
+# Author:       agent
+# Create on:    2026-10-18
+# Description:  Versioned schema migrations of the inventory database,
+#               the applied version is kept in PRAGMA user_version
+# ##################################################################
+
+
+import connection
+import duplicates
+import quantities
+
+
+# Every step runs the statements of its version, written out below
+# rather than built by the modules that use the tables now, so that a
+# database at any version ends up with the schema of a new one. A
+# released step and the statements it uses never change: a change of
+# the schema is a new step.
+
+# ========== Statements of the steps ========== #
+INDEXED_COLUMNS = ("PartNo", "Category", "Cabinet", "Description")
+
+# The Details column of the full-text index of each department, over
+# the row {row}
+FTS_DETAILS = {
+    "electronics": "IFNULL({row}.Category, '') || ' ' || IFNULL({row}.Package, '') || ' ' || "
+                   "IFNULL({row}.Value, '') || IFNULL({row}.Unit, '')",
+    "mechanics": "IFNULL({row}.Category, '')",
+    "quality": "IFNULL({row}.Category, '')",
+    "sourcing": "IFNULL({row}.Category, '') || ' ' || IFNULL({row}.Supplier, '') || ' ' || "
+                "IFNULL({row}.SupplierPartNo, '')",
+}
+# The columns read by the full-text index of each department
+FTS_SOURCES = {
+    "electronics": "Category, Description, Notes, Package, PartNo, Unit, Value",
+    "mechanics": "Category, Description, Notes, PartNo",
+    "quality": "Category, Description, Notes, PartNo",
+    "sourcing": "Category, Description, Notes, PartNo, Supplier, SupplierPartNo",
+}
+FTS_NAMES = "Description, PartNo, Details, Notes"
+
+
+def _create_indexes(c, table, columns):
+    # An entry may also be a tuple of columns for a composite index
+    for column in columns:
+        if isinstance(column, str):
+            column = (column,)
+        c.execute("CREATE INDEX IF NOT EXISTS idx_{0}_{1} ON {0} ({2})"
+                  .format(table, "_".join(column).lower(), ", ".join(column)))
+
+
+def _create_trigger(c, name, event, body):
+    c.execute("CREATE TRIGGER IF NOT EXISTS {} {} BEGIN {} END".format(name, event, body))
+
+
+def _fts_expressions(table, row):
+    return ", ".join(("IFNULL({row}.Description, '')", "IFNULL({row}.PartNo, '')",
+                      FTS_DETAILS[table], "IFNULL({row}.Notes, '')")).format(row=row)
+
+
+def _fts_update_trigger(c, table, event):
+    fts = table + "_fts"
+    _create_trigger(
+        c, fts + "_au", event,
+        "INSERT INTO {fts} ({fts}, rowid, {names}) VALUES ('delete', OLD.rowid, {old}); "
+        "INSERT INTO {fts} (rowid, {names}) VALUES (NEW.rowid, {new});".format(
+            fts=fts, names=FTS_NAMES, old=_fts_expressions(table, "OLD"),
+            new=_fts_expressions(table, "NEW")))
+
+
+def _create_fts(c, table):
+    # The contentless FTS5 table of table and its triggers, filled from
+    # the rows when it did not exist yet
+    fts = table + "_fts"
+    exists = c.execute("SELECT 1 FROM sqlite_master WHERE type='table' AND name=?",
+                       (fts,)).fetchone()
+    c.execute("""CREATE VIRTUAL TABLE IF NOT EXISTS {} USING fts5(
+                     {}, content='', detail=column, prefix='1 2 3 4',
+                     tokenize="unicode61 tokenchars '.'")""".format(fts, FTS_NAMES))
+    _create_trigger(c, fts + "_ai", "AFTER INSERT ON " + table,
+                    "INSERT INTO {} (rowid, {}) VALUES (NEW.rowid, {});".format(
+                        fts, FTS_NAMES, _fts_expressions(table, "NEW")))
+    _create_trigger(c, fts + "_ad", "AFTER DELETE ON " + table,
+                    "INSERT INTO {0} ({0}, rowid, {1}) VALUES ('delete', OLD.rowid, {2});"
+                    .format(fts, FTS_NAMES, _fts_expressions(table, "OLD")))
+    _fts_update_trigger(c, table, "AFTER UPDATE ON " + table)
+    if not exists:
+        c.execute("INSERT INTO {0} ({0}) VALUES ('delete-all')".format(fts))
+        c.execute("INSERT INTO {} (rowid, {}) SELECT rowid, {} FROM {}".format(
+            fts, FTS_NAMES, _fts_expressions(table, table), table))
+        c.execute("INSERT INTO {0} ({0}) VALUES ('optimize')".format(fts))
+
+
+def _threshold(table):
+    return """COALESCE(
+        (SELECT Threshold FROM item_thresholds
+         WHERE TableName='{table}' AND ItemId={table}.rowid),
+        (SELECT Threshold FROM category_thresholds
+         WHERE TableName='{table}' AND Category={table}.Category))""".format(table=table)
+
+
+def _low_stock_refresh(table, where):
+    return """DELETE FROM low_stock WHERE TableName='{table}'
+                  AND ItemId IN (SELECT rowid FROM {table} WHERE {where});
+              INSERT INTO low_stock (TableName, ItemId, Amount, Threshold)
+                  SELECT '{table}', rowid, Amount, threshold FROM (
+                      SELECT rowid, Amount, {threshold} AS threshold
+                      FROM {table} WHERE {where})
+                  WHERE Amount < threshold;""".format(
+        table=table, where=where, threshold=_threshold(table))
+
+
+def _create_low_stock_triggers(c, table):
+    refresh_new = _low_stock_refresh(table, "rowid=NEW.rowid")
+    _create_trigger(c, table + "_low_stock_ai", "AFTER INSERT ON " + table, refresh_new)
+    _create_trigger(c, table + "_low_stock_au", "AFTER UPDATE OF Amount, Category ON " + table,
+                    "DELETE FROM low_stock WHERE TableName='{0}' AND ItemId=OLD.rowid;"
+                    .format(table) + refresh_new)
+    _create_trigger(c, table + "_low_stock_ad", "AFTER DELETE ON " + table,
+                    """DELETE FROM low_stock WHERE TableName='{0}' AND ItemId=OLD.rowid;
+            DELETE FROM item_thresholds WHERE TableName='{0}' AND ItemId=OLD.rowid;"""
+                    .format(table))
+    for rules, column, key in (("category_thresholds", "Category", "Category"),
+                               ("item_thresholds", "ItemId", "rowid")):
+        for suffix, event, rows in (("ai", "AFTER INSERT", ("NEW",)),
+                                    ("au", "AFTER UPDATE", ("OLD", "NEW")),
+                                    ("ad", "AFTER DELETE", ("OLD",))):
+            _create_trigger(
+                c, "{}_{}_{}".format(rules, table, suffix),
+                "{} ON {} WHEN {}.TableName='{}'".format(event, rules, rows[-1], table),
+                "".join(_low_stock_refresh(table, "{}={}.{}".format(key, row, column))
+                        for row in rows))
+
+
+def _summary_statements(table, dimension, row, sign):
+    name = "IFNULL({}.{}, '')".format(row, dimension)
+    where = "TableName='{}' AND Dimension='{}' AND Name={}".format(table, dimension, name)
+    statements = []
+    if sign == "+":
+        statements.append("INSERT OR IGNORE INTO summaries VALUES ('{}', '{}', {}, 0, 0);"
+                          .format(table, dimension, name))
+    statements.append("UPDATE summaries SET Items=Items {0} 1, "
+                      "Amount=Amount {0} IFNULL({1}.Amount, 0) WHERE {2};"
+                      .format(sign, row, where))
+    if sign == "-":
+        statements.append("DELETE FROM summaries WHERE {} AND Items=0;".format(where))
+    return "".join(statements)
+
+
+def _create_summary_triggers(c, table, dimension):
+    prefix = "{}_summary_{}".format(table, dimension.lower())
+    _create_trigger(c, prefix + "_ai", "AFTER INSERT ON " + table,
+                    _summary_statements(table, dimension, "NEW", "+"))
+    _create_trigger(c, prefix + "_au",
+                    "AFTER UPDATE OF {0}, Amount ON {1} WHEN OLD.{0} IS NOT NEW.{0} "
+                    "OR OLD.Amount IS NOT NEW.Amount".format(dimension, table),
+                    _summary_statements(table, dimension, "OLD", "-") +
+                    _summary_statements(table, dimension, "NEW", "+"))
+    _create_trigger(c, prefix + "_ad", "AFTER DELETE ON " + table,
+                    _summary_statements(table, dimension, "OLD", "-"))
+
+
+# ========== Steps ========== #
+def _create_tables(c):
+    # Version 1: the original text tables with their indexes and
+    # full-text search
+    c.execute("""CREATE TABLE IF NOT EXISTS electronics (
+                    Description text, PartNo text, Category text, Package text,
+                    Value text, Unit text, Cabinet text, Amount text, Notes text)""")
+    c.execute("""CREATE TABLE IF NOT EXISTS mechanics (
+                    Description text, PartNo text, Category text, Cabinet text,
+                    Amount text, Notes text)""")
+    for table in ("electronics", "mechanics"):
+        _create_indexes(c, table, INDEXED_COLUMNS)
+        _create_fts(c, table)
+
+
+def _rebuild_table(c, table, definition, copy, indexes):
+    # SQLite cannot change column types: copy into a new table, keeping
+    # every rowid since it is the item id
+    c.execute("CREATE TABLE {}_new ({})".format(table, definition))
+    c.execute("INSERT INTO {0}_new (rowid, {1}) SELECT rowid, {2} FROM {0}"
+              .format(table, ", ".join(copy), ", ".join(copy.values())))
+    c.execute("DROP TABLE {}".format(table))
+    c.execute("ALTER TABLE {0}_new RENAME TO {0}".format(table))
+    _create_indexes(c, table, indexes)
+    # The FTS content is unchanged, only its triggers went with the table
+    _create_fts(c, table)
+
+
+def _typed_amount_value(c):
+    # Version 2: Amount INTEGER in both tables, and the electronics Value
+    # additionally stored in SI base units as ValueSI REAL
+    amount = "NULLIF(trim(Amount), '')"
+    c.connection.create_function("si_value", 2, quantities.to_si)
+    names = ("Description", "PartNo", "Category", "Package", "Value", "Unit", "Cabinet",
+             "Amount", "Notes")
+    _rebuild_table(
+        c, "electronics",
+        """Description TEXT, PartNo TEXT, Category TEXT, Package TEXT,
+           Value TEXT, Unit TEXT, Cabinet TEXT, Amount INTEGER, Notes TEXT,
+           ValueSI REAL""",
+        dict(((name, name) for name in names), Amount=amount, ValueSI="si_value(Value, Unit)"),
+        INDEXED_COLUMNS + ("Amount", ("Category", "ValueSI")))
+    names = ("Description", "PartNo", "Category", "Cabinet", "Amount", "Notes")
+    _rebuild_table(
+        c, "mechanics",
+        """Description TEXT, PartNo TEXT, Category TEXT, Cabinet TEXT,
+           Amount INTEGER, Notes TEXT""",
+        dict(((name, name) for name in names), Amount=amount),
+        INDEXED_COLUMNS + ("Amount",))
+
+
+def _new_departments(c):
+    # Version 3: the QUALITY and SOURCING departments
+    c.execute("CREATE TABLE IF NOT EXISTS quality (Description TEXT, PartNo TEXT, "
+              "Category TEXT, SerialNo TEXT, CalibrationDue TEXT, Cabinet TEXT, "
+              "Amount INTEGER, Notes TEXT)")
+    _create_indexes(c, "quality", INDEXED_COLUMNS + ("Amount", "CalibrationDue"))
+    _create_fts(c, "quality")
+    c.execute("CREATE TABLE IF NOT EXISTS sourcing (Description TEXT, PartNo TEXT, "
+              "Category TEXT, Supplier TEXT, SupplierPartNo TEXT, UnitPrice REAL, "
+              "LeadTime INTEGER, Amount INTEGER, Notes TEXT)")
+    _create_indexes(c, "sourcing", ("PartNo", "Category", "Description", "Supplier",
+                                    "UnitPrice"))
+    _create_fts(c, "sourcing")
+
+
+def _sort_indexes(c):
+    # Version 4: indexes that let the grid sort by Value and Package one
+    # page at a time
+    _create_indexes(c, "electronics", ("ValueSI", "Package"))
+
+
+def _low_stock(c):
+    # Version 5: reorder thresholds and the trigger-maintained low_stock
+    # table of the low-stock alerts, on the departments keeping stock
+    c.execute("""CREATE TABLE IF NOT EXISTS category_thresholds (
+                    TableName TEXT NOT NULL, Category TEXT NOT NULL,
+                    Threshold INTEGER NOT NULL,
+                    PRIMARY KEY (TableName, Category)) WITHOUT ROWID""")
+    c.execute("""CREATE TABLE IF NOT EXISTS item_thresholds (
+                    TableName TEXT NOT NULL, ItemId INTEGER NOT NULL,
+                    Threshold INTEGER NOT NULL,
+                    PRIMARY KEY (TableName, ItemId)) WITHOUT ROWID""")
+    c.execute("""CREATE TABLE IF NOT EXISTS low_stock (
+                    TableName TEXT NOT NULL, ItemId INTEGER NOT NULL,
+                    Amount INTEGER NOT NULL, Threshold INTEGER NOT NULL,
+                    PRIMARY KEY (TableName, ItemId)) WITHOUT ROWID""")
+    for table in ("electronics", "mechanics", "quality"):
+        _create_low_stock_triggers(c, table)
+
+
+def _movements(c):
+    # Version 6: the ledger of stock movements
+    c.execute("""CREATE TABLE IF NOT EXISTS movements (
+                    Id INTEGER PRIMARY KEY, TableName TEXT NOT NULL,
+                    ItemId INTEGER NOT NULL, Quantity INTEGER NOT NULL,
+                    Balance INTEGER NOT NULL,
+                    Time TEXT NOT NULL DEFAULT (strftime('%Y-%m-%dT%H:%M:%fZ', 'now')),
+                    Note TEXT)""")
+    c.execute("CREATE INDEX IF NOT EXISTS idx_movements_item ON movements (TableName, ItemId, Id)")
+
+
+def _fts_update_columns(c):
+    # Version 7: the full-text update triggers only run when an indexed
+    # column changes
+    for table, sources in FTS_SOURCES.items():
+        c.execute("DROP TRIGGER IF EXISTS {}_fts_au".format(table))
+        _fts_update_trigger(c, table, "AFTER UPDATE OF {} ON {}".format(sources, table))
+
+
+def _change_log(c):
+    # Version 8: the change feed that lets open windows refresh only the
+    # items changed by others; the log keeps the latest 100000 entries
+    c.execute("""CREATE TABLE IF NOT EXISTS changes (
+                    Seq INTEGER PRIMARY KEY AUTOINCREMENT,
+                    TableName TEXT NOT NULL, ItemId INTEGER NOT NULL,
+                    Op TEXT NOT NULL)""")
+    c.execute("CREATE INDEX IF NOT EXISTS idx_changes_table ON changes (TableName, Seq)")
+    _create_trigger(c, "changes_prune", "AFTER INSERT ON changes",
+                    "DELETE FROM changes WHERE Seq <= NEW.Seq - 100000;")
+    for table in FTS_SOURCES:
+        for suffix, event, row, op in (("ai", "AFTER INSERT", "NEW", "I"),
+                                       ("au", "AFTER UPDATE", "NEW", "U"),
+                                       ("ad", "AFTER DELETE", "OLD", "D")):
+            _create_trigger(c, "{}_changes_{}".format(table, suffix),
+                            "{} ON {}".format(event, table),
+                            "INSERT INTO changes (TableName, ItemId, Op) "
+                            "VALUES ('{}', {}.rowid, '{}');".format(table, row, op))
+
+
+def _duplicates(c):
+    # Version 9: the indexes of duplicates.py on part numbers and
+    # descriptions; the MinHash signatures are computed by duplicates.py
+    c.execute("""CREATE TABLE IF NOT EXISTS duplicate_index (
+                    TableName TEXT PRIMARY KEY, Seq INTEGER NOT NULL) WITHOUT ROWID""")
+    part_key = "lower(PartNo)"
+    for character in " -_./,#":
+        part_key = "replace({}, '{}', '')".format(part_key, character)
+    for table in FTS_SOURCES:
+        c.execute("CREATE INDEX IF NOT EXISTS idx_{0}_partkey ON {0} ({1})"
+                  .format(table, part_key))
+        c.execute("""CREATE TABLE IF NOT EXISTS {}_minhash (
+                        ItemId INTEGER NOT NULL, Band INTEGER NOT NULL,
+                        PRIMARY KEY (ItemId, Band)) WITHOUT ROWID""".format(table))
+        c.execute("CREATE INDEX IF NOT EXISTS idx_{0}_minhash_band ON {0}_minhash (Band)"
+                  .format(table))
+        duplicates.rebuild(c, table)
+
+
+def _summaries(c):
+    # Version 10: totals per Category, Cabinet and Supplier kept by
+    # triggers, see summaries.py, filled from the current rows
+    c.execute("""CREATE TABLE IF NOT EXISTS summaries (
+                    TableName TEXT NOT NULL, Dimension TEXT NOT NULL, Name TEXT NOT NULL,
+                    Items INTEGER NOT NULL, Amount INTEGER NOT NULL,
+                    PRIMARY KEY (TableName, Dimension, Name)) WITHOUT ROWID""")
+    dimensions = (("electronics", "Category"), ("electronics", "Cabinet"),
+                  ("mechanics", "Category"), ("mechanics", "Cabinet"),
+                  ("quality", "Category"), ("quality", "Cabinet"),
+                  ("sourcing", "Category"), ("sourcing", "Supplier"))
+    for table, dimension in dimensions:
+        _create_summary_triggers(c, table, dimension)
+    c.execute("DELETE FROM summaries")
+    for table, dimension in dimensions:
+        c.execute("""INSERT INTO summaries (TableName, Dimension, Name, Items, Amount)
+                     SELECT '{0}', '{1}', IFNULL({1}, ''), count(*), IFNULL(sum(Amount), 0)
+                     FROM {0} GROUP BY IFNULL({1}, '')""".format(table, dimension))
+
+
+# (version, description, step), in the order they are applied
+MIGRATIONS = (
+    (1, "tables, indexes and full-text search", _create_tables),
+    (2, "typed Amount and Value columns", _typed_amount_value),
+    (3, "quality and sourcing departments", _new_departments),
+    (4, "indexes for sorting", _sort_indexes),
+    (5, "low-stock thresholds and alerts", _low_stock),
+    (6, "stock movement ledger", _movements),
+    (7, "full-text updates of indexed columns only", _fts_update_columns),
+    (8, "change log", _change_log),
+    (9, "duplicate part indexes", _duplicates),
+    (10, "summary tables", _summaries),
+)
+
+LATEST = MIGRATIONS[-1][0]
+
+
+def version():
+    with connection.connection() as conn:
+        return conn.execute("PRAGMA user_version").fetchone()[0]
+
+
+def migrate(verbose=False):
+    # Apply every pending step, each in its own transaction
+    current = version()
+    for number, description, step in MIGRATIONS:
+        if number <= current:
+            continue
+        with connection.transaction() as c:
+            step(c)
+            c.execute("PRAGMA user_version = {:d}".format(number))
+        if verbose:
+            print("Migrated to version {}: {}".format(number, description))
+    return version()
+
+
+def main():
+    print("Schema version {}, latest {}".format(version(), LATEST))
+    migrate(verbose=True)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,102 @@
+# ##################################################################
+# File name:    quantities.py
+# Author:       agent
+# Create on:    2026-10-18
+# Description:  Units of the electronics categories and conversion of
+#               values and amounts to the numbers stored in the database
+# ##################################################################
+
+
+import re
+
+
+# Units offered for each electronics category, the first is the default
+CATEGORY_UNITS = {
+    "Resistors": ("mΩ", "Ω", "kΩ", "MΩ"),
+    "Capacitors": ("pF", "nF", "uF"),
+    "Inductors": ("nH", "uH", "H"),
+    "ICs": ("pcs",),
+    "Modules": ("pcs",),
+    "Motors": ("pcs",),
+    "Batteries": ("pcs",),
+    "Misc": ("pcs",),
+}
+
+# Factor from a unit to its SI base unit
+UNIT_FACTORS = {
+    "mΩ": 1e-3, "Ω": 1.0, "kΩ": 1e3, "MΩ": 1e6,
+    "pF": 1e-12, "nF": 1e-9, "uF": 1e-6,
+    "nH": 1e-9, "uH": 1e-6, "H": 1.0,
+    "pcs": 1.0,
+}
+
+SI_PREFIXES = {"p": 1e-12, "n": 1e-9, "u": 1e-6, "µ": 1e-6, "m": 1e-3,
+               "k": 1e3, "K": 1e3, "M": 1e6, "G": 1e9}
+
+# 4.7, 4.7k, 4k7, 10 kΩ, 100nF
+_QUANTITY = re.compile(r"^\s*(\d+(?:[.,]\d*)?|[.,]\d+)\s*([pnuµmkKMG]?)(\d*)\s*([^\d\s]*)\s*$")
+
+
+def parse_quantity(text, unit=None):
+    """
+    Convert a value typed by the user to SI base units. An SI prefix in
+    the text wins over `unit`, e.g. with unit "kΩ":
+        "10" -> 10000.0, "4.7M" -> 4700000.0, "4k7" -> 4700.0
+    Returns None when the text is not a number.
+    """
+    if text is None:
+        return None
+    if isinstance(text, (int, float)):
+        number, prefix, rest = float(text), "", ""
+    else:
+        match = _QUANTITY.match(str(text))
+        if not match:
+            return None
+        number, prefix, decimals, rest = match.groups()
+        number = number.replace(",", ".")
+        if decimals:
+            if "." in number:
+                return None
+            number += "." + decimals
+        number = float(number)
+    if prefix + rest in UNIT_FACTORS:
+        return number * UNIT_FACTORS[prefix + rest]
+    if prefix:
+        return number * SI_PREFIXES[prefix]
+    if rest in UNIT_FACTORS:
+        return number * UNIT_FACTORS[rest]
+    return number * UNIT_FACTORS.get(unit, 1.0)
+
+
+def to_si(value, unit):
+    # The number stored in ValueSI for a Value/Unit pair
+    return parse_quantity(value, unit)
+
+
+def to_amount(text):
+    # Amounts are stored as integers, an empty field as NULL; anything
+    # else raises ValueError, as a text would count as 0 in the totals
+    # and stock movements
+    if text is None or isinstance(text, int):
+        return text
+    if isinstance(text, float) and text.is_integer():
+        return int(text)
+    text = str(text).strip()
+    if not text:
+        return None
+    if re.fullmatch(r"[+-]?\d+", text):
+        return int(text)
+    raise ValueError("'{}' is not a whole number".format(text))
+
+
+def to_real(text):
+    # Like to_amount for REAL columns such as prices
+    if text is None or isinstance(text, (int, float)):
+        return text
+    text = str(text).strip()
+    if not text:
+        return None
+    try:
+        return float(text.replace(",", "."))
+    except ValueError:
+        raise ValueError("'{}' is not a number".format(text)) from None
@@ -0,0 +1,165 @@
+# ##################################################################
+# File name:    query.py
+# Author:       agent
+# Create on:    2026-10-18
+# Description:  Builds search queries from the filled-in entry fields
+# ##################################################################
+
+
+import functools
+
+
+MATCH_ANY = "OR"
+MATCH_ALL = "AND"
+
+
+def parse_filter(text):
+    """
+    Turn the text typed into an entry field into an (operator, values)
+    pair:
+        abc       -> ("=", ("abc",))
+        abc*      -> ("prefix", ("abc",))
+        1..10     -> ("range", ("1", "10"))
+        ..10, 1.. -> ("<=", ("10",)), (">=", ("1",))
+        >=1, >1, <=10, <10 work as expected
+    """
+    text = text.strip()
+    for operator in (">=", "<=", ">", "<"):
+        if text.startswith(operator) and len(text) > len(operator):
+            return operator, (text[len(operator):].strip(),)
+    if ".." in text:
+        low, high = (part.strip() for part in text.split("..", 1))
+        if low and high:
+            return "range", (low, high)
+        if high:
+            return "<=", (high,)
+        if low:
+            return ">=", (low,)
+    if text.endswith("*") and len(text) > 1:
+        return "prefix", (text[:-1],)
+    return "=", (text,)
+
+
+def _prefix_upper_bound(prefix):
+    # Smallest string greater than every string starting with prefix
+    return prefix[:-1] + chr(ord(prefix[-1]) + 1)
+
+
+def condition(column, operator):
+    # The generated SQL only uses operators that SQLite can answer from
+    # an index on the column
+    if operator == "=":
+        return "{} = ?".format(column)
+    if operator == "prefix":
+        return "({0} >= ? AND {0} < ?)".format(column)
+    if operator == "range":
+        return "{} BETWEEN ? AND ?".format(column)
+    if operator in (">=", "<=", ">", "<"):
+        return "{} {} ?".format(column, operator)
+    raise ValueError("unknown search operator: {}".format(operator))
+
+
+def condition_params(operator, values):
+    if operator == "prefix":
+        return [values[0], _prefix_upper_bound(values[0])]
+    return list(values)
+
+
+def parse_filters(filters, numeric=None):
+    """
+    filters is a sequence of (column, text) pairs. Returns a (column,
+    operator, values) term for every filled-in field.
+
+    numeric maps a column to (stored column, convert): when convert()
+    accepts every value of the filter, the numbers are compared with the
+    stored column instead, e.g. Value "1k..10k" -> ValueSI 1000..10000.
+    """
+    terms = []
+    for column, text in filters:
+        if text is None or not str(text).strip():
+            continue
+        operator, values = parse_filter(str(text))
+        if numeric and column in numeric:
+            stored, convert = numeric[column]
+            numbers = numeric_values(text, convert)
+            if numbers is not None:
+                column, values = stored, numbers
+        terms.append((column, operator, values))
+    return terms
+
+
+def numeric_values(text, convert):
+    # The numbers of a filter when convert() accepts all of its values,
+    # else None; a prefix is always compared as text
+    operator, values = parse_filter(str(text))
+    if operator == "prefix":
+        return None
+    numbers = [convert(value) for value in values]
+    return None if None in numbers else numbers
+
+
+@functools.lru_cache(maxsize=256)
+def where_clause(shape, match=MATCH_ANY):
+    # shape is the (column, operator) of every term; the clause does not
+    # depend on the values, so it is only built once per shape
+    if match not in (MATCH_ANY, MATCH_ALL):
+        raise ValueError("match must be 'OR' or 'AND'")
+    return (" {} ".format(match)).join(condition(column, operator)
+                                       for column, operator in shape)
+
+
+def build_where(filters, match=MATCH_ANY, numeric=None):
+    """
+    Returns the WHERE clause (without the keyword) and parameters for
+    filters, see parse_filters, or ("", []) when nothing was filled in.
+    """
+    terms = parse_filters(filters, numeric)
+    params = []
+    for column, operator, values in terms:
+        params.extend(condition_params(operator, values))
+    return where_clause(tuple((column, operator) for column, operator, _ in terms),
+                        match), params
+
+
+def build_search(table, filters, match=MATCH_ANY, columns="rowid, *",
+                 numeric=None):
+    where, params = build_where(filters, match, numeric)
+    if not where:
+        return None, []
+    return "SELECT {} FROM {} WHERE {}".format(columns, table, where), params
+
+
+def keyset(column=None, descending=False, after=None):
+    """
+    Keyset pagination: the (condition, params, order) segments that list
+    rows by column then rowid, starting after the key (value, rowid) of
+    the last row seen, or from the start when after is None. column None
+    lists by rowid. NULL sorts first, as in SQLite, and is listed in a
+    segment of its own so that the other segment can seek in an index on
+    column with a row value comparison.
+    """
+    direction = " DESC" if descending else ""
+    seek = "<" if descending else ">"
+    if column is None:
+        if after is None:
+            return [("", [], "rowid" + direction)]
+        return [("rowid {} ?".format(seek), [after[1]], "rowid" + direction)]
+
+    nulls = ("{} IS NULL".format(column), [], "rowid" + direction)
+    values = ("{} IS NOT NULL".format(column), [],
+              "{0}{1}, rowid{1}".format(column, direction))
+    if after is None:
+        return [values, nulls] if descending else [nulls, values]
+    if after[0] is None:
+        rest = ("{} IS NULL AND rowid {} ?".format(column, seek), [after[1]],
+                "rowid" + direction)
+        return [rest] if descending else [rest, values]
+    rest = ("({}, rowid) {} (?, ?)".format(column, seek), list(after),
+            "{0}{1}, rowid{1}".format(column, direction))
+    return [rest, nulls] if descending else [rest]
+
+
+def explain(conn, sql, params=()):
+    # The "detail" column of EXPLAIN QUERY PLAN, one entry per step
+    rows = conn.execute("EXPLAIN QUERY PLAN " + sql, params).fetchall()
+    return [row[-1] for row in rows]
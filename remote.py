@@ -0,0 +1,472 @@
+# ##################################################################
+# File name:    remote.py
+# Author:       agent
+# Create on:    2026-10-18
+# Description:  Client of the inventory service (server.py): the same
+#               methods as repository.Repository, alerts and ledger, done
+#               over HTTP/JSON, so the window can use a service instead
+#               of the database file
+# ##################################################################
+
+
+import csv
+import http.client
+import io
+import itertools
+import json
+import os
+import sqlite3
+import threading
+from collections import OrderedDict
+from contextlib import contextmanager
+from urllib.parse import quote, urlencode, urlsplit
+
+import changes
+import csv_export
+import duplicates
+import fulltext
+import importer
+import instrumentation
+import ledger
+import query
+import repository
+import schemas
+
+
+TIMEOUT = 60
+# GET results kept with their ETag for conditional requests, only
+# when their body is at most MAX_CACHED_BYTES
+MAX_CACHED = 256
+MAX_CACHED_BYTES = 1024 * 1024
+
+
+# Methods sent again on a new connection when the kept-alive one was
+# closed: a write may have reached the service before the connection
+# broke, and must not be applied twice
+RETRIED = ("GET", "HEAD")
+
+
+class PreconditionFailed(ValueError):
+    # The item changed on the service since it was read
+    pass
+
+
+def _raise(status, body):
+    try:
+        error = json.loads(body.decode("utf-8"))
+    except ValueError:
+        error = {"error": body.decode("utf-8", "replace")}
+    message = error.get("error", "")
+    if error.get("type") == "InsufficientStock":
+        raise ledger.InsufficientStock(error["table"], error["item_id"],
+                                       error["available"], error["requested"])
+    if status == 404:
+        raise LookupError(message)
+    if status == 412:
+        raise PreconditionFailed(message)
+    if status == 503:
+        # Read as a locked database, see connection.is_locked()
+        raise sqlite3.OperationalError("database is locked: {}".format(message))
+    if 400 <= status < 500:
+        raise ValueError(message)
+    raise RuntimeError("inventory service error {}: {}".format(status, message))
+
+
+class ServiceClient:
+    """
+    Sends requests to the service at url, e.g. http://server:8642/,
+    over one kept-alive connection per thread. GET results are kept with
+    their ETag and asked for again with If-None-Match, so an unchanged
+    page costs a 304 without a body. Only GET and HEAD are sent again
+    after a broken connection.
+    """
+
+    def __init__(self, url, timeout=TIMEOUT):
+        parts = urlsplit(url if "//" in url else "http://" + url)
+        self.host = parts.hostname or "127.0.0.1"
+        self.port = parts.port or 80
+        self.prefix = parts.path.rstrip("/")
+        self.timeout = timeout
+        self.not_modified = 0
+        self._local = threading.local()
+        self._cached = OrderedDict()      # target -> (etag, value)
+        self._lock = threading.Lock()
+
+    def _connection(self):
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = self._local.conn = http.client.HTTPConnection(
+                self.host, self.port, timeout=self.timeout)
+        return conn
+
+    def close(self):
+        conn = getattr(self._local, "conn", None)
+        if conn is not None:
+            conn.close()
+            self._local.conn = None
+
+    def target(self, path, params=None):
+        target = self.prefix + path
+        if params:
+            target += "?" + (params if isinstance(params, str) else urlencode(params))
+        return target
+
+    def send(self, method, target, body=None, headers=None):
+        # Returns the open response; for a GET or HEAD a kept-alive
+        # connection the service has closed meanwhile is opened again once
+        headers = dict(headers or {})
+        if isinstance(body, (dict, list)):
+            body = json.dumps(body).encode("utf-8")
+            headers["Content-Type"] = "application/json"
+        attempts = 2 if method in RETRIED else 1
+        for attempt in range(1, attempts + 1):
+            conn = self._connection()
+            try:
+                conn.request(method, target, body, headers)
+                return conn.getresponse()
+            except (http.client.RemoteDisconnected, ConnectionResetError,
+                    BrokenPipeError, http.client.CannotSendRequest):
+                self.close()
+                if attempt == attempts:
+                    raise
+
+    def request(self, method, path, params=None, body=None, headers=None):
+        return self.exchange(method, path, params, body, headers)[0]
+
+    def exchange(self, method, path, params=None, body=None, headers=None):
+        # (JSON answer, ETag) of a request
+        target = self.target(path, params)
+        response = self.send(method, target, body, headers)
+        data = response.read()
+        if response.status >= 400:
+            _raise(response.status, data)
+        return (json.loads(data.decode("utf-8")) if data else None,
+                response.getheader("ETag"))
+
+    def etag(self, path):
+        # The ETag of the kept GET result of path, or None
+        with self._lock:
+            cached = self._cached.get(self.target(path))
+        return cached[0] if cached else None
+
+    def forget(self, path):
+        with self._lock:
+            self._cached.pop(self.target(path), None)
+
+    def get(self, path, params=None):
+        target = self.target(path, params)
+        with self._lock:
+            cached = self._cached.get(target)
+        headers = {"If-None-Match": cached[0]} if cached else {}
+        response = self.send("GET", target, headers=headers)
+        data = response.read()
+        if response.status == 304 and cached:
+            self.not_modified += 1
+            return cached[1]
+        if response.status >= 400:
+            _raise(response.status, data)
+        value = json.loads(data.decode("utf-8"))
+        etag = response.getheader("ETag")
+        if etag is not None and len(data) <= MAX_CACHED_BYTES:
+            self._keep(target, etag, value)
+        return value
+
+    def keep(self, path, etag, value):
+        # Keep value as the GET result of path, e.g. the row a PUT returned
+        self._keep(self.target(path), etag, value)
+
+    def _keep(self, target, etag, value):
+        with self._lock:
+            self._cached[target] = (etag, value)
+            self._cached.move_to_end(target)
+            if len(self._cached) > MAX_CACHED:
+                self._cached.popitem(last=False)
+
+
+def _rows(rows):
+    return [tuple(row) for row in rows]
+
+
+class RemoteRepository:
+    """
+    The methods of repository.Repository that the window uses, served
+    by the service. Filters are the field values themselves, sent as
+    the query string, never SQL: search_filter() returns that query
+    string in place of the WHERE clause.
+    """
+
+    def __init__(self, client, schema):
+        self.client = client
+        self.schema = schema
+        self.path = "/" + schema.table
+        # Building rows, sort keys and filters needs no database
+        self._local = repository.get(schema.key)
+        self.columns = self._local.columns
+        self.stored_columns = self._local.stored_columns
+
+    def values(self, *values, **named):
+        return self._local.values(*values, **named)
+
+    def sort_column(self, section):
+        return self._local.sort_column(section)
+
+    def sort_key(self, row, column):
+        return self._local.sort_key(row, column)
+
+    def search_filter(self, *values, match=query.MATCH_ANY, **named):
+        where, _ = self._local.search_filter(*values, match=match, **named)
+        if not where:
+            return "", ()
+        fields = [(name, value) for name, value in
+                  zip(self.columns, self._local.values(*values, **named))
+                  if value is not None and str(value).strip()]
+        fields.append(("match", "all" if match == query.MATCH_ALL else "any"))
+        return urlencode(fields), ()
+
+    # ========== Reads ========== #
+    @instrumentation.timed()
+    def page(self, where="", params=(), sort=None, descending=False,
+             after=None, before=None, limit=repository.PAGE_SIZE):
+        paging = {"limit": limit}
+        if sort is not None:
+            paging["sort"] = sort
+        if descending:
+            paging["descending"] = 1
+        if after is not None:
+            paging["after"] = json.dumps(list(after))
+        if before is not None:
+            paging["before"] = json.dumps(list(before))
+        return _rows(self.client.get(self.path + "/rows", "&".join(
+            part for part in (where, urlencode(paging)) if part))["rows"])
+
+    @instrumentation.timed()
+    def count(self, where="", params=()):
+        return self.client.get(self.path + "/count", where)["count"]
+
+    @instrumentation.timed()
+    def show_table(self):
+        return _rows(self.client.get(self.path + "/rows", "limit=all")["rows"])
+
+    @instrumentation.timed()
+    def search_rows(self, *values, match=query.MATCH_ANY, **named):
+        where, _ = self.search_filter(*values, match=match, **named)
+        if not where:
+            return []
+        return _rows(self.client.get(self.path + "/rows", where + "&limit=all")["rows"])
+
+    @instrumentation.timed()
+    def search_text(self, text, limit=fulltext.SEARCH_LIMIT):
+        answer = self.client.get(self.path + "/search", {"q": text, "limit": limit})
+        matches = fulltext.Matches(_rows(answer["rows"]))
+        matches.truncated = answer.get("truncated", False)
+        return matches
+
+    def cached_search_text(self, text, limit=fulltext.SEARCH_LIMIT):
+        # Every search asks the service; unchanged results cost a 304
+        return None
+
+    @instrumentation.timed()
+    def search_row(self, id):
+        try:
+            return tuple(self.client.get("{}/rows/{}".format(self.path, quote(str(id))))["row"])
+        except LookupError:
+            return None
+
+    @instrumentation.timed()
+    def category_totals(self):
+        return _rows(self.client.get(self.path + "/categories")["categories"])
+
+    @instrumentation.timed()
+    def totals(self, dimension="Category"):
+        return _rows(self.client.get("{}/totals/{}".format(self.path, quote(dimension)))["totals"])
+
+    # ========== Changes ========== #
+    @instrumentation.timed()
+    def last_change(self):
+        return self.client.request("GET", self.path + "/changes")["seq"]
+
+    @instrumentation.timed()
+    def changes_since(self, since, where="", params=(), wait=None):
+        # See Repository.changes_since(); wait seconds for a change to
+        # come when there is none yet
+        query = {"since": int(since)}
+        if wait:
+            query["wait"] = wait
+        delta = self.client.request("GET", self.path + "/changes", "&".join(
+            part for part in (where, urlencode(query)) if part))
+        if delta.get("reload"):
+            return None
+        return changes.Delta(delta["seq"], _rows(delta["rows"]), delta["inserted"],
+                             delta["deleted"], delta["total"])
+
+    # ========== Duplicates ========== #
+    def _duplicates(self, found):
+        return [(tuple(match["row"]), match["similarity"], match["same_part"])
+                for match in found]
+
+    @instrumentation.timed()
+    def duplicates_of(self, *values, exclude=None, **named):
+        # See Repository.duplicates_of()
+        values = self.values(*values, **named)
+        query = {name: values[self.columns.index(name)] or ""
+                 for name in ("Description", "PartNo")}
+        if exclude is not None:
+            query["exclude"] = int(exclude)
+        answer = self.client.request("GET", self.path + "/duplicates", query)
+        found = duplicates.Matches(self._duplicates(answer["duplicates"]))
+        found.stale = answer.get("stale", False)
+        return found
+
+    @instrumentation.timed()
+    def refresh_duplicates(self, limit=None):
+        # The writes of the service keep the index up to date; this
+        # indexes the changes made by other programs, or rebuilds it
+        return self.client.request("POST", self.path + "/duplicates/refresh")["refreshed"]
+
+    @instrumentation.timed()
+    def find_duplicates(self, progress=None, refresh=True):
+        return [self._duplicates(group) for group in self.client.request(
+            "GET", self.path + "/duplicates/groups")["groups"]]
+
+    @instrumentation.timed()
+    def merge(self, keep, ids):
+        return tuple(self.client.request("POST", self.path + "/merge", body={
+            "keep": int(keep), "ids": [int(id) for id in ids]})["row"])
+
+    # ========== Writes ========== #
+    @instrumentation.timed()
+    def add_row(self, *values, **named):
+        return tuple(self.client.request("POST", self.path + "/rows", body={
+            "values": self.values(*values, **named)})["row"])
+
+    @instrumentation.timed()
+    def update_row(self, id, *values, amount_was=None, **named):
+        # Sent with If-Match when the item was read with search_row(): the
+        # service refuses it with PreconditionFailed when the item changed
+        # since
+        path = "{}/rows/{}".format(self.path, int(id))
+        body = {"values": self.values(*values, **named)}
+        if amount_was is not None:
+            body["amount_was"] = amount_was
+        etag = self.client.etag(path)
+        try:
+            answer, etag = self.client.exchange(
+                "PUT", path, body=body, headers={"If-Match": etag} if etag else None)
+        except LookupError:
+            return None
+        finally:
+            self.client.forget(path)
+        row = tuple(answer["row"])
+        if etag is not None:
+            self.client.keep(path, etag, {"columns": ["id"] + list(self.stored_columns),
+                                          "row": row})
+        return row
+
+    @instrumentation.timed()
+    def delete_row(self, id):
+        try:
+            return self.client.request("DELETE", "{}/rows/{}".format(
+                self.path, int(id)))["deleted"]
+        except LookupError:
+            return None
+
+    @instrumentation.timed()
+    def delete_rows(self, ids):
+        return self.client.request("POST", self.path + "/rows/delete",
+                                   body={"ids": [int(id) for id in ids]})["deleted"]
+
+    @instrumentation.timed()
+    def update_rows(self, ids, **changes):
+        return _rows(self.client.request("POST", self.path + "/rows/update", body={
+            "ids": [int(id) for id in ids], "changes": changes})["rows"])
+
+    # ========== Files ========== #
+    @instrumentation.timed()
+    def to_csv(self, path=None, compress=None, progress=None):
+        # The CSV of the service, written like csv_export.export_csv()
+        path = path or "{}_inventory.csv".format(self.schema.table)
+        if compress is None:
+            compress = path.endswith(".gz")
+        response = self.client.send("GET", self.client.target(self.path + "/export"))
+        if response.status >= 400:
+            _raise(response.status, response.read())
+        reader = csv.reader(io.TextIOWrapper(response, encoding="utf-8", newline=""))
+        header = next(reader, [])
+        batches = iter(lambda: list(itertools.islice(reader, csv_export.BATCH_SIZE)), [])
+        return csv_export.write_csv(header, batches, path, compress, progress)
+
+    @instrumentation.timed()
+    def import_file(self, path, progress=None):
+        with open(path, "rb") as f:
+            data = f.read()
+        summary = self.client.request("POST", self.path + "/import",
+                                      {"name": os.path.basename(path)}, body=data)
+        result = importer.ImportResult()
+        result.imported = summary["imported"]
+        result.rejected_count = summary["rejected_count"]
+        result.rejected = [importer.Rejected(*rejected) for rejected in summary["rejected"]]
+        return result
+
+
+class ServiceBackend:
+    """
+    What the window needs besides the repositories, from the service;
+    see backends.FileBackend for the same on the database file.
+    """
+
+    def __init__(self, url):
+        self.url = url
+        self.client = ServiceClient(url)
+        self._repositories = {}
+
+    def repository(self, key):
+        repo = self._repositories.get(key)
+        if repo is None:
+            repo = self._repositories[key] = RemoteRepository(self.client, schemas.SCHEMAS[key])
+        return repo
+
+    @instrumentation.timed()
+    def low_stock(self, key=None):
+        return _rows(self.client.get("/alerts", {"department": key} if key else None)["alerts"])
+
+    @instrumentation.timed()
+    def set_category_threshold(self, key, category, threshold):
+        self.client.request("PUT", "/{}/thresholds".format(schemas.stock_schema(key).table),
+                            body={"category": category, "threshold": threshold})
+
+    @instrumentation.timed()
+    def set_item_threshold(self, key, item_id, threshold):
+        self.client.request("PUT", "/{}/thresholds".format(schemas.stock_schema(key).table),
+                            body={"item": int(item_id), "threshold": threshold})
+
+    @instrumentation.timed()
+    def thresholds(self, key):
+        return _rows(self.client.get("/{}/thresholds".format(
+            schemas.stock_schema(key).table))["thresholds"])
+
+    @instrumentation.timed()
+    def move(self, key, movements, note=""):
+        return self.client.request("POST", "/{}/movements".format(
+            schemas.stock_schema(key).table), body={
+                "movements": [[int(id), int(quantity)] for id, quantity in movements],
+                "note": note})["amounts"]
+
+    @instrumentation.timed()
+    def history(self, key, item_id, limit=100):
+        return _rows(self.client.get("/{}/movements/{}".format(
+            schemas.stock_schema(key).table, int(item_id)), {"limit": limit})["movements"])
+
+    @instrumentation.timed()
+    def department_totals(self):
+        return _rows(self.client.get("/summary")["departments"])
+
+    def changes(self, key, since, where="", params=()):
+        return self.repository(key).changes_since(since, where, params)
+
+    @contextmanager
+    def snapshot(self):
+        # Every request is answered from one state of the database
+        yield
+
+    def close(self):
+        self.client.close()
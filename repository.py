@@ -0,0 +1,536 @@
+# ##################################################################
+# File name:    repository.py
+# Author:       agent
+# Create on:    2026-10-18
+# Description:  Database access for every department declared in
+#               schemas.py, with its SQL built once per table
+# ##################################################################
+
+
+from collections.abc import Mapping
+from contextlib import contextmanager
+
+import cache
+import changes
+import connection
+import csv_export
+import duplicates
+import fulltext
+import importer
+import instrumentation
+import ledger
+import quantities
+import query
+import schemas
+import summaries
+
+
+# Rows per page of the inventory grid
+PAGE_SIZE = 500
+# The rowids of a bulk change, see _select_ids()
+BULK_IDS = "SELECT id FROM temp.bulk_ids"
+
+# How a typed-in field is stored in a column of each type
+CONVERTERS = {
+    "INTEGER": quantities.to_amount,
+    "REAL": quantities.to_real,
+}
+
+
+class Repository:
+    """
+    Reads and writes the rows of one schema. Rows are returned as
+    (rowid, *columns, *derived columns); the statements are built in the
+    constructor, so the sqlite3 statement cache can reuse them.
+    """
+
+    def __init__(self, schema):
+        self.schema = schema
+        table = schema.table
+        self.columns = schema.names
+        self.stored_columns = self.columns + tuple(
+            derived.name for derived in schema.derived)
+        self._converters = tuple(CONVERTERS.get(column.type)
+                                 for column in schema.columns)
+        # (derived, positions of its sources in a row of columns)
+        self._derived = tuple((derived, tuple(self.columns.index(source)
+                                              for source in derived.sources))
+                              for derived in schema.derived)
+        self._numeric_sources = {derived.sources[0]: (derived, positions)
+                                 for derived, positions in self._derived}
+
+        self.select_columns = "rowid, " + ", ".join(self.stored_columns)
+        self._select = "SELECT {} FROM {}".format(self.select_columns, table)
+        self._select_row = self._select + " WHERE rowid=?"
+        self._insert = "INSERT INTO {} ({}) VALUES ({})".format(
+            table, ", ".join(self.stored_columns),
+            ", ".join("?" * len(self.stored_columns)))
+        self._update = "UPDATE {} SET {} WHERE rowid=?".format(
+            table, ", ".join(name + "=?" for name in self.stored_columns))
+        self._delete = "DELETE FROM {} WHERE rowid=?".format(table)
+        if schema.stock:
+            # Every column but Amount, which changes by stock movements
+            self._amount = self.stored_columns.index("Amount")
+            self._update_details = "UPDATE {} SET {} WHERE rowid=?".format(
+                table, ", ".join(name + "=?" for name in self.stored_columns
+                                 if name != "Amount"))
+        # WHERE clause -> full search statement
+        self._searches = {}
+        # Changed columns of update_rows() -> UPDATE statement
+        self._bulk_updates = {}
+        self._fts_sources = set(fulltext.source_columns(schema.fts_columns))
+        self._tables = tuple(other.table for other in schemas.SCHEMAS.values())
+
+    # ========== Rows ========== #
+    def values(self, *values, **named):
+        """
+        The form fields in column order, given positionally or by column
+        name; missing fields are empty.
+        """
+        if len(values) == 1 and isinstance(values[0], Mapping):
+            named, values = dict(values[0], **named), ()
+        row = list(values) + [""] * (len(self.columns) - len(values))
+        for name, value in named.items():
+            row[self.columns.index(name)] = value
+        return tuple(row[:len(self.columns)])
+
+    def prepare(self, values):
+        # Typed values of a row of columns for the stored columns
+        row = tuple(value if convert is None else convert(value)
+                    for convert, value in zip(self._converters, values))
+        return row + tuple(derived.compute(*(values[i] for i in positions))
+                           for derived, positions in self._derived)
+
+    # ========== Schema ========== #
+    @instrumentation.timed()
+    def rebuild_fts(self):
+        with connection.transaction() as c:
+            fulltext.rebuild(c, self.schema.table, self.schema.fts_columns)
+
+    # ========== Writes ========== #
+    @contextmanager
+    def _writing(self):
+        # A write transaction that also indexes the descriptions it
+        # changes, so duplicates_of() only reads, see duplicates.indexing()
+        with cache.invalidating(self.schema.table) as c:
+            with duplicates.indexing(c, self.schema.table, self._tables):
+                yield c
+
+    @instrumentation.timed()
+    def add_row(self, *values, **named):
+        # Return the new row as it would be read back from the table
+        row = self.prepare(self.values(*values, **named))
+        with self._writing() as c:
+            c.execute(self._insert, row)
+            return (c.lastrowid,) + row
+
+    @instrumentation.timed()
+    def add_rows(self, rows):
+        with cache.invalidating(self.schema.table) as c:
+            with fulltext.bulk_load(c, self.schema.table, self.schema.fts_columns), \
+                    duplicates.bulk_load(c, self.schema.table, self._tables):
+                c.executemany(self._insert,
+                              (self.prepare(self.values(*row)) for row in rows))
+
+    @instrumentation.timed()
+    def import_file(self, path, progress=None):
+        # Imports a CSV or XLSX file in one transaction, see importer.py
+        with cache.invalidating(self.schema.table) as c:
+            with fulltext.bulk_load(c, self.schema.table, self.schema.fts_columns), \
+                    duplicates.bulk_load(c, self.schema.table, self._tables):
+                return importer.import_rows(c, self.schema.table, self.columns,
+                                            importer.read_rows(path),
+                                            progress=progress,
+                                            prepare=self.prepare,
+                                            insert_columns=self.stored_columns)
+
+    @instrumentation.timed()
+    def update_row(self, id, *values, amount_was=None, **named):
+        """
+        Return the updated row, or None if the rowid does not exist.
+        In stock departments the Amount changes only by stock movements
+        (see ledger.py): amount_was is the Amount the form was filled
+        with, and a changed Amount is recorded as a movement of the
+        difference, so movements made meanwhile by others are kept.
+        Without amount_was the Amount must be left as it is.
+        """
+        row = self.prepare(self.values(*values, **named))
+        with self._writing() as c:
+            if not self.schema.stock:
+                c.execute(self._update, row + (int(id),))
+                if c.rowcount:
+                    return (int(id),) + row
+                return None
+            amount = row[self._amount]
+            c.execute(self._update_details,
+                      row[:self._amount] + row[self._amount + 1:] + (int(id),))
+            if not c.rowcount:
+                return None
+            if amount_was is None and amount is not None:
+                stored = c.execute("SELECT Amount FROM {} WHERE rowid=?".format(
+                    self.schema.table), (int(id),)).fetchone()[0]
+                if amount != stored:
+                    raise ValueError("the Amount of item {} is {}: look the item up "
+                                     "before changing it, or check items in or out"
+                                     .format(id, stored))
+            elif amount is not None and amount != amount_was:
+                ledger.apply(c, self.schema.table, id, amount - amount_was,
+                             "adjusted in the form")
+            return c.execute(self._select_row, (int(id),)).fetchone()
+
+    @instrumentation.timed()
+    def delete_row(self, id):
+        # Return the rowid of the removed row, or None if nothing was removed
+        with self._writing() as c:
+            c.execute(self._delete, (id,))
+            if c.rowcount:
+                return int(id)
+
+    def _select_ids(self, cursor, ids):
+        # Keep ids in a temporary table of this connection for
+        # "rowid IN (BULK_IDS)", which has no limit on the number of ids
+        cursor.execute("CREATE TEMP TABLE IF NOT EXISTS bulk_ids (id INTEGER PRIMARY KEY)")
+        cursor.execute("DELETE FROM temp.bulk_ids")
+        cursor.executemany("INSERT OR IGNORE INTO temp.bulk_ids VALUES (?)",
+                           ((int(id),) for id in ids))
+
+    @instrumentation.timed()
+    def delete_rows(self, ids):
+        # Delete many rows in one transaction; returns the rowids removed
+        table = self.schema.table
+        with self._writing() as c:
+            self._select_ids(c, ids)
+            removed = [row[0] for row in c.execute(
+                "SELECT rowid FROM {} WHERE rowid IN ({})".format(table, BULK_IDS))]
+            self._delete_selected(c)
+        return removed
+
+    def _delete_selected(self, cursor):
+        # Delete the rows of _select_ids()
+        table = self.schema.table
+        with fulltext.bulk_change(cursor, table, self.schema.fts_columns, BULK_IDS):
+            cursor.execute("DELETE FROM {} WHERE rowid IN ({})".format(table, BULK_IDS))
+
+    @instrumentation.timed()
+    def update_rows(self, ids, **changes):
+        """
+        Set the named columns of many rows to the same values, e.g.
+        Cabinet="B7", in one transaction. Derived columns are recomputed
+        per row. Returns the updated rows.
+        """
+        unknown = set(changes) - set(self.columns)
+        if unknown:
+            raise ValueError("unknown columns: {}".format(", ".join(sorted(unknown))))
+        if self.schema.stock and "Amount" in changes:
+            raise ValueError("amounts in stock change by stock movements, see ledger.py")
+        # Only the changed columns are written, so e.g. the low-stock
+        # triggers on Amount and Category do not run for a new Cabinet
+        names = tuple(name for name in self.columns if name in changes) + tuple(
+            derived.name for derived in self.schema.derived
+            if set(derived.sources) & set(changes))
+        positions = [self.stored_columns.index(name) for name in names]
+        sql = self._bulk_updates.get(names)
+        if sql is None:
+            sql = self._bulk_updates[names] = "UPDATE {} SET {} WHERE rowid=?".format(
+                self.schema.table, ", ".join(name + "=?" for name in names))
+        table = self.schema.table
+        with self._writing() as c:
+            self._select_ids(c, ids)
+            rows = [(row[0],) + self.prepare(self.values(
+                        *row[1:1 + len(self.columns)], **changes))
+                    for row in c.execute("{} WHERE rowid IN ({})".format(self._select, BULK_IDS))]
+            new_values = (tuple(row[1 + i] for i in positions) + (row[0],) for row in rows)
+            if self._fts_sources.isdisjoint(names):
+                c.executemany(sql, new_values)
+            else:
+                with fulltext.bulk_change(c, table, self.schema.fts_columns, BULK_IDS):
+                    c.executemany(sql, new_values)
+        return rows
+
+    # ========== Reads ========== #
+    @instrumentation.timed()
+    def search_row(self, id):
+        with connection.connection() as conn:
+            return conn.execute(self._select_row, (id,)).fetchone()
+
+    @instrumentation.timed()
+    def show_table(self):
+        # Served from memory until the table changes, see cache.py
+        return cache.rows(self.schema.table, self._load_table)
+
+    @instrumentation.timed()
+    def _load_table(self):
+        with connection.connection() as conn:
+            return conn.execute(self._select).fetchall()
+
+    def _numeric_filters(self, values):
+        # Filters on the source of a derived column compare the derived
+        # numbers, e.g. Value "1k..10k" with the typed Unit -> ValueSI
+        numeric = {}
+        for column, (derived, positions) in self._numeric_sources.items():
+            others = [values[i] for i in positions[1:]]
+            numeric[column] = (derived.name, lambda text, derived=derived, others=others:
+                               derived.compute(text, *others))
+        return numeric
+
+    def search_filter(self, *values, match=query.MATCH_ANY, **named):
+        # WHERE clause and parameters of the filled-in fields, see page()
+        values = list(self.values(*values, **named))
+        numeric = self._numeric_filters(values)
+        # A Unit only qualifies a Value compared in SI units, so 10 kΩ
+        # also finds 10000 Ω; it is not a filter of its own then
+        for column, (derived, positions) in self._numeric_sources.items():
+            text = values[positions[0]]
+            if text and str(text).strip() and query.numeric_values(
+                    text, numeric[column][1]) is not None:
+                for i in positions[1:]:
+                    values[i] = ""
+        return query.build_where(zip(self.columns, values), match, numeric)
+
+    @instrumentation.timed()
+    def search_rows(self, *values, match=query.MATCH_ANY, **named):
+        # Only the filled-in fields are searched; match picks OR or AND
+        where, params = self.search_filter(*values, match=match, **named)
+        if not where:
+            return []
+        # where is shared by all searches of the same shape, see query.where_clause
+        sql = self._searches.get(where)
+        if sql is None:
+            sql = self._searches[where] = "{} WHERE {}".format(self._select, where)
+        with connection.connection() as conn:
+            return conn.execute(sql, params).fetchall()
+
+    # ========== Pages ========== #
+    def sort_column(self, section):
+        # The stored column a grid column is sorted by, None for rowid
+        if section <= 0:
+            return None
+        section = self.schema.sort_columns().get(section, section)
+        return self.stored_columns[section - 1]
+
+    def sort_key(self, row, column):
+        # The keyset position of a row, see query.keyset
+        if column is None:
+            return (None, row[0])
+        return (row[1 + self.stored_columns.index(column)], row[0])
+
+    @instrumentation.timed()
+    def page(self, where="", params=(), sort=None, descending=False,
+             after=None, before=None, limit=PAGE_SIZE):
+        """
+        One page of the rows matching where (all rows when empty) in the
+        order of the sort column, then rowid. The page starts after the
+        sort_key() `after`, or ends before `before`, so the cost does not
+        grow with the position in the table.
+        """
+        key = ("page", where, tuple(params), sort, descending, after, before, limit)
+        return cache.value(self.schema.table, key, lambda: self._load_page(
+            where, list(params), sort, descending, after, before, limit))
+
+    @instrumentation.timed()
+    def _load_page(self, where, params, sort, descending, after, before, limit):
+        if before is not None:
+            # The previous page is read backwards from its end
+            return self._load_page(where, params, sort, not descending,
+                                   before, None, limit)[::-1]
+        rows = []
+        with connection.connection() as conn:
+            for condition, args, order in query.keyset(sort, descending, after):
+                clause = " AND ".join("({})".format(part) for part in (where, condition)
+                                      if part)
+                sql = self._select + (" WHERE " + clause if clause else "") + \
+                    " ORDER BY {} LIMIT ?".format(order)
+                rows.extend(conn.execute(sql, params + args + [limit - len(rows)]))
+                if len(rows) >= limit:
+                    break
+        return rows
+
+    @instrumentation.timed()
+    def count(self, where="", params=()):
+        if where:
+            sql = "SELECT count(*) FROM {} WHERE {}".format(self.schema.table, where)
+        else:
+            # Every item is in the Category totals, see summaries.py
+            sql = ("SELECT IFNULL(sum(Items), 0) FROM summaries "
+                   "WHERE TableName='{}' AND Dimension='Category'".format(self.schema.table))
+        params = tuple(params)
+
+        def load():
+            with connection.connection() as conn:
+                return conn.execute(sql, params).fetchone()[0]
+        return cache.value(self.schema.table, ("count", where, params), load)
+
+    @instrumentation.timed()
+    def totals(self, dimension="Category"):
+        """
+        [(value, items, total Amount)] per value of the column dimension,
+        e.g. Cabinet (see summaries.DIMENSIONS), None for the items
+        without one. Read from the summaries kept by triggers, so it
+        costs the same on a million items.
+        """
+        if dimension not in summaries.dimensions(self.schema):
+            raise ValueError("{} has no totals per {}".format(self.schema.key, dimension))
+        table = self.schema.table
+
+        def load():
+            with connection.connection() as conn:
+                return [(name or None, items, amount) for name, items, amount
+                        in summaries.totals(conn, table, dimension)]
+        return cache.value(table, ("totals", dimension), load)
+
+    def category_totals(self):
+        # [(Category, items, total Amount)]
+        return self.totals("Category")
+
+    @instrumentation.timed()
+    def search_text(self, text, limit=fulltext.SEARCH_LIMIT):
+        # Ranked keyword search, e.g. "10k 0603" or "M3 hex"; recent
+        # results are kept in the table cache
+        def load():
+            with connection.connection() as conn:
+                return fulltext.search(conn, self.schema.table, text, limit,
+                                       columns=self.stored_columns)
+        return cache.value(self.schema.table, _text_key(text, limit), load)
+
+    def cached_search_text(self, text, limit=fulltext.SEARCH_LIMIT):
+        # The cached result of search_text(), or None when it has to run
+        return cache.get(self.schema.table, _text_key(text, limit))
+
+    # ========== Duplicates ========== #
+    def _rows_of(self, conn, ids):
+        # id -> row of the ids that exist
+        self._select_ids(conn, ids)
+        return {row[0]: row for row in conn.execute(
+            "{} WHERE rowid IN ({})".format(self._select, BULK_IDS))}
+
+    @instrumentation.timed()
+    def duplicates_of(self, *values, exclude=None, **named):
+        """
+        The items that look like the part of the form values, e.g. before
+        adding it: [(row, similarity, same part number)], the most
+        similar first, see duplicates.py. Only reads: the description
+        index is kept up to date by the writes, and the result is stale
+        when it missed changes; refresh_duplicates() rebuilds it then.
+        """
+        values = self.values(*values, **named)
+        description = values[self.columns.index("Description")]
+        part_no = values[self.columns.index("PartNo")]
+        with connection.snapshot() as conn:
+            found = duplicates.matches(conn, self.schema.table, description, part_no,
+                                       None if exclude is None else int(exclude))
+            rows = [(conn.execute(self._select_row, (id,)).fetchone(), score, same)
+                    for id, score, same in found]
+            result = duplicates.Matches(match for match in rows if match[0] is not None)
+            result.stale = duplicates.stale(conn, self.schema.table)
+        return result
+
+    @instrumentation.timed()
+    def refresh_duplicates(self, limit=None):
+        # Index the descriptions changed since the last refresh, e.g. by
+        # other programs, see duplicates.refresh(); nothing is locked
+        # when none changed
+        table = self.schema.table
+        with connection.connection() as conn:
+            if not duplicates.behind(conn, table):
+                return 0
+        with connection.transaction() as c:
+            return duplicates.refresh(c, table, limit)
+
+    @instrumentation.timed()
+    def find_duplicates(self, progress=None, refresh=True):
+        """
+        Every group of items that look like one part, as lists of
+        (row, similarity to the first row, same part number) starting
+        with the oldest item.
+        """
+        if refresh:
+            self.refresh_duplicates()
+        with connection.snapshot() as conn:
+            groups = duplicates.groups(conn, self.schema.table, progress)
+            rows = self._rows_of(conn, [id for group in groups for id, _, _ in group])
+        return [[(rows[id], score, same) for id, score, same in group if id in rows]
+                for group in groups]
+
+    @instrumentation.timed()
+    def merge(self, keep, ids):
+        """
+        Merge the items ids into the item keep, e.g. the duplicates of a
+        part, in one transaction: their amounts in stock are moved to
+        keep as stock movements (see ledger.py), then they are deleted.
+        Returns the kept row.
+        """
+        keep = int(keep)
+        ids = sorted({int(id) for id in ids} - {keep})
+        table = self.schema.table
+        with self._writing() as c:
+            if c.execute(self._select_row, (keep,)).fetchone() is None:
+                raise LookupError("no item {} in {}".format(keep, table))
+            self._select_ids(c, ids)
+            merged = c.execute("SELECT rowid, Amount FROM {} WHERE rowid IN ({})"
+                               .format(table, BULK_IDS)).fetchall()
+            if self.schema.stock:
+                for id, amount in merged:
+                    if amount and amount > 0:
+                        ledger.apply(c, table, id, -amount, "merged into item {}".format(keep))
+                        ledger.apply(c, table, keep, amount, "merged from item {}".format(id))
+            self._delete_selected(c)
+            return c.execute(self._select_row, (keep,)).fetchone()
+
+    # ========== Changes ========== #
+    @instrumentation.timed()
+    def last_change(self):
+        # The change log seq of the rows read now, see changes_since()
+        with connection.connection() as conn:
+            return changes.latest(conn)
+
+    @instrumentation.timed()
+    def changes_since(self, since, where="", params=(), limit=changes.LIMIT):
+        """
+        What changed in the table after the change log seq since, as a
+        changes.Delta: the current rows of the changed items that match
+        where, and as deleted the items removed or no longer matching.
+        total is the new count of a where, None without one. Returns
+        None when the caller has to reload instead, see changes.since().
+        """
+        with connection.snapshot() as conn:
+            seq, items = changes.since(conn, self.schema.table, since, limit)
+            if items is None:
+                return None
+            if not items:
+                return changes.Delta(seq, [], [], [], None)
+            self._select_ids(conn, items)
+            sql = "{} WHERE rowid IN ({})".format(self._select, BULK_IDS)
+            if where:
+                sql += " AND ({})".format(where)
+            rows = conn.execute(sql, list(params)).fetchall()
+            found = {row[0] for row in rows}
+            inserted = [row[0] for row in rows if not items[row[0]][0]]
+            deleted = [item for item, (existed, exists) in items.items()
+                       if item not in found and (existed or exists)]
+            total = self.count(where, params) if where else None
+        return changes.Delta(seq, rows, inserted, deleted, total)
+
+    @instrumentation.timed()
+    def to_csv(self, path=None, compress=None, progress=None):
+        # Streams the table to path (gzipped for *.gz) and returns the row count
+        path = path or "{}_inventory.csv".format(self.schema.table)
+        with connection.connection() as conn:
+            return csv_export.export_table(conn, self.schema.table, path, compress,
+                                           progress=progress, columns=self.columns)
+
+
+def _text_key(text, limit):
+    # Keyword searches are case-insensitive and ignore extra spaces
+    return ("text", " ".join(text.lower().split()), limit)
+
+
+_repositories = {}
+
+
+def get(key):
+    # The repository of a department key such as "ELECTRONICS"
+    repository = _repositories.get(key)
+    if repository is None:
+        repository = _repositories[key] = Repository(schemas.SCHEMAS[key])
+    return repository
+
@@ -0,0 +1,147 @@
+# ##################################################################
+# File name:    schemas.py
+# Author:       agent
+# Create on:    2026-10-18
+# Description:  Declares the inventory departments: table, typed columns,
+#               and full-text columns of each; the tables themselves
+#               are created by migrations.py
+# ##################################################################
+
+
+from collections import OrderedDict, namedtuple
+
+import quantities
+
+
+# type is the SQLite column type; label and header are shown in the entry
+# form and the grid. choices turns the field into a combo box; with
+# depends it is a dict from the value of that column to the choices.
+Column = namedtuple("Column", "name type label header choices depends",
+                    defaults=("TEXT", None, None, None, None))
+
+# A hidden column computed from others on every write, e.g. ValueSI
+# from Value and Unit. It also answers the searches on its first source
+# column: compute(text, *other sources) turns the typed filter into the
+# stored number.
+Derived = namedtuple("Derived", "name type sources compute")
+
+
+class Schema:
+    def __init__(self, key, table, columns, details=("Category",), derived=(), stock=True):
+        self.key = key
+        self.table = table
+        # Amount is the quantity in stock, watched by the low-stock alerts
+        self.stock = stock
+        self.columns = tuple(columns)
+        self.names = tuple(column.name for column in self.columns)
+        self.derived = tuple(derived)
+        # Description, PartNo and Notes are indexed for full-text search
+        # as they are, the details columns are joined into one
+        self.fts_columns = _fts_columns(details)
+
+    def headers(self):
+        return ("Item id",) + tuple(column.header or column.label or column.name
+                                    for column in self.columns)
+
+    def sort_columns(self):
+        # Grid column -> row element it sorts by: a source column sorts by
+        # the hidden derived value at the end of the row
+        hidden = 1 + len(self.columns)
+        return {1 + self.names.index(derived.sources[0]): hidden + i
+                for i, derived in enumerate(self.derived)}
+
+
+def _fts_columns(details):
+    # A tuple in details is joined without spaces, e.g. Value and Unit
+    parts = []
+    for part in details:
+        if isinstance(part, str):
+            part = (part,)
+        parts.append(" || ".join("IFNULL({{row}}.{}, '')".format(name)
+                                 for name in part))
+    return {
+        "Description": "IFNULL({row}.Description, '')",
+        "PartNo": "IFNULL({row}.PartNo, '')",
+        "Details": " || ' ' || ".join(parts),
+        "Notes": "IFNULL({row}.Notes, '')",
+    }
+
+
+AMOUNT = Column("Amount", "INTEGER", "In stock amount", "Amount")
+
+ELECTRONICS = Schema(
+    "ELECTRONICS", "electronics",
+    (Column("Description", label="Description"),
+     Column("PartNo", label="Manufacturer part number",
+            header="Manufacture Part No."),
+     Column("Category", label="Category",
+            choices=tuple(quantities.CATEGORY_UNITS)),
+     Column("Package", label="Package"),
+     Column("Value", label="Value"),
+     Column("Unit", label="Unit", choices=quantities.CATEGORY_UNITS,
+            depends="Category"),
+     Column("Cabinet", label="Cabinet"),
+     AMOUNT,
+     Column("Notes", label="Notes")),
+    details=("Category", "Package", ("Value", "Unit")),
+    derived=(Derived("ValueSI", "REAL", ("Value", "Unit"), quantities.to_si),))
+
+MECHANICS = Schema(
+    "MECHANICS", "mechanics",
+    (Column("Description", label="Description"),
+     Column("PartNo", label="Manufacturer part number",
+            header="Manufacture Part No."),
+     Column("Category", label="Category",
+            choices=("Screws and screw headers", "3D printing filament",
+                     "Tools", "Misc")),
+     Column("Cabinet", label="Cabinet"),
+     AMOUNT,
+     Column("Notes", label="Notes")))
+
+QUALITY = Schema(
+    "QUALITY", "quality",
+    (Column("Description", label="Description"),
+     Column("PartNo", label="Manufacturer part number",
+            header="Manufacture Part No."),
+     Column("Category", label="Category",
+            choices=("Measurement instruments", "Calibration standards",
+                     "Test fixtures", "Misc")),
+     Column("SerialNo", label="Serial number", header="Serial No."),
+     Column("CalibrationDue", label="Calibration due (YYYY-MM-DD)",
+            header="Calibration due"),
+     Column("Cabinet", label="Cabinet"),
+     AMOUNT,
+     Column("Notes", label="Notes")))
+
+SOURCING = Schema(
+    "SOURCING", "sourcing",
+    (Column("Description", label="Description"),
+     Column("PartNo", label="Manufacturer part number",
+            header="Manufacture Part No."),
+     Column("Category", label="Category",
+            choices=("Electronics", "Mechanics", "Consumables", "Misc")),
+     Column("Supplier", label="Supplier"),
+     Column("SupplierPartNo", label="Supplier part number",
+            header="Supplier Part No."),
+     Column("UnitPrice", "REAL", "Unit price", "Unit price"),
+     Column("LeadTime", "INTEGER", "Lead time (days)", "Lead time"),
+     Column("Amount", "INTEGER", "Order amount", "Order amount"),
+     Column("Notes", label="Notes")),
+    details=("Category", "Supplier", "SupplierPartNo"),
+    stock=False)
+
+# In the order of the department selector
+SCHEMAS = OrderedDict((schema.key, schema) for schema in
+                      (ELECTRONICS, MECHANICS, QUALITY, SOURCING))
+
+
+def stock_schemas():
+    # The departments whose Amount is the quantity in stock
+    return [schema for schema in SCHEMAS.values() if schema.stock]
+
+
+def stock_schema(key):
+    schema = SCHEMAS[key.upper()]
+    if not schema.stock:
+        raise ValueError("{} does not keep stock".format(schema.key))
+    return schema
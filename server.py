@@ -0,0 +1,712 @@
+# ##################################################################
+# File name:    server.py
+# Author:       agent
+# Create on:    2026-10-18
+# Description:  Optional inventory service: one program owns inventory.db
+#               and the workstations use it over HTTP/JSON instead of
+#               opening the file over the network. Writes run on a
+#               single writer thread, reads on a pool of reader threads.
+# ##################################################################
+
+
+import argparse
+import asyncio
+import functools
+import hashlib
+import json
+import os
+import shutil
+import sys
+import tempfile
+import traceback
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import parse_qs, urlencode, urlsplit
+
+import alerts
+import cache
+import connection
+import csv_export
+import ledger
+import migrations
+import query
+import repository
+import schemas
+import summaries
+
+
+HOST = "127.0.0.1"
+PORT = 8642
+READERS = connection.POOL_SIZE
+# Rows per page of a list; a list with limit=all is streamed in pages
+# of STREAM_PAGE rows
+MAX_LIMIT = 5000
+STREAM_PAGE = 2000
+MAX_BODY = 256 * 1024 * 1024
+# Longest wait of a long-polling request for changes, and how often the
+# table is looked at meanwhile
+MAX_WAIT = 30
+WAIT_POLL = 0.2
+MAX_HEADERS = 100
+
+REASONS = {200: "OK", 201: "Created", 204: "No Content", 304: "Not Modified",
+           400: "Bad Request", 404: "Not Found", 405: "Method Not Allowed",
+           409: "Conflict", 411: "Length Required", 412: "Precondition Failed",
+           413: "Payload Too Large", 500: "Internal Server Error",
+           503: "Service Unavailable"}
+
+
+class HTTPError(Exception):
+    def __init__(self, status, message, **details):
+        super(HTTPError, self).__init__(message)
+        self.status = status
+        self.details = details
+
+
+class Request:
+    __slots__ = ("method", "path", "query", "headers", "body", "version")
+
+    def __init__(self, method, target, version, headers, body):
+        parts = urlsplit(target)
+        self.method = method
+        self.path = [part for part in parts.path.split("/") if part]
+        self.query = {name: values[-1] for name, values in
+                      parse_qs(parts.query, keep_blank_values=True).items()}
+        self.version = version
+        self.headers = headers
+        self.body = body
+
+    def json(self):
+        try:
+            return json.loads(self.body.decode("utf-8")) if self.body else {}
+        except ValueError:
+            raise HTTPError(400, "the body is not JSON") from None
+
+    def keep_alive(self):
+        connection_header = self.headers.get("connection", "").lower()
+        if self.version == "HTTP/1.0":
+            return connection_header == "keep-alive"
+        return connection_header != "close"
+
+
+class Response:
+    # body is bytes, or an async iterator of bytes that is sent chunked
+    __slots__ = ("status", "body", "headers")
+
+    def __init__(self, status=200, body=b"", headers=None):
+        self.status = status
+        self.body = body
+        self.headers = headers or {}
+
+
+def _json(value, status=200, etag=None):
+    headers = {"Content-Type": "application/json"}
+    if etag is not None:
+        headers["ETag"] = etag
+    return Response(status, json.dumps(value, ensure_ascii=False).encode("utf-8"), headers)
+
+
+def _save(path, data):
+    with open(path, "wb") as f:
+        f.write(data)
+
+
+def _error(error):
+    if isinstance(error, HTTPError):
+        return _json(dict(error=str(error), **error.details), error.status)
+    if isinstance(error, ledger.InsufficientStock):
+        return _json({"error": str(error), "type": "InsufficientStock",
+                      "table": error.table, "item_id": error.item_id,
+                      "available": error.available, "requested": error.requested}, 409)
+    if isinstance(error, LookupError):
+        return _json({"error": str(error), "type": "LookupError"}, 404)
+    if isinstance(error, ValueError):
+        return _json({"error": str(error), "type": "ValueError"}, 400)
+    if connection.is_locked(error):
+        return _json({"error": str(error), "type": "Busy"}, 503)
+    return _json({"error": str(error), "type": type(error).__name__}, 500)
+
+
+class InventoryService:
+    """
+    Routes the HTTP requests to the database modules. Every write goes
+    to the one writer thread, so writes never wait for each other's
+    locks; reads run on `readers` threads at the same time. GETs carry
+    an ETag from cache.version() and answer 304 to a matching
+    If-None-Match.
+    """
+
+    def __init__(self, readers=READERS):
+        self.readers = ThreadPoolExecutor(readers, thread_name_prefix="reader")
+        self.writer = ThreadPoolExecutor(1, thread_name_prefix="writer")
+        # ETags of an earlier run of the server must never match
+        self.boot = uuid.uuid4().hex[:8]
+        self.tables = {schema.table: schema for schema in schemas.SCHEMAS.values()}
+        self.routes = {
+            ("GET", ()): self.index,
+            ("GET", ("alerts",)): self.alerts,
+            ("GET", ("summary",)): self.department_totals,
+            ("GET", ("*", "rows")): self.rows,
+            ("POST", ("*", "rows")): self.add_row,
+            ("GET", ("*", "rows", "*")): self.row,
+            ("PUT", ("*", "rows", "*")): self.update_row,
+            ("DELETE", ("*", "rows", "*")): self.delete_row,
+            ("POST", ("*", "rows", "delete")): self.delete_rows,
+            ("POST", ("*", "rows", "update")): self.update_rows,
+            ("GET", ("*", "count")): self.count,
+            ("GET", ("*", "search")): self.search_text,
+            ("GET", ("*", "categories")): self.category_totals,
+            ("GET", ("*", "totals", "*")): self.totals,
+            ("GET", ("*", "changes")): self.changes,
+            ("GET", ("*", "duplicates")): self.duplicates_of,
+            ("GET", ("*", "duplicates", "groups")): self.find_duplicates,
+            ("POST", ("*", "duplicates", "refresh")): self.refresh_duplicates,
+            ("POST", ("*", "merge")): self.merge,
+            ("GET", ("*", "export")): self.export,
+            ("POST", ("*", "import")): self.import_file,
+            ("POST", ("*", "movements")): self.move,
+            ("GET", ("*", "movements", "*")): self.history,
+            ("GET", ("*", "thresholds")): self.thresholds,
+            ("PUT", ("*", "thresholds")): self.set_threshold,
+        }
+
+    async def read(self, fn, *args, **kwargs):
+        loop = asyncio.get_event_loop()
+        return await loop.run_in_executor(self.readers, functools.partial(fn, *args, **kwargs))
+
+    async def write(self, fn, *args, **kwargs):
+        loop = asyncio.get_event_loop()
+        return await loop.run_in_executor(self.writer, functools.partial(fn, *args, **kwargs))
+
+    def close(self):
+        self.readers.shutdown()
+        self.writer.shutdown()
+
+    # ========== HTTP ========== #
+    def route(self, request):
+        # The first part is the department; literal parts are tried
+        # before an id, e.g. rows/delete before rows/<id>
+        shape = tuple(request.path)
+        method = "GET" if request.method == "HEAD" else request.method
+        candidates = (shape, ("*",) + shape[1:],
+                      ("*",) + shape[1:2] + ("*",) * (len(shape) - 2))
+        for candidate in candidates:
+            handler = self.routes.get((method, candidate))
+            if handler is not None:
+                return handler
+        if any(parts in candidates for _, parts in self.routes):
+            raise HTTPError(405, "{} is not allowed here".format(request.method))
+        raise HTTPError(404, "no such resource: /{}".format("/".join(shape)))
+
+    async def respond(self, request):
+        try:
+            return await self.route(request)(request)
+        except Exception as e:
+            response = _error(e)
+            if response.status == 500:
+                traceback.print_exc()
+            return response
+
+    async def handle(self, reader, writer):
+        try:
+            while True:
+                try:
+                    request = await _read_request(reader)
+                except HTTPError as e:
+                    await _send(writer, _error(e), "HTTP/1.1", False)
+                    break
+                if request is None:
+                    break
+                response = await self.respond(request)
+                response = _conditional(request, response)
+                keep_alive = request.keep_alive()
+                await _send(writer, response, request.version, keep_alive,
+                            head=request.method == "HEAD")
+                if not keep_alive:
+                    break
+        except (ConnectionError, asyncio.IncompleteReadError):
+            pass
+        finally:
+            writer.close()
+
+    # ========== Helpers ========== #
+    def schema(self, request):
+        schema = self.tables.get(request.path[0].lower())
+        if schema is None:
+            schema = schemas.SCHEMAS.get(request.path[0].upper())
+        if schema is None:
+            raise HTTPError(404, "no department {}".format(request.path[0]))
+        return schema
+
+    def repository(self, request):
+        return repository.get(self.schema(request).key)
+
+    async def etag(self, *tables):
+        versions = await self.read(lambda: [cache.version(table) for table in tables])
+        return '"{}-{}"'.format(self.boot, "-".join(versions))
+
+    def _where(self, repo, request):
+        # The field filters of the query, e.g. ?Cabinet=A1&Amount=<10&match=all
+        named = {name: request.query[name] for name in repo.columns
+                 if request.query.get(name)}
+        match = query.MATCH_ALL if request.query.get("match", "any").lower() in (
+            "all", "and") else query.MATCH_ANY
+        return repo.search_filter(match=match, **named)
+
+    def _id(self, request, position=2):
+        try:
+            return int(request.path[position])
+        except ValueError:
+            raise HTTPError(400, "item ids are whole numbers") from None
+
+    # ========== Resources ========== #
+    async def index(self, request):
+        return _json({"departments": [
+            {"key": schema.key, "table": schema.table, "stock": schema.stock,
+             "columns": ["id"] + list(repository.get(schema.key).stored_columns)}
+            for schema in schemas.SCHEMAS.values()],
+            "max_limit": MAX_LIMIT, "schema_version": await self.read(migrations.version)})
+
+    async def rows(self, request):
+        """
+        A page of rows: ?after=<key>&limit=N where key is the "next" of
+        the previous page, with the field filters of _where(), sort=Column
+        and descending=1. limit=all streams every matching row.
+        """
+        repo = self.repository(request)
+        where, params = self._where(repo, request)
+        sort = request.query.get("sort") or None
+        if sort is not None and sort not in repo.stored_columns:
+            raise HTTPError(400, "no column {} to sort by".format(sort))
+        descending = request.query.get("descending", "") in ("1", "true")
+        after = _key(request.query.get("after"))
+        before = _key(request.query.get("before"))
+        limit = request.query.get("limit", str(repository.PAGE_SIZE))
+        etag = await self.etag(repo.schema.table)
+        columns = ["id"] + list(repo.stored_columns)
+        if limit == "all":
+            return Response(200, self._stream(repo, columns, where, params, sort,
+                                              descending, after),
+                            {"Content-Type": "application/json", "ETag": etag})
+        try:
+            limit = max(1, min(int(limit), MAX_LIMIT))
+        except ValueError:
+            raise HTTPError(400, "limit is a number or all") from None
+        rows = await self.read(repo.page, where, params, sort, descending, after, before, limit)
+        following = repo.sort_key(rows[-1], sort) if len(rows) == limit else None
+        return _json({"columns": columns, "rows": rows, "next": following}, etag=etag)
+
+    async def _stream(self, repo, columns, where, params, sort, descending, after):
+        yield '{{"columns": {}, "rows": ['.format(json.dumps(columns)).encode("utf-8")
+        first = True
+        while True:
+            rows = await self.read(repo.page, where, params, sort, descending, after,
+                                   None, STREAM_PAGE)
+            if rows:
+                text = ",\n".join(json.dumps(row, ensure_ascii=False) for row in rows)
+                yield (text if first else ",\n" + text).encode("utf-8")
+                first = False
+            if len(rows) < STREAM_PAGE:
+                break
+            after = repo.sort_key(rows[-1], sort)
+        yield b"]}"
+
+    def item_etag(self, row):
+        # Changes with the item only, not with the rest of its table, so
+        # If-Match on a PUT fails only when this item changed
+        digest = hashlib.sha1(json.dumps(row).encode("utf-8")).hexdigest()[:16]
+        return '"{}-{}"'.format(self.boot, digest)
+
+    async def row(self, request):
+        repo = self.repository(request)
+        row = await self.read(repo.search_row, self._id(request))
+        if row is None:
+            raise HTTPError(404, "no item {}".format(request.path[2]))
+        return _json({"columns": ["id"] + list(repo.stored_columns), "row": row},
+                     etag=self.item_etag(row))
+
+    def _values(self, repo, body):
+        # {"values": [...]} in column order, or {"Column": value, ...}
+        values = body.get("values")
+        if values is not None:
+            return list(values), {}
+        named = {name: value for name, value in body.items() if name in repo.columns}
+        if len(named) != len(body):
+            raise HTTPError(400, "unknown columns: {}".format(
+                ", ".join(sorted(set(body) - set(named)))))
+        return [], named
+
+    async def add_row(self, request):
+        repo = self.repository(request)
+        values, named = self._values(repo, request.json())
+        row = await self.write(repo.add_row, *values, **named)
+        return _json({"row": row}, 201)
+
+    async def update_row(self, request):
+        repo = self.repository(request)
+        body = request.json()
+        amount_was = body.pop("amount_was", None)
+        values, named = self._values(repo, body)
+        expected = request.headers.get("if-match")
+        id = self._id(request)
+
+        def update():
+            # The precondition is checked by the writer, so no other
+            # write of the service can come in between
+            if expected is not None and expected != "*":
+                current = repo.search_row(id)
+                if current is not None and self.item_etag(current) != expected:
+                    raise HTTPError(412, "the item changed since it was read")
+            row = repo.update_row(id, *values, amount_was=amount_was, **named)
+            if row is None:
+                return None, None
+            return row, self.item_etag(repo.search_row(id))
+        row, etag = await self.write(update)
+        if row is None:
+            raise HTTPError(404, "no item {}".format(id))
+        return _json({"row": row}, etag=etag)
+
+    async def delete_row(self, request):
+        repo = self.repository(request)
+        id = await self.write(repo.delete_row, self._id(request))
+        if id is None:
+            raise HTTPError(404, "no item {}".format(request.path[2]))
+        return _json({"deleted": id})
+
+    async def delete_rows(self, request):
+        repo = self.repository(request)
+        ids = request.json().get("ids") or []
+        return _json({"deleted": await self.write(repo.delete_rows, ids)})
+
+    async def update_rows(self, request):
+        repo = self.repository(request)
+        body = request.json()
+        rows = await self.write(repo.update_rows, body.get("ids") or [],
+                                **(body.get("changes") or {}))
+        return _json({"rows": rows})
+
+    async def count(self, request):
+        repo = self.repository(request)
+        where, params = self._where(repo, request)
+        etag = await self.etag(repo.schema.table)
+        return _json({"count": await self.read(repo.count, where, params)}, etag=etag)
+
+    async def search_text(self, request):
+        repo = self.repository(request)
+        try:
+            limit = max(1, min(int(request.query.get("limit", 200)), MAX_LIMIT))
+        except ValueError:
+            raise HTTPError(400, "limit is a number") from None
+        etag = await self.etag(repo.schema.table)
+        rows = await self.read(repo.search_text, request.query.get("q", ""), limit)
+        return _json({"columns": ["id"] + list(repo.stored_columns), "rows": rows,
+                      "truncated": rows.truncated}, etag=etag)
+
+    async def category_totals(self, request):
+        repo = self.repository(request)
+        etag = await self.etag(repo.schema.table)
+        return _json({"categories": await self.read(repo.category_totals)}, etag=etag)
+
+    async def totals(self, request):
+        # Items and Amount per value of /{table}/totals/<dimension>
+        repo = self.repository(request)
+        dimension = request.path[2]
+        if dimension not in summaries.dimensions(repo.schema):
+            raise HTTPError(404, "no totals per {} in {}".format(dimension, repo.schema.key),
+                            dimensions=list(summaries.dimensions(repo.schema)))
+        etag = await self.etag(repo.schema.table)
+        return _json({"totals": await self.read(repo.totals, dimension)}, etag=etag)
+
+    async def department_totals(self, request):
+        etag = await self.etag(*self.tables)
+        return _json({"departments": await self.read(summaries.departments)}, etag=etag)
+
+    async def changes(self, request):
+        """
+        The changes after ?since=<seq> (see changes.py) for the field
+        filters of _where(): {"seq", "rows", "inserted", "deleted",
+        "total"}, or {"seq", "reload": true} when the client is too far
+        behind. ?wait=<seconds> holds the answer until something changed
+        or the time is up. Without since, only the latest seq.
+        """
+        repo = self.repository(request)
+        table = repo.schema.table
+        if "since" not in request.query:
+            return _json({"seq": await self.read(repo.last_change)})
+        where, params = self._where(repo, request)
+        try:
+            since = int(request.query["since"])
+            wait = min(float(request.query.get("wait", 0)), MAX_WAIT)
+        except ValueError:
+            raise HTTPError(400, "since and wait are numbers") from None
+        loop = asyncio.get_event_loop()
+        deadline = loop.time() + wait
+        while True:
+            version = await self.read(cache.version, table)
+            delta = await self.read(repo.changes_since, since, where, params)
+            if delta is None or delta.seq != since or loop.time() >= deadline:
+                break
+            while loop.time() < deadline and await self.read(cache.version, table) == version:
+                await asyncio.sleep(WAIT_POLL)
+        if delta is None:
+            return _json({"seq": await self.read(repo.last_change), "reload": True})
+        return _json({"seq": delta.seq, "columns": ["id"] + list(repo.stored_columns),
+                      "rows": delta.rows, "inserted": delta.inserted,
+                      "deleted": delta.deleted, "total": delta.total})
+
+    async def duplicates_of(self, request):
+        """
+        The items that look like ?Description=...&PartNo=..., except
+        ?exclude=<id>: {"columns", "duplicates": [{"row", "similarity",
+        "same_part"}], "stale"}. Only reads, like Repository.duplicates_of().
+        """
+        repo = self.repository(request)
+        named = {name: request.query[name] for name in repo.columns if name in request.query}
+        try:
+            exclude = int(request.query["exclude"]) if request.query.get("exclude") else None
+        except ValueError:
+            raise HTTPError(400, "item ids are whole numbers") from None
+        found = await self.read(repo.duplicates_of, exclude=exclude, **named)
+        return _json({"columns": ["id"] + list(repo.stored_columns), "duplicates": [
+            {"row": row, "similarity": score, "same_part": same} for row, score, same in found],
+            "stale": found.stale})
+
+    async def refresh_duplicates(self, request):
+        repo = self.repository(request)
+        return _json({"refreshed": await self.write(repo.refresh_duplicates)})
+
+    async def find_duplicates(self, request):
+        # Every group of duplicates, see Repository.find_duplicates()
+        repo = self.repository(request)
+        await self.write(repo.refresh_duplicates)
+        groups = await self.read(repo.find_duplicates, refresh=False)
+        return _json({"columns": ["id"] + list(repo.stored_columns), "groups": [
+            [{"row": row, "similarity": score, "same_part": same} for row, score, same in group]
+            for group in groups]})
+
+    async def merge(self, request):
+        # {"keep": id, "ids": [...]}, see Repository.merge()
+        repo = self.repository(request)
+        body = request.json()
+        if "keep" not in body:
+            raise HTTPError(400, "merge needs the id of the item kept")
+        try:
+            keep, ids = int(body["keep"]), [int(id) for id in body.get("ids") or []]
+        except (TypeError, ValueError):
+            raise HTTPError(400, "item ids are whole numbers") from None
+        row = await self.write(repo.merge, keep, ids)
+        return _json({"row": row})
+
+    async def export(self, request):
+        # The CSV file of to_csv(), streamed as it is written
+        repo = self.repository(request)
+
+        async def chunks():
+            directory = await self.read(tempfile.mkdtemp)
+            try:
+                path = os.path.join(directory, "export.csv")
+                await self.read(repo.to_csv, path, compress=False)
+                with open(path, "rb") as f:
+                    while True:
+                        chunk = await self.read(f.read, csv_export.BATCH_SIZE * 64)
+                        if not chunk:
+                            break
+                        yield chunk
+            finally:
+                shutil.rmtree(directory, ignore_errors=True)
+        return Response(200, chunks(), {"Content-Type": "text/csv; charset=utf-8"})
+
+    async def import_file(self, request):
+        # The body is the file; ?name= gives its extension (.csv, .xlsx)
+        repo = self.repository(request)
+        extension = os.path.splitext(request.query.get("name", "import.csv"))[1].lower()
+        if extension not in (".csv", ".xlsx"):
+            raise HTTPError(400, "only .csv and .xlsx files can be imported")
+        # Up to MAX_BODY is written and removed on the readers, never on
+        # the event loop
+        directory = await self.read(tempfile.mkdtemp)
+        try:
+            path = os.path.join(directory, "import" + extension)
+            await self.read(_save, path, request.body)
+            result = await self.write(repo.import_file, path)
+        finally:
+            await self.read(shutil.rmtree, directory, ignore_errors=True)
+        return _json({"imported": result.imported, "rejected_count": result.rejected_count,
+                      "rejected": [list(rejected) for rejected in result.rejected]})
+
+    async def move(self, request):
+        schema = self.schema(request)
+        body = request.json()
+        amounts = await self.write(ledger.move, schema.key,
+                                   [tuple(movement) for movement in body.get("movements", ())],
+                                   body.get("note", ""))
+        return _json({"amounts": amounts})
+
+    async def history(self, request):
+        schema = self.schema(request)
+        etag = await self.etag("movements")
+        try:
+            limit = max(1, min(int(request.query.get("limit", 100)), MAX_LIMIT))
+        except ValueError:
+            raise HTTPError(400, "limit is a number") from None
+        return _json({"columns": list(ledger.COLUMNS), "movements": await self.read(
+            ledger.history, schema.key, self._id(request), limit)}, etag=etag)
+
+    async def alerts(self, request):
+        key = request.query.get("department") or None
+        tables = ([schemas.stock_schema(key).table] if key else
+                  [schema.table for schema in schemas.stock_schemas()])
+        etag = await self.etag(*tables)
+        return _json({"alerts": await self.read(alerts.low_stock, key)}, etag=etag)
+
+    async def thresholds(self, request):
+        schema = self.schema(request)
+        return _json({"thresholds": await self.read(alerts.thresholds, schema.key)})
+
+    async def set_threshold(self, request):
+        # {"category": name} or {"item": id}, with "threshold": n or null
+        schema = self.schema(request)
+        body = request.json()
+        if "category" in body:
+            await self.write(alerts.set_category_threshold, schema.key, body["category"],
+                             body.get("threshold"))
+        elif "item" in body:
+            await self.write(alerts.set_item_threshold, schema.key, body["item"],
+                             body.get("threshold"))
+        else:
+            raise HTTPError(400, "a threshold is for a category or an item")
+        return Response(204)
+
+
+def _key(text):
+    # A page key as JSON, e.g. ["Resistors", 512]
+    if not text:
+        return None
+    try:
+        key = json.loads(text)
+    except ValueError:
+        raise HTTPError(400, "a page key is a JSON array") from None
+    if not isinstance(key, list) or len(key) != 2:
+        raise HTTPError(400, "a page key is [sort value, id]")
+    return tuple(key)
+
+
+def page_query(after=None, before=None, **params):
+    # The query string of a page request, see InventoryService.rows()
+    if after is not None:
+        params["after"] = json.dumps(list(after))
+    if before is not None:
+        params["before"] = json.dumps(list(before))
+    return urlencode(params)
+
+
+async def _read_request(reader):
+    line = await reader.readline()
+    if not line:
+        return None
+    try:
+        method, target, version = line.decode("latin-1").split()
+    except ValueError:
+        raise HTTPError(400, "bad request line") from None
+    headers = {}
+    while True:
+        line = await reader.readline()
+        if line in (b"\r\n", b"\n", b""):
+            break
+        if len(headers) >= MAX_HEADERS:
+            raise HTTPError(400, "too many headers")
+        name, _, value = line.decode("latin-1").partition(":")
+        headers[name.strip().lower()] = value.strip()
+    if "chunked" in headers.get("transfer-encoding", "").lower():
+        raise HTTPError(411, "send a Content-Length")
+    try:
+        length = int(headers.get("content-length", 0))
+    except ValueError:
+        raise HTTPError(400, "bad Content-Length") from None
+    if length > MAX_BODY:
+        raise HTTPError(413, "the body is larger than {} bytes".format(MAX_BODY))
+    body = await reader.readexactly(length) if length else b""
+    return Request(method.upper(), target, version.upper(), headers, body)
+
+
+def _conditional(request, response):
+    # 304 for a GET whose If-None-Match holds the current ETag
+    etag = response.headers.get("ETag")
+    if (request.method in ("GET", "HEAD") and response.status == 200 and etag is not None
+            and etag in (tag.strip() for tag in
+                         request.headers.get("if-none-match", "").split(","))):
+        # A streamed body has not started, it is dropped unread
+        return Response(304, b"", {"ETag": etag})
+    return response
+
+
+async def _send(writer, response, version, keep_alive, head=False):
+    headers = dict(response.headers)
+    streamed = not isinstance(response.body, bytes)
+    chunked = streamed and version == "HTTP/1.1"
+    if streamed and not chunked:
+        keep_alive = False
+    if chunked:
+        headers["Transfer-Encoding"] = "chunked"
+    elif not streamed and response.status not in (204, 304):
+        headers["Content-Length"] = str(len(response.body))
+    headers["Connection"] = "keep-alive" if keep_alive else "close"
+    lines = ["HTTP/1.1 {} {}".format(response.status, REASONS.get(response.status, ""))]
+    lines.extend("{}: {}".format(name, value) for name, value in headers.items())
+    writer.write(("\r\n".join(lines) + "\r\n\r\n").encode("latin-1"))
+    if head:
+        if streamed:
+            await response.body.aclose()
+    elif not streamed:
+        writer.write(response.body)
+    else:
+        async for chunk in response.body:
+            if chunked:
+                writer.write(b"%x\r\n%s\r\n" % (len(chunk), chunk))
+            else:
+                writer.write(chunk)
+            # Waits while the client reads slower than the table is read
+            await writer.drain()
+        if chunked:
+            writer.write(b"0\r\n\r\n")
+    await writer.drain()
+
+
+async def serve(host=HOST, port=PORT, readers=READERS, ready=None):
+    service = InventoryService(readers)
+    server = await asyncio.start_server(service.handle, host, port)
+    address = server.sockets[0].getsockname()
+    if ready is not None:
+        ready(address)
+    try:
+        async with server:
+            await server.serve_forever()
+    finally:
+        service.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Inventory service over HTTP/JSON")
+    parser.add_argument("--db", default=connection.DB_PATH)
+    parser.add_argument("--host", default=HOST,
+                        help="0.0.0.0 to accept other computers")
+    parser.add_argument("--port", type=int, default=PORT, help="0 picks a free port")
+    parser.add_argument("--readers", type=int, default=READERS)
+    args = parser.parse_args()
+    # One connection per reader, the writer's and a spare
+    connection.configure(args.db, size=args.readers + 2)
+    migrations.migrate()
+
+    def ready(address):
+        print("Serving {} on http://{}:{}/".format(args.db, *address[:2]), flush=True)
+    try:
+        asyncio.run(serve(args.host, args.port, args.readers, ready))
+    except KeyboardInterrupt:
+        pass
+    finally:
+        cache.close()
+        connection.close()
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,89 @@
+# ##################################################################
+# File name:    summaries.py
+# Author:       agent
+# Create on:    2026-10-18
+# Description:  Inventory totals per Category, Cabinet and Supplier and
+#               per department, kept by triggers in the summaries table
+#               so the analytics never read a whole department
+# ##################################################################
+
+
+import cache
+import connection
+import instrumentation
+import schemas
+
+
+# The columns totalled, where a department has them
+DIMENSIONS = ("Category", "Cabinet", "Supplier")
+
+# One row per (department table, dimension, value): the items with that
+# value and their total Amount. An empty or missing value is ''. A row
+# is dropped with its last item. The summaries table is created and
+# filled by migrations.py, and kept by the triggers of _triggers().
+# Columns of a total after the value
+COLUMNS = ("Items", "Amount")
+
+
+def dimensions(schema):
+    return tuple(name for name in DIMENSIONS if name in schema.names)
+
+
+def _add(table, dimension, row, sign):
+    # Statements adding (sign "+") or removing (sign "-") the row NEW or
+    # OLD to the totals of dimension. INSERT OR IGNORE and UPDATE rather
+    # than an upsert, which older SQLite versions do not know.
+    name = "IFNULL({}.{}, '')".format(row, dimension)
+    where = "TableName='{}' AND Dimension='{}' AND Name={}".format(table, dimension, name)
+    statements = []
+    if sign == "+":
+        statements.append("INSERT OR IGNORE INTO summaries VALUES ('{}', '{}', {}, 0, 0);"
+                          .format(table, dimension, name))
+    statements.append("UPDATE summaries SET Items=Items {0} 1, "
+                      "Amount=Amount {0} IFNULL({1}.Amount, 0) WHERE {2};"
+                      .format(sign, row, where))
+    if sign == "-":
+        statements.append("DELETE FROM summaries WHERE {} AND Items=0;".format(where))
+    return "".join(statements)
+
+
+def _triggers(schema):
+    # (name, event, body)
+    table = schema.table
+    triggers = []
+    for dimension in dimensions(schema):
+        prefix = "{}_summary_{}".format(table, dimension.lower())
+        triggers += [
+            (prefix + "_ai", "AFTER INSERT ON " + table, _add(table, dimension, "NEW", "+")),
+            (prefix + "_au", "AFTER UPDATE OF {0}, Amount ON {1} WHEN OLD.{0} IS NOT NEW.{0} "
+                             "OR OLD.Amount IS NOT NEW.Amount".format(dimension, table),
+             _add(table, dimension, "OLD", "-") + _add(table, dimension, "NEW", "+")),
+            (prefix + "_ad", "AFTER DELETE ON " + table, _add(table, dimension, "OLD", "-")),
+        ]
+    return triggers
+
+
+def totals(cursor, table, dimension):
+    # [(value, items, total Amount)] of table in value order
+    return cursor.execute("SELECT Name, Items, Amount FROM summaries "
+                          "WHERE TableName=? AND Dimension=? ORDER BY Name",
+                          (table, dimension)).fetchall()
+
+
+# ========== Reports ========== #
+@instrumentation.timed()
+def departments():
+    """
+    [(department key, items, total Amount)] in the order of the
+    department selector, from the Category totals of each.
+    """
+    def load(schema):
+        def read():
+            with connection.connection() as conn:
+                row = conn.execute("SELECT IFNULL(sum(Items), 0), IFNULL(sum(Amount), 0) "
+                                   "FROM summaries WHERE TableName=? AND Dimension='Category'",
+                                   (schema.table,)).fetchone()
+            return (schema.key,) + tuple(row)
+        return read
+    return [cache.value(schema.table, ("department_totals",), load(schema))
+            for schema in schemas.SCHEMAS.values()]
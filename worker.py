@@ -0,0 +1,153 @@
+# ##################################################################
+# File name:    worker.py
+# Author:       agent
+# Create on:    2026-10-18
+# Description:  Runs database jobs on a thread pool and reports their
+#               results back to the GUI thread
+# ##################################################################
+
+
+import logging
+import threading
+
+from PyQt5 import QtCore
+
+import connection
+
+
+class JobSignals(QtCore.QObject):
+    finished = QtCore.pyqtSignal(object)
+    failed = QtCore.pyqtSignal(object)
+    progress = QtCore.pyqtSignal(int, int)
+
+
+class Job(QtCore.QRunnable):
+    """
+    One call of a database function. The function runs on a pool thread;
+    its return value or exception is delivered through `signals` in the
+    thread that created the job.
+    """
+
+    def __init__(self, fn, args=(), kwargs=None, channel=None):
+        super(Job, self).__init__()
+        self.setAutoDelete(False)
+        self.fn = fn
+        self.args = args
+        self.kwargs = kwargs or {}
+        self.channel = channel
+        self.cancel_event = threading.Event()
+        self.signals = JobSignals()
+        self.result = None
+        self.error = None
+
+    def cancel(self):
+        self.cancel_event.set()
+
+    def cancelled(self):
+        return self.cancel_event.is_set()
+
+    def report_progress(self, done, total):
+        # Progress callback for functions that accept one
+        self.signals.progress.emit(done, total)
+
+    def run(self):
+        if self.cancelled():
+            self.signals.failed.emit(self)
+            return
+        try:
+            with connection.cancellable(self.cancel_event):
+                self.result = self.fn(*self.args, **self.kwargs)
+        except Exception as e:
+            self.error = e
+            self.signals.failed.emit(self)
+        else:
+            self.signals.finished.emit(self)
+
+
+class DatabaseExecutor(QtCore.QObject):
+    """
+    Submit database functions with submit(). Jobs that share a channel
+    supersede each other: a new search cancels the one still running,
+    and the stale job's result is never delivered. The errors of jobs
+    submitted without on_error are emitted by `failed`, or logged when
+    nothing is connected to it.
+    """
+
+    busy_changed = QtCore.pyqtSignal(bool)
+    progress = QtCore.pyqtSignal(int, int)
+    failed = QtCore.pyqtSignal(object)
+
+    def __init__(self, parent=None, max_threads=connection.POOL_SIZE):
+        super(DatabaseExecutor, self).__init__(parent)
+        self._pool = QtCore.QThreadPool(self)
+        self._pool.setMaxThreadCount(max_threads)
+        self._channels = {}
+        self._pending = set()
+        self._callbacks = {}
+
+    def submit(self, fn, *args, channel=None, on_result=None, on_error=None,
+               with_progress=False, **kwargs):
+        job = Job(fn, args, kwargs, channel)
+        if with_progress:
+            job.kwargs["progress"] = job.report_progress
+        if channel is not None:
+            self.cancel(channel)
+            self._channels[channel] = job
+        self._callbacks[job] = (on_result, on_error)
+        job.signals.finished.connect(self._job_finished)
+        job.signals.failed.connect(self._job_failed)
+        job.signals.progress.connect(self.progress)
+
+        was_busy = bool(self._pending)
+        self._pending.add(job)
+        if not was_busy:
+            self.busy_changed.emit(True)
+        self._pool.start(job)
+        return job
+
+    def cancel(self, channel):
+        job = self._channels.pop(channel, None)
+        if job is not None:
+            job.cancel()
+
+    def is_busy(self):
+        return bool(self._pending)
+
+    def pending(self, channel):
+        # True while a job of channel has not delivered its result
+        return channel in self._channels
+
+    def wait(self, msecs=-1):
+        # Block until every job has run, then deliver their results
+        done = self._pool.waitForDone(msecs)
+        QtCore.QCoreApplication.sendPostedEvents()
+        return done
+
+    def _done(self, job):
+        self._pending.discard(job)
+        if self._channels.get(job.channel) is job:
+            del self._channels[job.channel]
+        callbacks = self._callbacks.pop(job, (None, None))
+        if not self._pending:
+            self.busy_changed.emit(False)
+        return callbacks
+
+    def _job_finished(self, job):
+        on_result, on_error = self._done(job)
+        if job.cancelled():
+            return
+        if on_result is not None:
+            on_result(job.result)
+
+    def _job_failed(self, job):
+        on_result, on_error = self._done(job)
+        if job.cancelled() or job.error is None:
+            return
+        if on_error is not None:
+            on_error(job.error)
+        elif self.receivers(self.failed):
+            self.failed.emit(job.error)
+        else:
+            logging.getLogger(__name__).error(
+                "database job %s failed", getattr(job.fn, "__name__", job.fn),
+                exc_info=(type(job.error), job.error, job.error.__traceback__))